@@ -0,0 +1,62 @@
+"""auto
+
+Revision ID: 281b26fab5db
+Revises: 872ae617bb79
+Create Date: 2026-10-18 09:12:31.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '281b26fab5db'
+down_revision: Union[str, None] = '872ae617bb79'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('dashboardsnapshot',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('total_units', sa.Integer(), nullable=False),
+    sa.Column('total_payments', sa.Integer(), nullable=False),
+    sa.Column('total_revenue', sa.Numeric(precision=18, scale=2), nullable=False),
+    sa.Column('total_outstanding', sa.Numeric(precision=18, scale=2), nullable=False),
+    sa.Column('refreshed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('monthlyrevenue',
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('amount', sa.Numeric(precision=18, scale=2), nullable=False),
+    sa.PrimaryKeyConstraint('month')
+    )
+
+    # Build the initial snapshot from the existing rows
+    op.execute("""
+        INSERT INTO dashboardsnapshot (id, total_units, total_payments, total_revenue, total_outstanding, refreshed_at)
+        SELECT 1,
+            (SELECT count(*) FROM unit WHERE deleted = false),
+            count(*),
+            coalesce(sum(amount) FILTER (WHERE status = 'PAID'), 0),
+            coalesce(sum(amount) FILTER (WHERE status = 'NOT_PAID'), 0),
+            now()
+        FROM payment
+        WHERE deleted = false
+    """)
+    op.execute("""
+        INSERT INTO monthlyrevenue (month, amount)
+        SELECT date_trunc('month', payment_date)::date, sum(amount)
+        FROM payment
+        WHERE deleted = false AND status = 'PAID' AND payment_date IS NOT NULL
+        GROUP BY date_trunc('month', payment_date)::date
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('monthlyrevenue')
+    op.drop_table('dashboardsnapshot')
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.routes import project, upload, unit, payment, document, unit_agent_link, user, notification, push_token, company, auth, dashboard
+from app.api.routes import project, upload, unit, payment, document, unit_agent_link, user, notification, push_token, company, auth, dashboard, system
 api = APIRouter(prefix='/api/v1')
 
 api.include_router(auth.router, prefix="/auth", tags=["Auth"])
@@ -13,4 +13,5 @@ api.include_router(upload.router, prefix="/upload", tags=["Upload"])
 api.include_router(notification.router, prefix="/notification", tags=["Notification"])
 api.include_router(push_token.router, prefix="/push-token", tags=["Push Token"])
 api.include_router(company.router, prefix="/company", tags=["Company"])
-api.include_router(dashboard.router, prefix="/dashboard", tags=["Dashboard"])
\ No newline at end of file
+api.include_router(dashboard.router, prefix="/dashboard", tags=["Dashboard"])
+api.include_router(system.router, prefix="/system", tags=["System"])
\ No newline at end of file
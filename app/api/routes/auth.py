@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlmodel import Session, select
 from app.db.session import get_session
-from app.services.user_service import create_user, authenticate_user, forgot_password, reset_password
+from app.services.user_service import create_user, authenticate_user, forgot_password, invalidate_cached_user, reset_password
 from app.auth.dependencies import get_current_user
 from app.schemas.user import RegisterRequest, LoginResponse, ResetPasswordRequest, VerifyRequest, ForgotPasswordRequest
 from app.core.config import settings
@@ -32,6 +32,7 @@ def verify(data: VerifyRequest, session: Session = Depends(get_session)):
     user.verification_code = None
     session.add(user)
     session.commit()
+    invalidate_cached_user(user.id)
     token = create_access_token({"sub": user.id, "role": user.role})
     return {
         "message": "Verification successful",
@@ -56,7 +57,7 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), session: Session = D
     }
 
 @router.post("/refresh", response_model=LoginResponse)
-def refresh_token(session: Session = Depends(get_session), user: User = Depends(get_current_user)):
+def refresh_token(session: Session = Depends(get_session), user: User = Depends(get_current_user())):
     if not user.is_verified:
         raise HTTPException(status_code=403, detail="Email not verified")
     token = create_access_token({"sub": user.id, "role": user.role})
@@ -80,6 +81,6 @@ def reset_password_route(data: ResetPasswordRequest, session: Session = Depends(
     return {"message": "Password reset successful."}
 
 @router.post("/logout")
-def logout(session: Session = Depends(get_session), user: User = Depends(get_current_user)):
+def logout(session: Session = Depends(get_session), user: User = Depends(get_current_user())):
     # Invalidate the user's session or token here if needed
     return {"message": "Logged out successfully."}
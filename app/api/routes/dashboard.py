@@ -1,14 +1,21 @@
 from fastapi import APIRouter, Depends
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.auth.dependencies import get_current_user
-from app.db.session import get_session
+from app.db.session import get_async_session, get_session
 from typing import Any
 from app.models.user import Role
 from app.schemas.dashboard import DashboardSummary
-from app.services.dashboard import get_admin_dashboard
+from app.services.dashboard import get_admin_dashboard, get_admin_dashboard_async
+from app.services.dashboard_snapshot_service import rebuild_dashboard_snapshot
 
 router = APIRouter()
 
 @router.get("/admin", response_model=DashboardSummary, dependencies=[Depends(get_current_user([Role.ADMIN]))])
-def get_admin_dashboard_route(session: Session = Depends(get_session)) -> DashboardSummary:
+async def get_admin_dashboard_route(session: AsyncSession = Depends(get_async_session)) -> DashboardSummary:
+    return await get_admin_dashboard_async(session)
+
+@router.post("/admin/rebuild", response_model=DashboardSummary, dependencies=[Depends(get_current_user([Role.ADMIN]))])
+def rebuild_admin_dashboard_route(session: Session = Depends(get_session)) -> DashboardSummary:
+    rebuild_dashboard_snapshot(session)
     return get_admin_dashboard(session)
@@ -1,12 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
 from typing import List
 from uuid import UUID
 from sqlmodel import Session, select
-from app.db.session import get_session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.db.session import get_async_session, get_session
 from app.auth.dependencies import get_current_user
-from app.schemas.notification import NotificationRead, NotificationList
+from app.schemas.notification import NotificationBroadcast, NotificationBroadcastResult, NotificationRead, NotificationList, PushDeliveryRead, UnreadCount
 from app.schemas.paging import Paging
-from app.services.notification_service import get_notifications_for_user, get_all_notifications_admin, get_notification_by_id, delete_notification, batch_mark_notifications_read  # Import the missing function
+from app.services.notification_service import create_notifications_bulk, get_notifications_for_user_async, get_unread_count_async, mark_all_read, get_all_notifications_admin_async, get_notification_by_id, delete_notification, batch_mark_notifications_read  # Import the missing function
+from app.services.push_outbox_service import get_push_deliveries
 from app.models.user import Role
 from app.utility.paging import paginate
 
@@ -14,29 +17,45 @@ router = APIRouter()
 
 # List notifications for current user (with paging)
 @router.get("/me", response_model=NotificationList, dependencies=[Depends(get_current_user([Role.ADMIN, Role.CLIENT, Role.AGENT]))])
-def list_notifications(
+async def list_notifications(
     paging: Paging = Depends(),
-    session: Session = Depends(get_session),
-    current_user=Depends(get_current_user)
+    session: AsyncSession = Depends(get_async_session),
+    current_user=Depends(get_current_user())
 ):
     user = current_user
-    return get_notifications_for_user(session, user.id, paging)
+    return await get_notifications_for_user_async(session, user.id, paging)
+
+# Unread badge count for current user
+@router.get("/me/unread-count", response_model=UnreadCount, dependencies=[Depends(get_current_user([Role.ADMIN, Role.CLIENT, Role.AGENT]))])
+async def unread_notification_count(
+    session: AsyncSession = Depends(get_async_session),
+    current_user=Depends(get_current_user())
+):
+    return await get_unread_count_async(session, current_user.id)
 
 # Admin: List notifications for any user
 @router.get("/admin/{user_id}", response_model=NotificationList, dependencies=[Depends(get_current_user([Role.ADMIN]))])
-def list_notifications_admin(
+async def list_notifications_admin(
     user_id: UUID,
     paging: Paging = Depends(),
+    session: AsyncSession = Depends(get_async_session)
+):
+    return await get_notifications_for_user_async(session, user_id, paging)
+
+# Admin: send the same notification to many users at once
+@router.post("/admin/broadcast", response_model=NotificationBroadcastResult, dependencies=[Depends(get_current_user([Role.ADMIN]))])
+def broadcast_notification(
+    data: NotificationBroadcast,
     session: Session = Depends(get_session)
 ):
-    return get_notifications_for_user(session, user_id, paging)
+    return create_notifications_bulk(session, data.user_ids, data.title, data.body, data.data)
 
 # Batch mark as read
 @router.post("/mark-as-read", response_model=dict, dependencies=[Depends(get_current_user([Role.ADMIN, Role.CLIENT, Role.AGENT]))])
 def batch_mark_as_read(
     notification_ids: List[UUID],
     session: Session = Depends(get_session),
-    current_user=Depends(get_current_user)
+    current_user=Depends(get_current_user())
 ):
     if not notification_ids:
         raise HTTPException(status_code=400, detail="No notification IDs provided")
@@ -45,6 +64,25 @@ def batch_mark_as_read(
         raise HTTPException(status_code=404, detail="No notifications found for the provided IDs")
     return {"updated": updated_count}
 
+# Admin: push delivery status of a notification, one entry per device token
+@router.get("/{notification_id}/deliveries", response_model=List[PushDeliveryRead], dependencies=[Depends(get_current_user([Role.ADMIN]))])
+def list_push_deliveries(
+    notification_id: UUID,
+    session: Session = Depends(get_session)
+):
+    if not get_notification_by_id(session, notification_id):
+        raise HTTPException(status_code=404, detail="Notification not found")
+    return get_push_deliveries(session, notification_id)
+
+# Mark every notification of the current user as read, optionally only those created up to `before`
+@router.post("/me/mark-all-read", response_model=dict, dependencies=[Depends(get_current_user([Role.ADMIN, Role.CLIENT, Role.AGENT]))])
+def mark_all_as_read(
+    before: datetime | None = None,
+    session: Session = Depends(get_session),
+    current_user=Depends(get_current_user())
+):
+    return {"updated": mark_all_read(session, current_user.id, before)}
+
 # Get notification by ID
 @router.get("/{notification_id}", response_model=NotificationRead, dependencies=[Depends(get_current_user([Role.ADMIN, Role.CLIENT, Role.AGENT]))])
 def get_notification(
@@ -75,8 +113,8 @@ def delete_notification_route(
 
 # Admin: Get all notifications across all users
 @router.get("/admin", response_model=NotificationList, dependencies=[Depends(get_current_user([Role.ADMIN]))])
-def get_all_notifications_admin_route(
+async def get_all_notifications_admin_route(
     paging: Paging = Depends(),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session)
 ):
-    return get_all_notifications_admin(session, paging)
\ No newline at end of file
+    return await get_all_notifications_admin_async(session, paging)
\ No newline at end of file
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlmodel import Session
-from app.db.session import get_session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.db.session import get_async_session, get_session
 from app.schemas.paging import Paging
 from app.services.payment_service import (
-    create_payment, get_all_payments, get_payment_by_id, update_payment, soft_delete_payment
+    create_payment, get_all_payments_async, get_payment_by_id, update_payment, soft_delete_payment
 )
 from app.schemas.payment import PaymentCreate, PaymentUpdate, PaymentRead, AllPayment
 from app.auth.dependencies import get_current_user
@@ -16,8 +17,8 @@ def create(data: PaymentCreate, session: Session = Depends(get_session)):
     return create_payment(session, data)
 
 @router.get("/", response_model=AllPayment, dependencies=[Depends(get_current_user([Role.ADMIN]))])
-def all(paging: Paging = Depends(), session: Session = Depends(get_session)):
-    return get_all_payments(session, paging)
+async def all(paging: Paging = Depends(), session: AsyncSession = Depends(get_async_session)):
+    return await get_all_payments_async(session, paging)
 
 @router.get("/{payment_id}", response_model=PaymentRead, dependencies=[Depends(get_current_user([Role.ADMIN]))])
 def get(payment_id: str, session: Session = Depends(get_session)):
@@ -24,7 +24,7 @@ def get_all(paging: Paging = Depends(), session: Session = Depends(get_session))
 
 @router.get("/{project_id}", response_model=ProjectSingle, dependencies=[Depends(get_current_user([Role.ADMIN, Role.AGENT, Role.CLIENT]))])
 def get_by_id(project_id: str, session: Session = Depends(get_session)):
-    project = get_project_by_id(session, project_id)
+    project = get_project_by_id(session, project_id, ProjectSingle)
     if not project or project.deleted:
         raise HTTPException(status_code=404, detail="Project not found")
     return project
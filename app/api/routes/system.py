@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Depends
+from app.auth.dependencies import get_current_user
+from app.db.session import pool_monitor
+from app.models.user import Role
+from app.schemas.system import PoolStats
+
+router = APIRouter()
+
+@router.get("/db-pool", response_model=PoolStats, dependencies=[Depends(get_current_user([Role.ADMIN]))])
+def get_db_pool_stats() -> PoolStats:
+    return PoolStats(**pool_monitor.stats())
@@ -1,20 +1,24 @@
 from uuid import UUID
 from typing import Any
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
 from sqlmodel import Session
-from app.db.session import get_session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.db.session import get_async_session, get_session
+from app.models.unit import Unit
 from app.schemas.payment import PaymentRead
-from app.services.payment_service import get_payments_by_unit
+from app.services.payment_service import get_payments_by_unit_async
 from app.services.unit_service import (
-    create_unit, get_all_units, get_unit_by_id, update_unit,
+    create_unit, get_all_units_async, get_unit_by_id, update_unit,
     soft_delete_unit, warranty_info, payment_summary, graph_data
 )
 from app.services.document_service import get_documents_for_unit
+from app.services.unit_import_service import import_units
 from app.schemas.document import DocumentRead, ReadAllDocuments
-from app.schemas.unit import SingleUnit, UnitCreate, UnitPayments, UnitUpdate, UnitRead, PaymentSummary, GraphDataPoint, ReadAllUnits
+from app.schemas.unit import SingleUnit, UnitCreate, UnitImportReport, UnitPayments, UnitUpdate, UnitRead, PaymentSummary, GraphDataPoint, ReadAllUnits
 from app.schemas.paging import Paging
 from app.auth.dependencies import get_current_user
 from app.models.user import Role
+from app.utility.row_readers import ROW_READERS
 
 router = APIRouter()
 
@@ -22,13 +26,21 @@ router = APIRouter()
 def create(data: UnitCreate, session: Session = Depends(get_session)):
     return create_unit(session, data)
 
+@router.post("/bulk", response_model=UnitImportReport, dependencies=[Depends(get_current_user([Role.ADMIN]))])
+def bulk_create(file: UploadFile = File(...), format: str | None = None, session: Session = Depends(get_session)):
+    # Rows are read from the spooled upload as they are inserted, never all at once
+    fmt = (format or (file.filename or "").rsplit(".", 1)[-1]).lower()
+    if fmt not in ROW_READERS:
+        raise HTTPException(status_code=400, detail="Upload a .csv or .jsonl file, or pass format=csv|jsonl")
+    return import_units(session, ROW_READERS[fmt](file.file))
+
 @router.get("/", response_model=ReadAllUnits, dependencies=[Depends(get_current_user([Role.ADMIN, Role.AGENT, Role.CLIENT]))])
-def all_units(paging: Paging = Depends(), session: Session = Depends(get_session)):
-    return get_all_units(session, paging)
+async def all_units(paging: Paging = Depends(), session: AsyncSession = Depends(get_async_session)):
+    return await get_all_units_async(session, paging)
 
 @router.get("/{unit_id}", response_model=SingleUnit, dependencies=[Depends(get_current_user([Role.ADMIN, Role.AGENT, Role.CLIENT]))])
 def get(unit_id: UUID, session: Session = Depends(get_session)):
-    unit = get_unit_by_id(session, unit_id)
+    unit = get_unit_by_id(session, unit_id, SingleUnit)
     if not unit or unit.deleted:
         raise HTTPException(status_code=404, detail="Unit not found")
     return unit
@@ -55,11 +67,11 @@ def get_warranty(unit_id: UUID, session: Session = Depends(get_session)):
     return warranty_info(unit)
 
 @router.get("/{unit_id}/payments", response_model=UnitPayments, dependencies=[Depends(get_current_user([Role.ADMIN, Role.CLIENT]))])
-def get_payments(unit_id: UUID, paging: Paging = Depends(), session: Session = Depends(get_session)):
-    unit = get_unit_by_id(session, unit_id)
+async def get_payments(unit_id: UUID, paging: Paging = Depends(), session: AsyncSession = Depends(get_async_session)):
+    unit = await session.get(Unit, unit_id)
     if not unit:
         raise HTTPException(status_code=404, detail="Unit not found")
-    return get_payments_by_unit(session, unit_id, paging)
+    return await get_payments_by_unit_async(session, unit_id, paging)
 
 @router.get("/{unit_id}/payment-summary", response_model=PaymentSummary, dependencies=[Depends(get_current_user([Role.ADMIN, Role.CLIENT]))])
 def get_payment_summary(unit_id: UUID, session: Session = Depends(get_session)):
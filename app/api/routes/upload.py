@@ -1,32 +1,44 @@
 from typing import Optional
-from fastapi import APIRouter, Form, HTTPException, UploadFile, File, Depends
+from fastapi import APIRouter, Form, HTTPException, Query, Request, UploadFile, File, Depends
 import uuid
 import os
 
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.auth.dependencies import get_current_user
-from app.db.session import get_session
+from app.db.session import get_async_session, get_session
 from app.models.user import Role, User
-from app.schemas.media import MediaFileReadSchema, UploadMediaFile
-from app.services.upload_service import create_media_file, create_media_files, download_media_file, get_all_media_files, get_media_file
+from app.schemas.media import CompleteUploadRequest, DownloadMode, MediaFileReadSchema, PresignUploadRequest, PresignUploadResponse, UploadMediaFile
+from app.services.upload_service import complete_presigned_upload, create_media_files, presign_upload, stream_media_file, download_media_file, get_all_media_files, get_media_file
 
 router = APIRouter()
 
-@router.post("/upload-media/", response_model=MediaFileReadSchema, dependencies=[Depends(get_current_user([Role.ADMIN, Role.AGENT, Role.CLIENT]))])
-async def upload_media(file: UploadFile = File(...),
-    unit_id: Optional[uuid.UUID] = Form(None),
-    project_id: Optional[uuid.UUID] = Form(None),
-    user_id: Optional[uuid.UUID] = Form(None),
-    current_user: User = Depends(get_current_user()),
-    session: Session = Depends(get_session)):
+# Form fields are parsed from the raw body so the file is never spooled; this documents them
+_UPLOAD_MEDIA_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {"multipart/form-data": {"schema": {
+            "type": "object",
+            "required": ["file"],
+            "properties": {
+                "file": {"type": "string", "format": "binary"},
+                "unit_id": {"type": "string", "format": "uuid"},
+                "project_id": {"type": "string", "format": "uuid"},
+                "user_id": {"type": "string", "format": "uuid"},
+            },
+        }}},
+    }
+}
 
-    if not file:
-        raise HTTPException(status_code=400, detail="No file provided")
+@router.post("/upload-media/", response_model=MediaFileReadSchema, openapi_extra=_UPLOAD_MEDIA_BODY, dependencies=[Depends(get_current_user([Role.ADMIN, Role.AGENT, Role.CLIENT]))])
+async def upload_media(request: Request,
+    current_user: User = Depends(get_current_user()),
+    session: AsyncSession = Depends(get_async_session)):
 
-    return create_media_file(session, current_user.id, file, unit_id, project_id, user_id)
+    return await stream_media_file(session, current_user.id, request.stream(), request.headers.get("content-type", ""))
 
 @router.post("/upload-multiple-media/", response_model=list[MediaFileReadSchema], dependencies=[Depends(get_current_user([Role.ADMIN, Role.AGENT, Role.CLIENT]))])
-async def upload_multiple_media(files: list[UploadFile] = File(...),
+def upload_multiple_media(files: list[UploadFile] = File(...),
     unit_id: Optional[uuid.UUID] = Form(None),
     project_id: Optional[uuid.UUID] = Form(None),
     user_id: Optional[uuid.UUID] = Form(None),
@@ -37,16 +49,32 @@ async def upload_multiple_media(files: list[UploadFile] = File(...),
 
     return create_media_files(session, current_user.id, files, unit_id, project_id, user_id)
 
+@router.post("/presign", response_model=PresignUploadResponse, dependencies=[Depends(get_current_user([Role.ADMIN, Role.AGENT, Role.CLIENT]))])
+def presign_media_upload(data: PresignUploadRequest,
+    current_user: User = Depends(get_current_user()),
+    session: Session = Depends(get_session)):
+
+    return presign_upload(session, current_user.id, data)
+
+@router.post("/complete", response_model=MediaFileReadSchema, dependencies=[Depends(get_current_user([Role.ADMIN, Role.AGENT, Role.CLIENT]))])
+def complete_media_upload(data: CompleteUploadRequest,
+    current_user: User = Depends(get_current_user()),
+    session: Session = Depends(get_session)):
+
+    return complete_presigned_upload(session, current_user.id, data)
+
 @router.get("/media", response_model=list[MediaFileReadSchema], dependencies=[Depends(get_current_user([Role.ADMIN, Role.AGENT, Role.CLIENT]))])
-async def get_all_media(session: Session = Depends(get_session)):
+def get_all_media(session: Session = Depends(get_session)):
     return get_all_media_files(session)
 
 
 @router.get("/media/{media_id}", response_model=MediaFileReadSchema, dependencies=[Depends(get_current_user([Role.ADMIN, Role.AGENT, Role.CLIENT]))])
-async def get_media(media_id: uuid.UUID, session: Session = Depends(get_session)):
+def get_media(media_id: uuid.UUID, session: Session = Depends(get_session)):
     return get_media_file(session, media_id)
 
 
 @router.get("/media/download/{media_id}", dependencies=[Depends(get_current_user([Role.ADMIN, Role.AGENT, Role.CLIENT]))])
-async def download_media(media_id: uuid.UUID, session: Session = Depends(get_session)):
-    return download_media_file(session, media_id)
\ No newline at end of file
+def download_media(media_id: uuid.UUID, request: Request,
+    mode: Optional[DownloadMode] = Query(None, description="presigned (302 to a signed URL), public (302 to the public URL) or proxy (streamed, supports Range); defaults to DOWNLOAD_MODE"),
+    session: Session = Depends(get_session)):
+    return download_media_file(session, media_id, mode, request.headers.get("range"))
@@ -27,7 +27,7 @@ def get_me(current_user: User = Depends(get_current_user())):
 
 @router.get("/{user_id}", response_model=SingleUser, dependencies=[Depends(get_current_user([Role.ADMIN, Role.CLIENT, Role.AGENT]))])
 def get(user_id: str, session: Session = Depends(get_session)):
-    user = get_user_by_id(session, user_id)
+    user = get_user_by_id(session, user_id, SingleUser)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
@@ -1,16 +1,17 @@
-from fastapi import Depends, HTTPException, status
+from uuid import UUID
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from app.core.config import settings
 from app.models.user import Role
-from app.services.user_service import get_user_by_id
+from app.services.user_service import get_cached_user
 from sqlmodel import Session
 from app.db.session import get_session
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login")
 
 def get_current_user(required_roles: list[Role] | None = None):
-    def dependency(token: str = Depends(oauth2_scheme), session: Session = Depends(get_session)):
+    def dependency(request: Request, token: str = Depends(oauth2_scheme), session: Session = Depends(get_session)):
         credentials_exception = HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
@@ -18,21 +19,31 @@ def get_current_user(required_roles: list[Role] | None = None):
         )
         try:
             payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
-            user_id: str = payload.get("sub")
-            role: str = payload.get("role")
-            if user_id is None or role is None:
+            sub: str = payload.get("sub")
+            role_claim: str = payload.get("role")
+            if sub is None or role_claim is None:
                 raise credentials_exception
-        except JWTError:
+            user_id = UUID(sub)
+            role = Role(role_claim)
+        except (JWTError, ValueError):
             raise credentials_exception
 
-        user = get_user_by_id(session, user_id)
-        if user is None:
-            raise credentials_exception
-
-        if required_roles and Role(role) not in required_roles:
+        # The role claim is signed, so access can be refused without loading the user
+        if required_roles and role not in required_roles:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You do not have access to this resource",
             )
+
+        # Routes often declare this dependency twice (route-level roles and a
+        # parameter); resolve the user once per request.
+        user = getattr(request.state, "current_user", None)
+        if user is not None and user.id == user_id:
+            return user
+
+        user = get_cached_user(session, user_id)
+        if user is None:
+            raise credentials_exception
+        request.state.current_user = user
         return user
-    return dependency
\ No newline at end of file
+    return dependency
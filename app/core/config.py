@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Literal, Optional
 
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -6,8 +6,19 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     DATABASE_URL: Optional[str] = Field(default=None, alias="DATABASE_URL")
+    DB_ECHO: bool = Field(default=False, alias="DB_ECHO")
+    DB_POOL_SIZE: int = Field(default=5, alias="DB_POOL_SIZE")
+    DB_MAX_OVERFLOW: int = Field(default=10, alias="DB_MAX_OVERFLOW")
+    DB_POOL_TIMEOUT: int = Field(default=30, alias="DB_POOL_TIMEOUT")
+    DB_POOL_RECYCLE: int = Field(default=1800, alias="DB_POOL_RECYCLE")
+    DB_POOL_PRE_PING: bool = Field(default=True, alias="DB_POOL_PRE_PING")
+    DB_STATEMENT_TIMEOUT_MS: int = Field(default=0, alias="DB_STATEMENT_TIMEOUT_MS")
+    DB_SLOW_CHECKOUT_MS: int = Field(default=100, alias="DB_SLOW_CHECKOUT_MS")
     SECRET_KEY: Optional[str] = Field(default=None, alias="SECRET_KEY")
     ACCESS_TOKEN_EXPIRE_MINUTES: Optional[int] = Field(default=None, alias="ACCESS_TOKEN_EXPIRE_MINUTES")
+    USER_CACHE_TTL_SECONDS: int = Field(default=60, alias="USER_CACHE_TTL_SECONDS")
+    BCRYPT_ROUNDS: int = Field(default=12, ge=4, le=31, alias="BCRYPT_ROUNDS")
+    PASSWORD_HASH_WORKERS: int = Field(default=4, ge=1, alias="PASSWORD_HASH_WORKERS")
     R2_ACCESS_KEY_ID: Optional[str] = Field(default=None, alias="R2_ACCESS_KEY_ID")
     R2_SECRET_ACCESS_KEY: Optional[str] = Field(default=None, alias="R2_SECRET_ACCESS_KEY")
     R2_BUCKET_NAME: Optional[str] = Field(default=None, alias="R2_BUCKET_NAME")
@@ -27,6 +38,30 @@ class Settings(BaseSettings):
     SMTP_PASSWORD: Optional[str] = Field(default=None, alias="SMTP_PASSWORD")
     SMTP_USE_TLS: bool = Field(default=False, alias="SMTP_USE_TLS")
     SMTP_USE_SSL: bool = Field(default=False, alias="SMTP_USE_SSL")
+    PAGING_COUNT_CACHE_TTL_SECONDS: int = Field(default=30, alias="PAGING_COUNT_CACHE_TTL_SECONDS")
+    JOB_WORKER_ENABLED: bool = Field(default=True, alias="JOB_WORKER_ENABLED")
+    JOB_WORKERS: int = Field(default=2, ge=1, alias="JOB_WORKERS")
+    JOB_POLL_INTERVAL_SECONDS: float = Field(default=1.0, gt=0, alias="JOB_POLL_INTERVAL_SECONDS")
+    JOB_MAX_ATTEMPTS: int = Field(default=5, ge=1, alias="JOB_MAX_ATTEMPTS")
+    JOB_RETRY_BASE_SECONDS: float = Field(default=5.0, ge=0, alias="JOB_RETRY_BASE_SECONDS")
+    JOB_LOCK_TIMEOUT_SECONDS: int = Field(default=300, ge=1, alias="JOB_LOCK_TIMEOUT_SECONDS")
+    NOTIFICATION_UNREAD_CACHE_TTL_SECONDS: int = Field(default=30, alias="NOTIFICATION_UNREAD_CACHE_TTL_SECONDS")
+    PUSH_DISPATCHER_ENABLED: bool = Field(default=True, alias="PUSH_DISPATCHER_ENABLED")
+    PUSH_BATCH_SIZE: int = Field(default=100, ge=1, le=100, alias="PUSH_BATCH_SIZE")
+    PUSH_MAX_ATTEMPTS: int = Field(default=5, ge=1, alias="PUSH_MAX_ATTEMPTS")
+    PUSH_RETRY_BASE_SECONDS: float = Field(default=10.0, ge=0, alias="PUSH_RETRY_BASE_SECONDS")
+    PUSH_CONCURRENCY: int = Field(default=4, ge=1, alias="PUSH_CONCURRENCY")
+    PUSH_MAX_CONNECTIONS: int = Field(default=10, ge=1, alias="PUSH_MAX_CONNECTIONS")
+    PUSH_HTTP2: bool = Field(default=True, alias="PUSH_HTTP2")
+    PUSH_POLL_INTERVAL_SECONDS: float = Field(default=1.0, gt=0, alias="PUSH_POLL_INTERVAL_SECONDS")
+    UPLOAD_PART_SIZE_MB: int = Field(default=8, ge=5, alias="UPLOAD_PART_SIZE_MB")
+    UPLOAD_CONCURRENCY: int = Field(default=4, ge=1, alias="UPLOAD_CONCURRENCY")
+    UPLOAD_WORKERS: int = Field(default=16, ge=1, alias="UPLOAD_WORKERS")
+    # presigned: 302 to a short-lived signed GET; public: 302 to R2_PUBLIC_URL; proxy: stream through the API
+    DOWNLOAD_MODE: Literal["presigned", "public", "proxy"] = Field(default="presigned", alias="DOWNLOAD_MODE")
+    DOWNLOAD_URL_EXPIRES_SECONDS: int = Field(default=300, ge=1, le=604800, alias="DOWNLOAD_URL_EXPIRES_SECONDS")
+    UPLOAD_ORPHAN_GRACE_SECONDS: int = Field(default=3600, ge=0, alias="UPLOAD_ORPHAN_GRACE_SECONDS")
+    UPLOAD_PRESIGN_EXPIRES_SECONDS: int = Field(default=3600, ge=60, le=604800, alias="UPLOAD_PRESIGN_EXPIRES_SECONDS")
     ALLOWED_ORIGINS: list[str] = Field(
         default_factory=lambda: ["http://localhost", "https://cortts-frontend-app-33nf9.ondigitalocean.app"], alias="ALLOWED_ORIGINS"
     )
@@ -1,3 +1,4 @@
+from concurrent.futures import ThreadPoolExecutor
 from passlib.context import CryptContext
 from jose import jwt
 from datetime import datetime, timedelta, timezone
@@ -5,14 +6,32 @@ from app.core.config import settings
 from uuid import UUID
 from enum import Enum
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Pinning min and max rounds makes needs_update() flag hashes made with any other cost
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
 ALGORITHM = "HS256"
 
+# bcrypt is CPU bound; running it on a small dedicated pool caps how many cores
+# a login storm can take from the request threads serving everything else.
+_password_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return _password_executor.submit(pwd_context.hash, password).result()
 
 def verify_password(password: str, hashed: str) -> bool:
-    return pwd_context.verify(password, hashed)
+    return _password_executor.submit(pwd_context.verify, password, hashed).result()
+
+def verify_and_update_password(password: str, hashed: str) -> tuple[bool, str | None]:
+    """
+    Verify `password` and, when the stored hash uses a different cost than
+    BCRYPT_ROUNDS, also return a replacement hash (otherwise None).
+    """
+    return _password_executor.submit(pwd_context.verify_and_update, password, hashed).result()
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     to_encode = data.copy()
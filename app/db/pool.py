@@ -0,0 +1,121 @@
+import logging
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+from app.core.config import Settings
+
+logger = logging.getLogger(__name__)
+
+
+def engine_options(database_url: str, settings: Settings) -> dict[str, Any]:
+    """
+    Keyword arguments for `create_engine` built from the DB_* settings.
+    SQLite uses a single-file/in-memory pool, so the QueuePool sizing is skipped.
+    """
+    url = make_url(database_url)
+    options: dict[str, Any] = {"echo": settings.DB_ECHO}
+    if url.get_backend_name() == "sqlite":
+        return options
+
+    options.update(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    if settings.DB_STATEMENT_TIMEOUT_MS > 0 and url.get_backend_name() == "postgresql":
+        if url.get_driver_name() == "asyncpg":
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+def async_database_url(database_url: str) -> str:
+    """Swap the DBAPI driver of DATABASE_URL for its asyncio counterpart."""
+    url = make_url(database_url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver configured for '{url.get_backend_name()}' databases.")
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+class PoolMonitor:
+    """
+    Counts pool events and the time requests spend waiting for a connection,
+    so worker counts can be sized against Postgres `max_connections`.
+    """
+
+    def __init__(self, slow_checkout_ms: float = 100):
+        self.slow_checkout_ms = slow_checkout_ms
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.waits = 0
+        self.slow_waits = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+
+    def attach(self, engine: Engine) -> "PoolMonitor":
+        self.engine = engine
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "invalidate", self._on_invalidate)
+        return self
+
+    def _on_connect(self, *args: Any) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, *args: Any) -> None:
+        with self._lock:
+            self.checkouts += 1
+
+    def _on_checkin(self, *args: Any) -> None:
+        with self._lock:
+            self.checkins += 1
+
+    def _on_invalidate(self, *args: Any) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def record_wait(self, started: float) -> None:
+        waited_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.waits += 1
+            self.wait_ms_total += waited_ms
+            self.wait_ms_max = max(self.wait_ms_max, waited_ms)
+            slow = waited_ms >= self.slow_checkout_ms
+            if slow:
+                self.slow_waits += 1
+        if slow:
+            logger.warning("Waited %.1f ms for a database connection (%s)", waited_ms, self.engine.pool.status())
+
+    def stats(self) -> dict[str, Any]:
+        pool = self.engine.pool
+        with self._lock:
+            stats: dict[str, Any] = {
+                "pool": type(pool).__name__,
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "waits": self.waits,
+                "slow_waits": self.slow_waits,
+                "wait_ms_avg": round(self.wait_ms_total / self.waits, 3) if self.waits else 0.0,
+                "wait_ms_max": round(self.wait_ms_max, 3),
+            }
+        for name in ("size", "checkedin", "checkedout", "overflow"):
+            method = getattr(pool, name, None)
+            stats[name] = method() if callable(method) else None
+        return stats
@@ -1,14 +1,36 @@
-from typing import Any, Generator
+import time
+from typing import Any, AsyncGenerator, Generator
 
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlmodel import Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.config import settings
+from app.db.pool import PoolMonitor, async_database_url, engine_options
 
 if not settings.DATABASE_URL:
     raise ValueError("DATABASE_URL is not set. Please configure it in the environment.")
 
-engine = create_engine(settings.DATABASE_URL, echo=True)
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL, settings))
+pool_monitor = PoolMonitor(slow_checkout_ms=settings.DB_SLOW_CHECKOUT_MS).attach(engine)
+
+ASYNC_DATABASE_URL = async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL, settings))
+# Objects stay usable after commit; an async session cannot lazily refresh them
+async_session_factory = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
 
 def get_session() -> Generator[Session, Any, Any]:
     with Session(engine) as session:
+        # Check the connection out up front so time spent waiting on the pool is measured
+        started = time.perf_counter()
+        session.connection()
+        pool_monitor.record_wait(started)
+        yield session
+
+async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Session for `async def` routes, so their SQL does not block the event loop
+    or take a threadpool slot. Results must be fully loaded before returning.
+    """
+    async with async_session_factory() as session:
         yield session
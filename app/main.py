@@ -1,10 +1,34 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api import api
 from app.core.config import settings
+from app.db.session import engine
+from app.services.job_queue import JobWorker
+from app.services.push_notification_service import close_expo_client
+from app.services.push_outbox_service import PushDispatcher
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # Emails, AI descriptions and push notifications are sent here, after commit
+    worker = JobWorker(engine) if settings.JOB_WORKER_ENABLED else None
+    if worker:
+        worker.start()
+    dispatcher = PushDispatcher(engine) if settings.PUSH_DISPATCHER_ENABLED else None
+    if dispatcher:
+        dispatcher.start()
+    yield
+    if dispatcher:
+        await dispatcher.stop()
+    await close_expo_client()
+    if worker:
+        worker.stop()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -7,4 +7,7 @@ from .document import DocumentTemplate, SignedDocument, MediaFile
 from .notification import Notification
 from .timestamp_mixin import TimestampMixin
 from .push_token  import PushToken
-from .company import Company
\ No newline at end of file
+from .company import Company
+from .dashboard_snapshot import DashboardSnapshot, MonthlyRevenue
+from .job import Job
+from .push_outbox import PushOutbox
@@ -0,0 +1,24 @@
+from sqlmodel import SQLModel, Field
+from sqlalchemy import DateTime, Numeric
+from typing import Any, Optional, Type, cast
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+SNAPSHOT_ID = 1
+
+class DashboardSnapshot(SQLModel, table=True):
+    # Single-row table holding the running admin dashboard totals
+    id: int = Field(default=SNAPSHOT_ID, primary_key=True)
+    total_units: int = 0
+    total_payments: int = 0
+    total_revenue: Decimal = Field(default=Decimal("0"), sa_type=cast(Type[Any], Numeric(18, 2)))
+    total_outstanding: Decimal = Field(default=Decimal("0"), sa_type=cast(Type[Any], Numeric(18, 2)))
+    refreshed_at: Optional[datetime] = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_type=cast(Type[Any], DateTime(timezone=True)),
+    )
+
+class MonthlyRevenue(SQLModel, table=True):
+    # Paid revenue rolled up by the month of the payment date
+    month: date = Field(primary_key=True)
+    amount: Decimal = Field(default=Decimal("0"), sa_type=cast(Type[Any], Numeric(18, 2)))
@@ -16,6 +16,10 @@ class MediaFile(SQLModel, TimestampMixin, table=True):
     file_name: str
     file_path: str
     file_size: int
+    # SHA-256 of the content and the R2 key it is stored under; several rows
+    # can share one object. Older rows have neither and use file_name as key.
+    content_hash: Optional[str] = Field(default=None, max_length=64, index=True)
+    storage_key: Optional[str] = None
     unit_id: Optional[UUID] = Field(default=None, foreign_key="unit.id")
     unit: Optional["Unit"] = Relationship(back_populates="media_files")
     project_id: Optional[UUID] = Field(default=None, foreign_key="project.id")
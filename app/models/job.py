@@ -0,0 +1,31 @@
+from sqlmodel import SQLModel, Field
+from sqlalchemy import Column, DateTime, Index, Text
+from sqlalchemy.types import JSON as SAJSON
+from typing import Any, Optional, Type, cast
+from datetime import datetime, timezone
+from enum import Enum
+from uuid import uuid4, UUID
+from app.models.timestamp_mixin import TimestampMixin
+
+class JobStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"  # out of attempts
+
+class Job(SQLModel, TimestampMixin, table=True):
+    # Outbox of side effects, written in the same transaction as the change that caused them
+    __table_args__ = (Index("ix_job_status_run_at", "status", "run_at"),)
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    name: str
+    payload: dict[str, Any] = Field(default_factory=dict, sa_column=Column(SAJSON, nullable=False))
+    status: JobStatus = Field(default=JobStatus.PENDING)
+    attempts: int = 0
+    max_attempts: int = 5
+    run_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_type=cast(Type[Any], DateTime(timezone=True)),
+    )
+    locked_at: Optional[datetime] = Field(default=None, sa_type=cast(Type[Any], DateTime(timezone=True)))
+    last_error: Optional[str] = Field(default=None, sa_column=Column(Text, nullable=True))
@@ -1,5 +1,5 @@
 from sqlmodel import SQLModel, Field, Relationship
-from sqlalchemy import Column, DateTime
+from sqlalchemy import Column, DateTime, Index
 from sqlalchemy.types import JSON as SAJSON
 from typing import Any, Optional, Type, cast
 from datetime import datetime, timezone
@@ -7,6 +7,12 @@ from uuid import uuid4, UUID
 from app.models.timestamp_mixin import TimestampMixin
 
 class Notification(SQLModel, TimestampMixin, table=True):
+    __table_args__ = (
+        Index("ix_notification_user_id_created_at_id", "user_id", "created_at", "id"),
+        # unread badge counts and unread-only listings
+        Index("ix_notification_user_id_read_created_at", "user_id", "read", "created_at"),
+    )
+
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     user_id: UUID = Field(foreign_key="user.id")
     title: str
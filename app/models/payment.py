@@ -4,7 +4,7 @@ from enum import Enum
 from decimal import Decimal
 from typing import Any, Optional, TYPE_CHECKING, Type, cast
 from sqlmodel import SQLModel, Field, Relationship
-from sqlalchemy import DateTime, Numeric
+from sqlalchemy import DateTime, Index, Numeric
 from app.models.timestamp_mixin import TimestampMixin
 
 if TYPE_CHECKING:
@@ -16,6 +16,8 @@ class PaymentStatus(str, Enum):
     OVERDUE = "overdue"
 
 class Payment(SQLModel, TimestampMixin, table=True):
+    __table_args__ = (Index("ix_payment_created_at_id", "created_at", "id"),)
+
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     reason_for_payment: Optional[str] = None
     amount: Decimal = Field(sa_type=cast(Type[Any], Numeric(18, 2)))
@@ -26,5 +28,5 @@ class Payment(SQLModel, TimestampMixin, table=True):
     payment_date: datetime | None = Field(default=None, sa_type=cast(Type[Any], DateTime(timezone=True)))
     media_id: UUID | None = Field(default=None, foreign_key="mediafile.id")
 
-    unit_id: UUID = Field(foreign_key="unit.id", nullable=False)
+    unit_id: UUID = Field(foreign_key="unit.id", nullable=False, index=True)
     unit: Optional["Unit"] = Relationship(back_populates="payments")
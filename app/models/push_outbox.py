@@ -0,0 +1,34 @@
+from sqlmodel import SQLModel, Field
+from sqlalchemy import Column, DateTime, Index, Text
+from typing import Any, Optional, Type, cast
+from datetime import datetime, timezone
+from enum import Enum
+from uuid import uuid4, UUID
+from app.models.timestamp_mixin import TimestampMixin
+
+class PushDeliveryStatus(str, Enum):
+    PENDING = "pending"  # waiting for its first or next attempt
+    SENDING = "sending"
+    SENT = "sent"  # accepted by Expo, `ticket_id` set
+    DEAD = "dead"  # out of attempts or rejected permanently, see `last_error`
+
+class PushOutbox(SQLModel, TimestampMixin, table=True):
+    # One row per notification and device token, written with the notification
+    __table_args__ = (
+        Index("ix_pushoutbox_status_next_attempt_at", "status", "next_attempt_at"),
+        Index("ix_pushoutbox_notification_id", "notification_id"),
+    )
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    notification_id: UUID = Field(foreign_key="notification.id", ondelete="CASCADE")
+    token: str
+    status: PushDeliveryStatus = Field(default=PushDeliveryStatus.PENDING)
+    attempts: int = 0
+    next_attempt_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_type=cast(Type[Any], DateTime(timezone=True)),
+    )
+    locked_at: Optional[datetime] = Field(default=None, sa_type=cast(Type[Any], DateTime(timezone=True)))
+    sent_at: Optional[datetime] = Field(default=None, sa_type=cast(Type[Any], DateTime(timezone=True)))
+    ticket_id: Optional[str] = None
+    last_error: Optional[str] = Field(default=None, sa_column=Column(Text, nullable=True))
@@ -1,10 +1,11 @@
 from datetime import datetime, timedelta, date
 from decimal import Decimal, ROUND_HALF_UP
 from uuid import UUID, uuid4
-from typing import Optional, List, Dict, Any, TYPE_CHECKING, Type, cast
+from typing import Optional, List, Dict, Any, TYPE_CHECKING, ClassVar, Type, cast
 from enum import Enum
 from sqlmodel import SQLModel, Field, Relationship
-from sqlalchemy import DateTime, Numeric
+from sqlalchemy import DateTime, Index, Numeric
+from sqlalchemy.orm import query_expression
 
 from app.models.timestamp_mixin import TimestampMixin
 
@@ -57,6 +58,8 @@ class Status(str, Enum):
     DELETED = "deleted"
 
 class Unit(SQLModel, TimestampMixin, table=True):
+    __table_args__ = (Index("ix_unit_created_at_id", "created_at", "id"),)
+
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     name: str
     amount: Decimal = Field(sa_type=cast(Type[Any], Numeric(18, 2)))
@@ -81,6 +84,10 @@ class Unit(SQLModel, TimestampMixin, table=True):
     project: Optional["Project"] = Relationship(back_populates="units")
     payments: List["Payment"] = Relationship(back_populates="unit")
 
+    # Sum of paid payments computed by the loading query (see
+    # app.utility.loaders.with_payment_totals); None when the unit was loaded without it.
+    paid_total: ClassVar[Any] = query_expression()
+
     @property
     def images(self) -> List[str]:
         return [media.file_path for media in self.media_files if media.file_type == "image/jpeg" or media.file_type == "image/png" or media.file_type == "image/jpg"]
@@ -146,6 +153,8 @@ class Unit(SQLModel, TimestampMixin, table=True):
 
     @property
     def total_paid(self):
+        if self.paid_total is not None:
+            return self.paid_total
         return sum(p.amount for p in self.payments if p.status.value == PaymentStatus.PAID)
 
     @property
@@ -1,4 +1,5 @@
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import Index
 from typing import Optional, TYPE_CHECKING
 from uuid import UUID, uuid4
 from enum import Enum
@@ -17,6 +18,8 @@ class Role(str, Enum):
     CLIENT = "client"
 
 class User(SQLModel, TimestampMixin, table=True):
+    __table_args__ = (Index("ix_user_created_at_id", "created_at", "id"),)
+
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     fullname: str
     email: str = Field(index=True, unique=True)
@@ -1,5 +1,6 @@
+from typing import Literal
 from fastapi import UploadFile
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from uuid import UUID
 from datetime import datetime
 from app.schemas.user import UserRead
@@ -30,4 +31,42 @@ class MediaFileCreateSchema(MediaFileBaseSchema):
     pass
 
 class MediaFileReadSchema(MediaFileBaseSchema):
-    id: UUID
\ No newline at end of file
+    id: UUID
+
+
+DownloadMode = Literal["presigned", "public", "proxy"]
+
+
+class PresignUploadRequest(BaseModel):
+    file_name: str = Field(min_length=1, max_length=255)
+    content_type: str | None = None
+    # 5 TiB is the largest object S3/R2 accepts
+    file_size: int = Field(gt=0, le=5 * 1024 ** 4, description="Exact size in bytes; checked when the upload is completed")
+    unit_id: UUID | None = None
+    project_id: UUID | None = None
+
+
+class PresignedPart(BaseModel):
+    part_number: int
+    url: str
+
+
+class PresignUploadResponse(BaseModel):
+    upload_token: str = Field(description="Pass back to /upload/complete")
+    key: str
+    method: Literal["put", "multipart"]
+    url: str | None = Field(default=None, description="PUT the whole file here (method=put)")
+    headers: dict[str, str] = Field(default_factory=dict, description="Headers every PUT must send")
+    part_size: int | None = Field(default=None, description="Bytes per part; the last part may be smaller (method=multipart)")
+    parts: list[PresignedPart] = Field(default_factory=list, description="PUT each part here and keep its ETag (method=multipart)")
+    expires_in: int
+
+
+class CompletedPart(BaseModel):
+    part_number: int = Field(ge=1, le=10_000)
+    etag: str
+
+
+class CompleteUploadRequest(BaseModel):
+    upload_token: str
+    parts: list[CompletedPart] = Field(default_factory=list, max_length=10_000)
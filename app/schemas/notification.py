@@ -1,8 +1,9 @@
 from sqlmodel import SQLModel
-from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any, List
 from uuid import UUID
 from datetime import datetime
+from app.models.push_outbox import PushDeliveryStatus
 
 class NotificationBase(BaseModel):
     title: str
@@ -13,6 +14,17 @@ class NotificationBase(BaseModel):
 class NotificationCreate(NotificationBase):
     user_id: UUID
 
+class NotificationBroadcast(BaseModel):
+    user_ids: List[UUID] = Field(min_length=1, max_length=50_000)
+    title: str
+    body: str
+    data: Optional[Dict[str, str]] = None
+
+class NotificationBroadcastResult(BaseModel):
+    notified: int
+    push_deliveries: int
+    skipped_user_ids: List[UUID]
+
 class NotificationRead(NotificationBase):
     id: UUID
     user_id: UUID
@@ -20,6 +32,21 @@ class NotificationRead(NotificationBase):
     created_at: datetime
     updated_at: datetime
 
+class PushDeliveryRead(BaseModel):
+    id: UUID
+    token: str
+    status: PushDeliveryStatus
+    attempts: int
+    next_attempt_at: datetime
+    sent_at: Optional[datetime] = None
+    ticket_id: Optional[str] = None
+    last_error: Optional[str] = None
+
+class UnreadCount(BaseModel):
+    unread: int
+
 class NotificationList(BaseModel):
     data: list[NotificationRead]
-    total: int
\ No newline at end of file
+    total: int | None
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
\ No newline at end of file
@@ -1,5 +1,14 @@
+from enum import Enum
 from pydantic import BaseModel, Field
 
+class CountStrategy(str, Enum):
+    EXACT = "exact"
+    NONE = "none"
+    ESTIMATED = "estimated"
+    CACHED = "cached"
+
 class Paging(BaseModel):
     skip: int = Field(default=0, ge=0, description="Number of items to skip")
-    limit: int = Field(default=10, ge=1, le=1000, description="Maximum number of items to return (1-100)")
\ No newline at end of file
+    limit: int = Field(default=10, ge=1, le=1000, description="Maximum number of items to return (1-100)")
+    cursor: str | None = Field(default=None, description="Opaque next_cursor/prev_cursor from a previous page; switches to keyset pagination and ignores skip")
+    count: CountStrategy = Field(default=CountStrategy.EXACT, description="How to compute total: exact, none (total is null), estimated (planner statistics) or cached (exact, reused for a short time)")
\ No newline at end of file
@@ -45,4 +45,6 @@ class PaymentRead(PaymentBase):
 
 class AllPayment(BaseModel):
     data: list[PaymentRead]
-    total: int
+    total: int | None
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
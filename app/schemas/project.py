@@ -55,4 +55,4 @@ class ProjectReplace(BaseModel):
 
 class ProjectList(BaseModel):
     data: list[ProjectRead]
-    total: int
\ No newline at end of file
+    total: int | None
\ No newline at end of file
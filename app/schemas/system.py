@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+
+class PoolStats(BaseModel):
+    pool: str
+    size: int | None
+    checkedin: int | None
+    checkedout: int | None
+    overflow: int | None
+    connects: int
+    checkouts: int
+    checkins: int
+    invalidations: int
+    waits: int
+    slow_waits: int
+    wait_ms_avg: float
+    wait_ms_max: float
@@ -124,8 +124,22 @@ class SingleUnit(UnitRead):
 
 class ReadAllUnits(BaseModel):
     data: List[UnitRead]
-    total: int
+    total: int | None
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
 
 class UnitPayments(BaseModel):
     data: list[PaymentRead]
-    total: int
+    total: int | None
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
+
+class UnitImportError(BaseModel):
+    row: int
+    errors: list[str]
+
+class UnitImportReport(BaseModel):
+    created: int
+    failed: int
+    errors: list[UnitImportError]
+    errors_truncated: bool = False
@@ -72,7 +72,9 @@ class UserUpdate(BaseModel):
 
 class UserList(BaseModel):
     data: list[UserRead]
-    total: int
+    total: int | None
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
 
 class SingleUser(UserRead):
     units: Optional[list["ClientUnit"]] = []
@@ -1,62 +1,144 @@
 from typing import Any
 from decimal import Decimal
 from sqlmodel import Session, select , and_, desc, not_
-from sqlalchemy import DateTime, cast, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import func
+from sqlalchemy.orm import joinedload, selectinload
 from datetime import datetime,timezone
 from dateutil.relativedelta import relativedelta
+from app.models.dashboard_snapshot import DashboardSnapshot, MonthlyRevenue, SNAPSHOT_ID
 from app.models.payment import Payment, PaymentStatus
 from app.models.project import Project
 from app.models.unit import Unit
 from app.models.user import Role, User
 from app.schemas.dashboard import DashboardSummary, MonthlyRevenueItem, Unit as UnitSchema, Payment as PaymentSchema
 from app.schemas.payment import PaymentStatus as PaymentStatusSchema
+from app.utility.async_reads import run_read
 
-def get_admin_dashboard(session: Session) -> DashboardSummary:
-    total_units = session.exec(select(func.count()).select_from(Unit).where(Unit.deleted == False)).one() or 0
-    total_payments = session.exec(select(func.count()).select_from(Payment).where(Payment.deleted == False)).one() or 0
-    total_users = session.exec(select(func.count()).select_from(User).where(and_(User.deleted == False, User.role == Role.CLIENT))).one() or 0
-    total_projects = session.exec(select(func.count()).select_from(Project).where(Project.deleted == False)).one() or 0
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun",
+          "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
 
-    total_revenue_result = session.exec(select(func.sum(Payment.amount)).select_from(Payment).where(and_(Payment.deleted == False, Payment.status == PaymentStatus.PAID))).first()
-    total_revenue = total_revenue_result if total_revenue_result is not None else Decimal("0")
-    total_outstanding_result = session.exec(select(func.sum(Payment.amount)).select_from(Payment).where(and_(Payment.deleted == False, Payment.status == PaymentStatus.NOT_PAID))).first()
-    total_outstanding = total_outstanding_result if total_outstanding_result is not None else Decimal("0")
 
-    months = ["Jan", "Feb", "Mar", "Apr", "May", "Jun",
-          "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+def live_dashboard_totals(session: Session) -> dict[str, Any]:
+    """
+    Compute every scalar total of the dashboard in a single statement.
+
+    Payment counts and sums come from one pass over `payment` using aggregate
+    FILTER clauses; unit, client and project counts are scalar subqueries.
+    """
+    payment_totals = (
+        select(
+            func.count().label("total_payments"),
+            func.coalesce(func.sum(Payment.amount).filter(Payment.status == PaymentStatus.PAID), 0).label("total_revenue"),
+            func.coalesce(func.sum(Payment.amount).filter(Payment.status == PaymentStatus.NOT_PAID), 0).label("total_outstanding"),
+        )
+        .where(Payment.deleted == False)
+        .cte("payment_totals")
+    )
+
+    stmt = select(
+        select(func.count()).select_from(Unit).where(Unit.deleted == False).scalar_subquery().label("total_units"),
+        select(func.count()).select_from(User).where(and_(User.deleted == False, User.role == Role.CLIENT)).scalar_subquery().label("total_users"),
+        select(func.count()).select_from(Project).where(Project.deleted == False).scalar_subquery().label("total_projects"),
+        payment_totals.c.total_payments,
+        payment_totals.c.total_revenue,
+        payment_totals.c.total_outstanding,
+    ).select_from(payment_totals)
+
+    row = session.exec(stmt).one()
+    return {
+        "total_units": row.total_units or 0,
+        "total_users": row.total_users or 0,
+        "total_projects": row.total_projects or 0,
+        "total_payments": row.total_payments or 0,
+        "total_revenue": Decimal(str(row.total_revenue or 0)),
+        "total_outstanding": Decimal(str(row.total_outstanding or 0)),
+    }
+
+
+def _snapshot_totals(session: Session) -> dict[str, Any] | None:
+    """
+    Read the maintained totals from the dashboard snapshot. Client and project
+    counts are not tracked there and are counted alongside in the same statement.
+    """
+    row = session.exec(
+        select(
+            DashboardSnapshot,
+            select(func.count()).select_from(User).where(and_(User.deleted == False, User.role == Role.CLIENT)).scalar_subquery(),
+            select(func.count()).select_from(Project).where(Project.deleted == False).scalar_subquery(),
+        ).where(DashboardSnapshot.id == SNAPSHOT_ID)
+    ).first()
+    if row is None:
+        return None
+
+    snapshot, total_users, total_projects = row
+    return {
+        "total_units": snapshot.total_units,
+        "total_users": total_users or 0,
+        "total_projects": total_projects or 0,
+        "total_payments": snapshot.total_payments,
+        "total_revenue": Decimal(str(snapshot.total_revenue or 0)),
+        "total_outstanding": Decimal(str(snapshot.total_outstanding or 0)),
+    }
+
+
+def _last_12_months() -> list[datetime]:
+    now = datetime.now(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    return [(now - relativedelta(months=i)) for i in range(11, -1, -1)]
 
-    # Aggregate revenue by month (PostgreSQL)
+
+def _monthly_revenue(session: Session) -> list[MonthlyRevenueItem]:
+    last_12 = _last_12_months()
+    month_start = func.date_trunc('month', Payment.payment_date)
+
+    # Aggregate revenue by month (PostgreSQL), limited to the charted window
     stmt = (
         select(
-            func.coalesce(func.date_trunc('month', Payment.payment_date), datetime.now()).label('month_start'),
+            month_start.label('month_start'),
             func.coalesce(func.sum(Payment.amount), 0).label('total_amount'),
         )
-        .where(and_(Payment.deleted == False, Payment.status == PaymentStatus.PAID))
-        .group_by(func.date_trunc('month', Payment.payment_date))
-        .order_by(func.date_trunc('month', Payment.payment_date))
+        .where(and_(
+            Payment.deleted == False,
+            Payment.status == PaymentStatus.PAID,
+            Payment.payment_date.is_not(None),
+            Payment.payment_date >= last_12[0],
+        ))
+        .group_by(month_start)
     )
 
-    rows = session.exec(stmt).all()
+    totals: dict[tuple[int, int], float] = {}
+    for start, total in session.exec(stmt).all():
+        if isinstance(start, str):
+            start = datetime.fromisoformat(start)
+        totals[(start.year, start.month)] = float(total or 0.0)
 
-    # Build a dict for the last 12 months, defaulting to 0
-    now = datetime.now(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    last_12 = [(now - relativedelta(months=i)) for i in range(11, -1, -1)]
-    # Build a list for the last 12 months, defaulting to 0
-    monthly_revenue_list = [
-        MonthlyRevenueItem(month=months[d.month - 1], amount=0.0) for d in last_12
+    return [
+        MonthlyRevenueItem(month=MONTHS[d.month - 1], amount=totals.get((d.year, d.month), 0.0))
+        for d in last_12
+    ]
+
+
+def _snapshot_monthly_revenue(session: Session) -> list[MonthlyRevenueItem]:
+    last_12 = _last_12_months()
+    rows = session.exec(select(MonthlyRevenue).where(MonthlyRevenue.month >= last_12[0].date())).all()
+    totals = {(row.month.year, row.month.month): float(row.amount or 0.0) for row in rows}
+
+    return [
+        MonthlyRevenueItem(month=MONTHS[d.month - 1], amount=totals.get((d.year, d.month), 0.0))
+        for d in last_12
     ]
 
-    # Fill with actual sums returned from the DB
-    for month_start, total in rows:
-        for item in monthly_revenue_list:
-            if item.month == months[month_start.month - 1]:
-                item.amount = float(total or 0.0)
 
-    # Return first 20 units
-    first_20_units = session.exec(select(Unit).where(Unit.deleted == False).limit(20)).all()
+def _unit_previews(session: Session) -> list[UnitSchema]:
+    # Return first 20 units with the relationships the preview reads
+    first_20_units = session.exec(
+        select(Unit)
+        .where(Unit.deleted == False)
+        .options(selectinload(Unit.project), selectinload(Unit.media_files))
+        .limit(20)
+    ).all()
 
-    # format units to match schema
-    unit_previews: list[UnitSchema] = [
+    return [
         UnitSchema(
             id=unit.id,
             name=unit.name,
@@ -68,26 +150,27 @@ def get_admin_dashboard(session: Session) -> DashboardSummary:
         for unit in first_20_units
     ]
 
+
+def _recent_payments(session: Session) -> list[PaymentSchema]:
     cutoff = datetime.now(timezone.utc) - relativedelta(days=365)
     payment_date_column = Payment.payment_date
 
-    recent_payments = list(
-        session.exec(
-            select(Payment)
-            .where(
-                and_(
-                    not_(Payment.deleted),
-                    Payment.status == PaymentStatus.PAID,
-                    payment_date_column.is_not(None),
-                    payment_date_column >= cutoff,
-                )
+    recent_payments = session.exec(
+        select(Payment)
+        .where(
+            and_(
+                not_(Payment.deleted),
+                Payment.status == PaymentStatus.PAID,
+                payment_date_column.is_not(None),
+                payment_date_column >= cutoff,
             )
-            .order_by(desc(Payment.payment_date))
-            .limit(5)
-        ).all()
-    )
+        )
+        .options(joinedload(Payment.unit))
+        .order_by(desc(Payment.payment_date))
+        .limit(5)
+    ).all()
 
-    recent_payments_schema: list[PaymentSchema] = [
+    return [
         PaymentSchema(
             id=payment.id,
             amount=float(payment.amount),
@@ -99,14 +182,29 @@ def get_admin_dashboard(session: Session) -> DashboardSummary:
         for payment in recent_payments
     ]
 
+
+def get_admin_dashboard(session: Session) -> DashboardSummary:
+    # Prefer the incrementally maintained snapshot; fall back to live aggregates
+    # until it has been built.
+    totals = _snapshot_totals(session)
+    if totals is None:
+        totals = live_dashboard_totals(session)
+        monthly_revenue = _monthly_revenue(session)
+    else:
+        monthly_revenue = _snapshot_monthly_revenue(session)
+
     return DashboardSummary(
-        total_units=total_units,
-        total_payments=total_payments,
-        total_users=total_users,
-        total_revenue=float(total_revenue),
-        total_outstanding=float(total_outstanding),
-        total_projects=total_projects,
-        monthly_revenue=monthly_revenue_list,
-        units=unit_previews,
-        recent_payments=recent_payments_schema,
-    )
\ No newline at end of file
+        total_units=totals["total_units"],
+        total_payments=totals["total_payments"],
+        total_users=totals["total_users"],
+        total_revenue=float(totals["total_revenue"]),
+        total_outstanding=float(totals["total_outstanding"]),
+        total_projects=totals["total_projects"],
+        monthly_revenue=monthly_revenue,
+        units=_unit_previews(session),
+        recent_payments=_recent_payments(session),
+    )
+
+
+async def get_admin_dashboard_async(session: AsyncSession) -> DashboardSummary:
+    return await run_read(session, DashboardSummary, get_admin_dashboard)
@@ -0,0 +1,166 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Any, NamedTuple
+from sqlmodel import Session, select, delete, update, and_
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models.dashboard_snapshot import DashboardSnapshot, MonthlyRevenue, SNAPSHOT_ID
+from app.models.payment import Payment, PaymentStatus
+from app.services.dashboard import live_dashboard_totals
+
+
+class PaymentFootprint(NamedTuple):
+    """What a single payment contributes to the dashboard snapshot."""
+    counted: int
+    revenue: Decimal
+    outstanding: Decimal
+    month: date | None
+
+EMPTY_FOOTPRINT = PaymentFootprint(0, Decimal("0"), Decimal("0"), None)
+
+
+def _to_decimal(value: Any) -> Decimal:
+    if value is None:
+        return Decimal("0")
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def month_of(value: datetime | None) -> date | None:
+    return date(value.year, value.month, 1) if value else None
+
+
+def payment_footprint(payment: Payment | None) -> PaymentFootprint:
+    """
+    Capture a payment's contribution before and after a mutation so the
+    difference can be applied to the snapshot.
+    """
+    if payment is None or payment.deleted:
+        return EMPTY_FOOTPRINT
+    amount = _to_decimal(payment.amount)
+    if payment.status == PaymentStatus.PAID:
+        return PaymentFootprint(1, amount, Decimal("0"), month_of(payment.payment_date))
+    if payment.status == PaymentStatus.NOT_PAID:
+        return PaymentFootprint(1, Decimal("0"), amount, None)
+    return PaymentFootprint(1, Decimal("0"), Decimal("0"), None)
+
+
+def _add_monthly_revenue(session: Session, month: date, amount: Decimal) -> None:
+    dialect = session.get_bind().dialect.name
+    values = {"month": month, "amount": amount}
+    if dialect == "postgresql":
+        stmt = postgresql.insert(MonthlyRevenue).values(**values)
+    elif dialect == "sqlite":
+        stmt = sqlite.insert(MonthlyRevenue).values(**values)
+    else:
+        result = session.exec(
+            update(MonthlyRevenue).where(MonthlyRevenue.month == month).values(amount=MonthlyRevenue.amount + amount)
+        )
+        if result.rowcount == 0:
+            session.add(MonthlyRevenue(**values))
+        return
+    session.exec(stmt.on_conflict_do_update(
+        index_elements=[MonthlyRevenue.month],
+        set_={"amount": MonthlyRevenue.amount + stmt.excluded.amount},
+    ))
+
+
+def record_dashboard_change(
+    session: Session,
+    units: int = 0,
+    payments: int = 0,
+    revenue: Decimal = Decimal("0"),
+    outstanding: Decimal = Decimal("0"),
+    monthly: dict[date, Decimal] | None = None,
+) -> None:
+    """
+    Apply a delta to the dashboard snapshot inside the caller's transaction.
+
+    Counters are updated with `col = col + delta` so concurrent writers never
+    lose each other's changes. Nothing happens until the snapshot has been
+    built (see `rebuild_dashboard_snapshot`); the dashboard falls back to live
+    aggregates in that case.
+    """
+    monthly = {month: amount for month, amount in (monthly or {}).items() if amount}
+    if not (units or payments or revenue or outstanding or monthly):
+        return
+
+    result = session.exec(
+        update(DashboardSnapshot)
+        .where(DashboardSnapshot.id == SNAPSHOT_ID)
+        .values(
+            total_units=DashboardSnapshot.total_units + units,
+            total_payments=DashboardSnapshot.total_payments + payments,
+            total_revenue=DashboardSnapshot.total_revenue + revenue,
+            total_outstanding=DashboardSnapshot.total_outstanding + outstanding,
+        )
+    )
+    if result.rowcount == 0:
+        return
+
+    for month, amount in monthly.items():
+        _add_monthly_revenue(session, month, amount)
+
+
+def record_payment_change(session: Session, before: PaymentFootprint, after: PaymentFootprint) -> None:
+    monthly: dict[date, Decimal] = {}
+    if before.month:
+        monthly[before.month] = monthly.get(before.month, Decimal("0")) - before.revenue
+    if after.month:
+        monthly[after.month] = monthly.get(after.month, Decimal("0")) + after.revenue
+
+    record_dashboard_change(
+        session,
+        payments=after.counted - before.counted,
+        revenue=after.revenue - before.revenue,
+        outstanding=after.outstanding - before.outstanding,
+        monthly=monthly,
+    )
+
+
+def rebuild_dashboard_snapshot(session: Session) -> DashboardSnapshot:
+    """
+    Recompute the snapshot and the monthly rollup from the source tables.
+    Used for the initial build and to repair drift.
+    """
+    snapshot = session.exec(
+        select(DashboardSnapshot).where(DashboardSnapshot.id == SNAPSHOT_ID).with_for_update()
+    ).first()
+    if snapshot is None:
+        snapshot = DashboardSnapshot(id=SNAPSHOT_ID)
+
+    totals = live_dashboard_totals(session)
+    snapshot.total_units = totals["total_units"]
+    snapshot.total_payments = totals["total_payments"]
+    snapshot.total_revenue = totals["total_revenue"]
+    snapshot.total_outstanding = totals["total_outstanding"]
+    snapshot.refreshed_at = datetime.now(timezone.utc)
+    session.add(snapshot)
+
+    month_start = func.date_trunc('month', Payment.payment_date)
+    rows = session.exec(
+        select(month_start, func.sum(Payment.amount))
+        .where(and_(
+            Payment.deleted == False,
+            Payment.status == PaymentStatus.PAID,
+            Payment.payment_date.is_not(None),
+        ))
+        .group_by(month_start)
+    ).all()
+
+    session.exec(delete(MonthlyRevenue))
+    for start, total in rows:
+        if isinstance(start, str):
+            start = datetime.fromisoformat(start)
+        session.add(MonthlyRevenue(month=month_of(start), amount=_to_decimal(total)))
+
+    session.commit()
+    session.refresh(snapshot)
+    return snapshot
+
+
+if __name__ == "__main__":
+    from app.db.session import engine
+
+    with Session(engine) as session:
+        snapshot = rebuild_dashboard_snapshot(session)
+        print(f"Dashboard snapshot rebuilt: {snapshot.total_units} units, {snapshot.total_payments} payments")
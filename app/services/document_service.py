@@ -6,9 +6,10 @@ from sqlmodel import Session, select
 from app.models.document import DocumentTemplate, SignedDocument, MediaFile
 from app.schemas.media import MediaFileReadSchema
 from app.schemas.notification import NotificationCreate
-from .notification_service import create_notification
+from .notification_service import add_notification
 from app.schemas.document import DocumentKind, DocumentRead, DocumentTemplateCreate, DocumentTemplateRead, ReadAllDocuments, SignedDocumentCreate, SignedDocumentRead, DocumentTemplateUpdate, SignedDocumentUpdate
 from app.services.ai_service import generate_media_description
+from app.services.job_queue import enqueue, job_handler
 
 
 # Document Template
@@ -97,49 +98,58 @@ def create_signed_doc(session: Session, data: SignedDocumentCreate) -> SignedDoc
     :param data: Data model containing the signed document details
     :return: The created SignedDocument object
     """
-    media_file = session.get(MediaFile, data.media_file_id)
-    generated_description = generate_media_description(media_file, "signed document")
     record = SignedDocument(**data.model_dump())
-    if not record.description:
-        record.description = generated_description
-
     session.add(record)
-    session.commit()
-    session.refresh(record)
+    if not record.description:
+        # The OpenAI call runs in the job queue, outside the request
+        enqueue(session, "document.describe_signed", {"signed_document_id": str(record.id)})
 
     if record.agent_id:
 
-        create_notification(
+        add_notification(
             session,
             data=NotificationCreate(
                 user_id=record.agent_id,
                 title="New Document Template Created",
                 body=f"Document '{record.name}' has been created.",
                 data={
-                    "template_id": record.id,
+                    "template_id": str(record.id),
                     "type": "document_template_created"
                 }
             )
         )
 
     if record.client_id:
-        create_notification(
+        add_notification(
             session,
             data=NotificationCreate(
                 user_id=record.client_id,
                 title="New Document Template Created",
                 body=f"Document '{record.name}' has been created.",
                 data={
-                    "template_id": record.id,
+                    "template_id": str(record.id),
                     "type": "document_template_created"
                 }
             )
         )
 
-
+    session.commit()
+    session.refresh(record)
     return record
 
 
+@job_handler("document.describe_signed")
+def _describe_signed_doc_job(session: Session, payload: dict[str, str]) -> None:
+    record = session.get(SignedDocument, UUID(payload["signed_document_id"]))
+    if record is None or record.description:
+        return
+    media_file = session.get(MediaFile, record.media_file_id)
+    description = generate_media_description(media_file, "signed document")
+    if description:
+        record.description = description
+        session.add(record)
+
+
 def get_all_signed_docs(session: Session) -> Sequence[SignedDocument]:
     """
     Retrieves all signed documents from the database.
@@ -2,8 +2,10 @@ import smtplib
 from email.message import EmailMessage
 
 from fastapi import HTTPException
+from sqlmodel import Session
 
 from app.core.config import settings
+from app.services.job_queue import enqueue, job_handler
 
 
 def _build_message(to_email: str, subject: str, body: str) -> EmailMessage:
@@ -77,3 +79,22 @@ def send_password_reset_email(to_email: str, verification_code: str) -> None:
             "If you did not request a password reset, you can ignore this email."
         ),
     )
+
+
+@job_handler("email.verification")
+def _verification_email_job(_session: Session, payload: dict[str, str]) -> None:
+    send_verification_email(payload["to_email"], payload["verification_code"])
+
+
+@job_handler("email.password_reset")
+def _password_reset_email_job(_session: Session, payload: dict[str, str]) -> None:
+    send_password_reset_email(payload["to_email"], payload["verification_code"])
+
+
+def queue_verification_email(session: Session, to_email: str, verification_code: str) -> None:
+    """Send the verification email from the job queue once the caller commits."""
+    enqueue(session, "email.verification", {"to_email": to_email, "verification_code": verification_code})
+
+
+def queue_password_reset_email(session: Session, to_email: str, verification_code: str) -> None:
+    enqueue(session, "email.password_reset", {"to_email": to_email, "verification_code": verification_code})
@@ -0,0 +1,182 @@
+import logging
+import random
+import threading
+import traceback
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable
+from uuid import UUID
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select, update, and_, or_
+from app.core.config import settings
+from app.models.job import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[Session, dict[str, Any]], None]
+
+# Registered with @job_handler by the service that owns the side effect
+JOB_HANDLERS: dict[str, JobHandler] = {}
+
+# Set when a transaction that enqueued jobs commits, so idle workers wake up early
+_work_available = threading.Event()
+
+
+def job_handler(name: str) -> Callable[[JobHandler], JobHandler]:
+    def register(handler: JobHandler) -> JobHandler:
+        JOB_HANDLERS[name] = handler
+        return handler
+    return register
+
+
+def enqueue(
+    session: Session,
+    name: str,
+    payload: dict[str, Any] | None = None,
+    run_at: datetime | None = None,
+    max_attempts: int | None = None,
+) -> Job:
+    """
+    Add a job to the caller's transaction. It only becomes visible to workers
+    when the caller commits, and is discarded with a rollback, so side effects
+    never run for changes that did not happen. The payload must be JSON.
+    """
+    if name not in JOB_HANDLERS:
+        raise ValueError(f"No job handler registered for '{name}'")
+    job = Job(
+        name=name,
+        payload=payload or {},
+        run_at=run_at or datetime.now(timezone.utc),
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
+    session.add(job)
+    session.info["jobs_enqueued"] = True
+    return job
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_workers(session: Session) -> None:
+    if session.info.pop("jobs_enqueued", False):
+        _work_available.set()
+
+
+def retry_delay(attempts: int, base: float | None = None) -> timedelta:
+    """Exponential backoff with jitter: base * 2^(attempts-1), capped at an hour."""
+    if base is None:
+        base = settings.JOB_RETRY_BASE_SECONDS
+    delay = min(base * 2 ** (attempts - 1), 3600)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def _claim_next(bind: Engine) -> Job | None:
+    """
+    Atomically move one due job to RUNNING. The UPDATE is conditional on the
+    attempt count read beforehand, so when several workers (threads or
+    processes) race for a job exactly one wins. RUNNING jobs whose worker died
+    are reclaimed after JOB_LOCK_TIMEOUT_SECONDS.
+    """
+    now = datetime.now(timezone.utc)
+    claimable = and_(
+        Job.run_at <= now,
+        or_(
+            Job.status == JobStatus.PENDING,
+            and_(Job.status == JobStatus.RUNNING, Job.locked_at < now - timedelta(seconds=settings.JOB_LOCK_TIMEOUT_SECONDS)),
+        ),
+    )
+    with Session(bind, expire_on_commit=False) as session:
+        candidates = session.exec(
+            select(Job.id, Job.attempts).where(claimable).order_by(Job.run_at).limit(10).with_for_update(skip_locked=True)
+        ).all()
+        for job_id, attempts in candidates:
+            claimed = session.exec(
+                update(Job)
+                .where(Job.id == job_id, Job.attempts == attempts, claimable)
+                .values(status=JobStatus.RUNNING, locked_at=now, attempts=attempts + 1, updated_at=now)
+            )
+            if claimed.rowcount == 1:
+                session.commit()
+                return session.get(Job, job_id)
+        session.rollback()
+    return None
+
+
+def _finish(bind: Engine, job_id: UUID, attempts: int, max_attempts: int, error: str | None) -> None:
+    now = datetime.now(timezone.utc)
+    if error is None:
+        values: dict[str, Any] = {"status": JobStatus.SUCCEEDED, "last_error": None}
+    elif attempts >= max_attempts:
+        values = {"status": JobStatus.FAILED, "last_error": error}
+    else:
+        values = {"status": JobStatus.PENDING, "last_error": error, "run_at": now + retry_delay(attempts)}
+    with Session(bind) as session:
+        session.exec(update(Job).where(Job.id == job_id).values(locked_at=None, updated_at=now, **values))
+        session.commit()
+
+
+def run_next_job(bind: Engine) -> bool:
+    """Claim and run one due job. Returns False when nothing was due."""
+    job = _claim_next(bind)
+    if job is None:
+        return False
+    job_id, name, payload, attempts, max_attempts = job.id, job.name, job.payload, job.attempts, job.max_attempts
+
+    error = None
+    handler = JOB_HANDLERS.get(name)
+    if handler is None:
+        error = f"No job handler registered for '{name}'"
+    else:
+        try:
+            with Session(bind) as session:
+                handler(session, payload)
+                session.commit()
+        except Exception:
+            error = traceback.format_exc(limit=5)
+            logger.warning("Job %s (%s) failed on attempt %s/%s", job_id, name, attempts, max_attempts, exc_info=True)
+    _finish(bind, job_id, attempts, max_attempts, error)
+    return True
+
+
+def run_pending_jobs(bind: Engine, limit: int = 1000) -> int:
+    """Run due jobs in the calling thread until none are left; used by tests and scripts."""
+    ran = 0
+    while ran < limit and run_next_job(bind):
+        ran += 1
+    return ran
+
+
+class JobWorker:
+    """
+    Pool of daemon threads draining the job table. Each thread polls every
+    JOB_POLL_INTERVAL_SECONDS, or sooner when a transaction enqueues work.
+    """
+
+    def __init__(self, bind: Engine, workers: int | None = None, poll_interval: float | None = None):
+        self.bind = bind
+        self.workers = workers or settings.JOB_WORKERS
+        self.poll_interval = poll_interval if poll_interval is not None else settings.JOB_POLL_INTERVAL_SECONDS
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        self._stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 10) -> None:
+        self._stop.set()
+        _work_available.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads.clear()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if run_next_job(self.bind):
+                    continue
+            except Exception:
+                logger.exception("Job worker error")
+            _work_available.wait(self.poll_interval)
+            _work_available.clear()
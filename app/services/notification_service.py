@@ -1,38 +1,150 @@
-from sqlmodel import Session, select, desc
-import asyncio
+import threading
+from sqlalchemy import event
+from sqlmodel import Session, select, desc, func, insert, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.core.config import settings
 from app.models.notification import Notification
+from app.models.push_outbox import PushOutbox
+from app.models.push_token import PushToken
+from app.models.user import User
 from app.schemas.paging import Paging
-from app.schemas.notification import NotificationCreate, NotificationRead
+from app.schemas.notification import NotificationBroadcastResult, NotificationCreate, NotificationList, NotificationRead, UnreadCount
+from app.utility.async_reads import run_read
+from app.utility.cache import TTLCache
 from app.utility.paging import paginate
 from datetime import datetime, timezone
-from uuid import UUID
-from .push_notification_service import PushNotificationSender
+from uuid import UUID, uuid4
+from .push_outbox_service import outbox_rows, queue_push
 
 
-def create_notification(session: Session, data: NotificationCreate) -> Notification:
+_unread_cache = TTLCache(ttl=settings.NOTIFICATION_UNREAD_CACHE_TTL_SECONDS, maxsize=10_000)
+# Bumped on every committed change to a user's notifications, so a count read
+# before the change is not cached after it
+_unread_versions: dict[UUID, int] = {}
+_unread_lock = threading.Lock()
+
+
+def touch_unread_count(session: Session, *user_ids: UUID) -> None:
+    """Drop the users' cached unread counts once `session` commits."""
+    session.info.setdefault("unread_changed", set()).update(user_ids)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_unread_counts(session: Session) -> None:
+    changed = session.info.pop("unread_changed", ())
+    with _unread_lock:
+        for user_id in changed:
+            _unread_versions[user_id] = _unread_versions.get(user_id, 0) + 1
+            _unread_cache.pop(user_id)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_unread_changes(session: Session) -> None:
+    session.info.pop("unread_changed", None)
+
+def get_unread_count(session: Session, user_id: UUID) -> dict[str, int]:
+    """
+    Unread badge count, cached per user for NOTIFICATION_UNREAD_CACHE_TTL_SECONDS.
+    The services below drop a user's entry when they commit a change to that
+    user's notifications, and a count read while such a change commits is not
+    cached. Only changes made by another process can be stale, and only until
+    the entry expires.
+    """
+    unread = _unread_cache.get(user_id)
+    if unread is None:
+        version = _unread_versions.get(user_id, 0)
+        unread = session.exec(
+            select(func.count()).select_from(Notification).where(Notification.user_id == user_id, Notification.read == False)
+        ).one()
+        with _unread_lock:
+            if _unread_versions.get(user_id, 0) == version:
+                _unread_cache.set(user_id, unread)
+    return {"unread": unread}
+
+async def get_unread_count_async(session: AsyncSession, user_id: UUID) -> UnreadCount:
+    unread = _unread_cache.get(user_id)
+    if unread is not None:
+        return UnreadCount(unread=unread)
+    return await run_read(session, UnreadCount, get_unread_count, user_id)
+
+def add_notification(session: Session, data: NotificationCreate) -> Notification:
+    """
+    Add a notification and its push deliveries (see `push_outbox_service`) to
+    the caller's transaction. The pushes are sent after the caller commits.
+    """
     notification = Notification(**data.model_dump())
     session.add(notification)
+    queue_push(session, notification)
+    touch_unread_count(session, notification.user_id)
+    return notification
+
+def create_notification(session: Session, data: NotificationCreate) -> Notification:
+    notification = add_notification(session, data)
     session.commit()
     session.refresh(notification)
-    # Send push notification if the user has tokens
-    tokens = PushNotificationSender.get_tokens_for_user(session, notification.user_id)
-    if tokens:
-        # Use asyncio.create_task if called inside an async FastAPI context,
-        # or asyncio.run if outside (be careful with event loops!)
-        asyncio.create_task(
-            PushNotificationSender.send_push(
-                tokens=tokens,
-                title=notification.title,
-                body=notification.body,
-                data=notification.data,
-            )
-        )
     return notification
 
-def get_notifications_for_user(session: Session, user_id: UUID, paging: Paging) -> dict[str, list[Notification] | int]:
+
+def create_notifications_bulk(
+    session: Session,
+    user_ids: list[UUID],
+    title: str,
+    body: str,
+    data: dict[str, str] | None = None,
+) -> NotificationBroadcastResult:
+    """
+    Notify many users in one transaction: one query resolves the recipients
+    and their push tokens, one INSERT writes the notifications and one writes
+    the push outbox rows, which the dispatcher then sends to Expo in batches
+    of 100 across recipients. Unknown or deleted users are skipped.
+    """
+    requested = list(dict.fromkeys(user_ids))
+    tokens: dict[UUID, list[str]] = {}
+    for user_id, token in session.exec(
+        select(User.id, PushToken.token)
+        .outerjoin(PushToken, PushToken.user_id == User.id)
+        .where(User.id.in_(requested), User.deleted == False)
+    ).all():
+        user_tokens = tokens.setdefault(user_id, [])
+        if token and token not in user_tokens:
+            user_tokens.append(token)
+
+    now = datetime.now(timezone.utc)
+    # Core-level bulk inserts skip the model defaults, so ids and timestamps are explicit
+    notifications = [
+        {
+            "id": uuid4(),
+            "user_id": user_id,
+            "title": title,
+            "body": body,
+            "data": data,
+            "read": False,
+            "sent_at": now,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for user_id in requested if user_id in tokens
+    ]
+    deliveries = outbox_rows(
+        [(row["id"], token) for row in notifications for token in tokens[row["user_id"]]], now
+    )
+    if notifications:
+        session.exec(insert(Notification), params=notifications)
+    if deliveries:
+        session.exec(insert(PushOutbox), params=deliveries)
+    touch_unread_count(session, *(row["user_id"] for row in notifications))
+    session.commit()
+    return NotificationBroadcastResult(
+        notified=len(notifications),
+        push_deliveries=len(deliveries),
+        skipped_user_ids=[user_id for user_id in requested if user_id not in tokens],
+    )
+
+def get_notifications_for_user(session: Session, user_id: UUID, paging: Paging) -> dict[str, list[Notification] | int | str | None]:
     query = select(Notification).where(Notification.user_id == user_id).order_by(desc(Notification.created_at))
-    notifications, total = paginate(session, query, paging)
-    return {"data": notifications, "total": total}
+    page = paginate(session, query, paging, keyset=(Notification.created_at, Notification.id))
+    return page._asdict()
+
+async def get_notifications_for_user_async(session: AsyncSession, user_id: UUID, paging: Paging) -> NotificationList:
+    return await run_read(session, NotificationList, get_notifications_for_user, user_id, paging)
 
 def mark_notification_read(session: Session, notification_id: UUID) -> Notification | None:
     notification = session.get(Notification, notification_id)
@@ -40,6 +152,7 @@ def mark_notification_read(session: Session, notification_id: UUID) -> Notificat
         notification.read = True
         notification.updated_at = datetime.now(timezone.utc)
         session.add(notification)
+        touch_unread_count(session, notification.user_id)
         session.commit()
         session.refresh(notification)
     return notification
@@ -48,6 +161,7 @@ def delete_notification(session: Session, notification_id: UUID) -> Notification
     notification = session.get(Notification, notification_id)
     if notification:
         session.delete(notification)
+        touch_unread_count(session, notification.user_id)
         session.commit()
     return notification
 
@@ -55,23 +169,42 @@ def get_notification_by_id(session: Session, notification_id: UUID) -> Notificat
     return session.get(Notification, notification_id)
 
 def batch_mark_notifications_read(session: Session, user_id: UUID, notification_ids: list[UUID]) -> int:
-    # Mark all provided notifications as read, must belong to user
-    notifications = session.exec(
-        select(Notification).where(
+    # Mark all provided notifications as read, must belong to user; one UPDATE, no ORM objects
+    marked = session.exec(
+        update(Notification)
+        .where(Notification.user_id == user_id, Notification.id.in_(notification_ids))
+        .values(read=True, updated_at=datetime.now(timezone.utc))
+        .returning(Notification.id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    touch_unread_count(session, user_id)
+    session.commit()
+    return len(marked)
+
+def mark_all_read(session: Session, user_id: UUID, before: datetime | None = None) -> int:
+    """
+    Mark the user's unread notifications created up to `before` (default:
+    now) as read with a single UPDATE. Returns how many changed.
+    """
+    updated = session.exec(
+        update(Notification)
+        .where(
             Notification.user_id == user_id,
-            Notification.id.in_(notification_ids)
+            Notification.read == False,
+            Notification.created_at <= (before or datetime.now(timezone.utc)),
         )
-    ).all()
-    now = datetime.now(timezone.utc)
-    for n in notifications:
-        n.read = True
-        n.updated_at = now
-        session.add(n)
+        .values(read=True, updated_at=datetime.now(timezone.utc))
+        .execution_options(synchronize_session=False)
+    )
+    touch_unread_count(session, user_id)
     session.commit()
-    return len(notifications)
+    return updated.rowcount
 
-def get_all_notifications_admin(session: Session, paging: Paging) -> dict[str, list[Notification] | int]:
+def get_all_notifications_admin(session: Session, paging: Paging) -> dict[str, list[Notification] | int | str | None]:
     # Admin gets paginated notifications across all users
     query = select(Notification).order_by(desc(Notification.created_at))
-    notifications, total = paginate(session, query, paging)
-    return {"data": notifications, "total": total}
\ No newline at end of file
+    page = paginate(session, query, paging, keyset=(Notification.created_at, Notification.id))
+    return page._asdict()
+
+async def get_all_notifications_admin_async(session: AsyncSession, paging: Paging) -> NotificationList:
+    return await run_read(session, NotificationList, get_all_notifications_admin, paging)
@@ -1,13 +1,18 @@
 from fastapi import HTTPException
+from sqlalchemy.orm import joinedload
 from sqlmodel import Sequence, Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.models.payment import Payment
 from app.models.document import MediaFile
 from uuid import UUID
 from datetime import datetime, timezone
 
 from app.schemas.paging import Paging
+from app.utility.async_reads import run_read
 from app.utility.paging import paginate
-from app.schemas.payment import PaymentCreate, PaymentUpdate, PaymentRead
+from app.schemas.payment import AllPayment, PaymentCreate, PaymentUpdate, PaymentRead
+from app.schemas.unit import UnitPayments
+from app.services.dashboard_snapshot_service import EMPTY_FOOTPRINT, payment_footprint, record_payment_change
 
 
 def _as_uuid(value: str | UUID) -> UUID:
@@ -36,20 +41,27 @@ def create_payment(session: Session, data: PaymentCreate) -> Payment:
             raise HTTPException(status_code=404, detail="Media file not found")
 
     session.add(payment)
+    record_payment_change(session, EMPTY_FOOTPRINT, payment_footprint(payment))
     session.commit()
     session.refresh(payment)
     return payment
 
-def get_all_payments(session: Session, paging: Paging)  -> dict[str, list[Payment] | int] | None:
-    query = select(Payment).where(Payment.deleted == False)
-    payments, total = paginate(session, query, paging)
+def get_all_payments(session: Session, paging: Paging)  -> dict[str, list[Payment] | int | str | None]:
+    query = select(Payment).where(Payment.deleted == False).options(joinedload(Payment.unit))
+    page = paginate(session, query, paging, keyset=(Payment.created_at, Payment.id))
 
-    return {"data": payments, "total": total}
+    return page._asdict()
 
-def get_payments_by_unit(session: Session, unit_id: UUID, paging: Paging) -> dict[str, list[Payment] | int] | None:
-    query = select(Payment).where(Payment.unit_id == _as_uuid(unit_id), Payment.deleted == False)
-    payments, total = paginate(session, query, paging)
-    return {"data": payments, "total": total}
+async def get_all_payments_async(session: AsyncSession, paging: Paging) -> AllPayment:
+    return await run_read(session, AllPayment, get_all_payments, paging)
+
+def get_payments_by_unit(session: Session, unit_id: UUID, paging: Paging) -> dict[str, list[Payment] | int | str | None]:
+    query = select(Payment).where(Payment.unit_id == _as_uuid(unit_id), Payment.deleted == False).options(joinedload(Payment.unit))
+    page = paginate(session, query, paging, keyset=(Payment.created_at, Payment.id))
+    return page._asdict()
+
+async def get_payments_by_unit_async(session: AsyncSession, unit_id: UUID, paging: Paging) -> UnitPayments:
+    return await run_read(session, UnitPayments, get_payments_by_unit, unit_id, paging)
 
 def get_payment_by_id(session: Session, payment_id: str) -> Payment | None:
     return session.get(Payment, _as_uuid(payment_id))
@@ -58,6 +70,7 @@ def update_payment(session: Session, payment_id: str, data: PaymentUpdate) -> Pa
     payment = session.get(Payment, _as_uuid(payment_id))
     if not payment or payment.deleted:
         return None
+    before = payment_footprint(payment)
     for field, value in data.model_dump(exclude_unset=True).items():
         if field == 'status' and value == "paid":
             payment.payment_date = datetime.now(timezone.utc)
@@ -82,6 +95,7 @@ def update_payment(session: Session, payment_id: str, data: PaymentUpdate) -> Pa
             setattr(payment, field, value)
 
     session.add(payment)
+    record_payment_change(session, before, payment_footprint(payment))
     session.commit()
     session.refresh(payment)
     return payment
@@ -89,8 +103,10 @@ def update_payment(session: Session, payment_id: str, data: PaymentUpdate) -> Pa
 def soft_delete_payment(session: Session, payment_id: str, reason: str) -> Payment | None:
     payment = session.get(Payment, _as_uuid(payment_id))
     if payment:
+        before = payment_footprint(payment)
         payment.deleted = True
         payment.reason_for_delete = reason
         session.add(payment)
+        record_payment_change(session, before, payment_footprint(payment))
         session.commit()
     return payment
@@ -1,8 +1,10 @@
+from pydantic import BaseModel
 from sqlmodel import Session, select
 from app.models.project import Project
 from datetime import datetime, timezone
 from app.schemas.project import ProjectCreate, ProjectUpdate, ProjectList, ProjectRead, ProjectReplace
 from app.schemas.paging import Paging
+from app.utility.loaders import loader_options
 from app.utility.paging import paginate
 
 def create_project(session: Session, data: ProjectCreate) -> Project:
@@ -12,14 +14,14 @@ def create_project(session: Session, data: ProjectCreate) -> Project:
     session.refresh(project)
     return project
 
-def get_all_projects(session: Session, paging: Paging) -> dict[str, list[Project] | int]:
-    query = select(Project).where(Project.deleted == False)
-    projects, total = paginate(session, query, paging)
+def get_all_projects(session: Session, paging: Paging) -> dict[str, list[Project] | int | None]:
+    query = select(Project).where(Project.deleted == False).options(*loader_options(ProjectRead))
+    page = paginate(session, query, paging)
 
-    return {"data": projects, "total": total}
+    return {"data": page.data, "total": page.total}
 
-def get_project_by_id(session: Session, project_id: str) -> Project | None:
-    return session.get(Project, project_id)
+def get_project_by_id(session: Session, project_id: str, schema: type[BaseModel] | None = None) -> Project | None:
+    return session.get(Project, project_id, options=loader_options(schema) if schema else None)
 
 def soft_delete_project(session: Session, project_id: str, reason: str) -> Project | None:
     project = session.get(Project, project_id)
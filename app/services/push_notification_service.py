@@ -1,43 +1,131 @@
+import asyncio
 import httpx
-from typing import List, Optional, Any
+from typing import List, Optional, Any, Iterable, Union
+from app.core.config import settings
 from app.models.push_token import PushToken
 from uuid import UUID
 from datetime import datetime, timezone
 from app.models.user import User
-from sqlmodel import Session, select
+from sqlmodel import Session, select, delete
 
 EXPO_PUSH_URL = "https://exp.host/--/api/v2/push/send"
+# Expo accepts at most 100 messages per request
+EXPO_BATCH_SIZE = 100
+
+_expo_client: Optional[httpx.AsyncClient] = None
+
+
+def create_expo_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=settings.PUSH_HTTP2,
+        timeout=httpx.Timeout(10.0, connect=5.0),
+        limits=httpx.Limits(
+            max_connections=settings.PUSH_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.PUSH_MAX_CONNECTIONS,
+            keepalive_expiry=60,
+        ),
+        headers={"Accept": "application/json", "Accept-Encoding": "gzip, deflate"},
+    )
+
+
+def get_expo_client() -> httpx.AsyncClient:
+    """
+    Shared keep-alive client for Expo, so connection and TLS setup are paid
+    once per process instead of once per notification. Closed by the app
+    lifespan through `close_expo_client`.
+    """
+    global _expo_client
+    if _expo_client is None or _expo_client.is_closed:
+        _expo_client = create_expo_client()
+    return _expo_client
+
+
+async def close_expo_client() -> None:
+    global _expo_client
+    if _expo_client is not None:
+        await _expo_client.aclose()
+        _expo_client = None
+
 
 class PushNotificationSender:
+    @staticmethod
+    def build_message(
+        token: str,
+        title: str,
+        body: str,
+        data: Optional[dict[str, str]] = None,
+        image: Optional[str] = None
+    ) -> dict[str, Any]:
+        message: dict[str, Any] = {
+            "to": token,
+            "sound": "default",
+            "title": title,
+            "body": body,
+            "data": data or {},
+        }
+        if image:
+            message["richContent"] = {"image": image}
+        return message
+
+    @staticmethod
+    async def post_batch(client: httpx.AsyncClient, messages: List[dict[str, Any]]) -> List[dict[str, Any]]:
+        """
+        Send up to 100 messages in one Expo request and return one push ticket
+        per message, in order. Raises httpx.HTTPError when the request fails.
+        """
+        resp = await client.post(EXPO_PUSH_URL, json=messages)
+        resp.raise_for_status()
+        tickets = resp.json().get("data") or []
+        return tickets if isinstance(tickets, list) else [tickets]
+
+    @staticmethod
+    async def post_batches(
+        client: httpx.AsyncClient,
+        messages: List[dict[str, Any]],
+        concurrency: Optional[int] = None,
+        batch_size: int = EXPO_BATCH_SIZE,
+    ) -> List[Union[List[dict[str, Any]], Exception]]:
+        """
+        Split messages into Expo batches and post up to `concurrency` of them
+        at once (PUSH_CONCURRENCY by default). Returns, per batch, its tickets
+        or the exception that failed it.
+        """
+        semaphore = asyncio.Semaphore(concurrency or settings.PUSH_CONCURRENCY)
+
+        async def post(batch: List[dict[str, Any]]) -> List[dict[str, Any]]:
+            async with semaphore:
+                return await PushNotificationSender.post_batch(client, batch)
+
+        batches = [messages[i:i + batch_size] for i in range(0, len(messages), batch_size)]
+        results = await asyncio.gather(*(post(batch) for batch in batches), return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException) and not isinstance(result, Exception):
+                raise result
+        return results
+
     @staticmethod
     async def send_push(
         tokens: List[str],
         title: str,
         body: str,
         data: Optional[dict[str, str]] = None,
-        image: Optional[str] = None
+        image: Optional[str] = None,
+        client: Optional[httpx.AsyncClient] = None,
     ) -> List[Any]:
-        messages = []
-        for token in tokens:
-            message = {
-                "to": token,
-                "sound": "default",
-                "title": title,
-                "body": body,
-                "data": data or {},
-            }
-            if image:
-                message["richContent"] = {"image": image}
-            messages.append(message)
-
-        async with httpx.AsyncClient() as client:
-            # Expo recommends sending up to 100 notifications per request
-            responses = []
-            for i in range(0, len(messages), 100):
-                batch = messages[i:i+100]
-                resp = await client.post(EXPO_PUSH_URL, json=batch)
-                responses.append(resp.json())
-            return responses
+        """
+        Send one notification to every token. Returns one ticket per token;
+        tokens in a failed batch get an error ticket with the exception.
+        """
+        messages = [PushNotificationSender.build_message(token, title, body, data, image) for token in tokens]
+        results = await PushNotificationSender.post_batches(client or get_expo_client(), messages)
+        tickets: List[Any] = []
+        for index, result in enumerate(results):
+            if isinstance(result, Exception):
+                size = len(messages[index * EXPO_BATCH_SIZE:(index + 1) * EXPO_BATCH_SIZE])
+                tickets.extend({"status": "error", "message": str(result)} for _ in range(size))
+            else:
+                tickets.extend(result)
+        return tickets
 
     @staticmethod
     def get_tokens_for_user(session: Session, user_id: UUID) -> List[str]:
@@ -73,4 +161,18 @@ def remove_push_token(session: Session, user_id: UUID, token: str) -> bool:
         session.delete(existing)
         session.commit()
         return True
-    return False
\ No newline at end of file
+    return False
+
+def unregistered_tokens(tokens: Iterable[str], tickets: Iterable[dict[str, Any]]) -> List[str]:
+    """Tokens whose Expo ticket says the app was uninstalled or the token expired."""
+    return [
+        token for token, ticket in zip(tokens, tickets)
+        if ticket.get("status") == "error" and (ticket.get("details") or {}).get("error") == "DeviceNotRegistered"
+    ]
+
+def prune_push_tokens(session: Session, tokens: Iterable[str]) -> int:
+    """Delete dead device tokens for every user; the caller commits."""
+    tokens = list(dict.fromkeys(tokens))
+    if not tokens:
+        return 0
+    return session.exec(delete(PushToken).where(PushToken.token.in_(tokens))).rowcount
@@ -0,0 +1,213 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, List, NamedTuple, Optional, Sequence, Union
+from uuid import UUID, uuid4
+import httpx
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select, update, and_, or_
+from app.core.config import settings
+from app.models.notification import Notification
+from app.models.push_outbox import PushDeliveryStatus, PushOutbox
+from app.services.job_queue import retry_delay
+from app.services.push_notification_service import PushNotificationSender, get_expo_client, prune_push_tokens, unregistered_tokens
+
+logger = logging.getLogger(__name__)
+
+# Expo ticket errors that will not succeed on a retry
+PERMANENT_PUSH_ERRORS = {"DeviceNotRegistered", "MessageTooBig", "InvalidCredentials", "MismatchSenderId"}
+
+
+class ClaimedPush(NamedTuple):
+    id: UUID
+    token: str
+    attempts: int
+    title: str
+    body: str
+    data: Optional[dict[str, str]]
+
+
+def queue_push(session: Session, notification: Notification) -> List[PushOutbox]:
+    """
+    Add one outbox row per device token of the notification's user to the
+    caller's transaction. The dispatcher delivers them after the commit.
+    """
+    tokens = PushNotificationSender.get_tokens_for_user(session, notification.user_id)
+    deliveries = [PushOutbox(notification_id=notification.id, token=token) for token in dict.fromkeys(tokens)]
+    session.add_all(deliveries)
+    return deliveries
+
+
+def outbox_rows(deliveries: Sequence[tuple[UUID, str]], now: datetime) -> List[dict[str, Any]]:
+    """Rows for a bulk INSERT of (notification id, token) pairs; ids and timestamps are explicit."""
+    return [
+        {
+            "id": uuid4(),
+            "notification_id": notification_id,
+            "token": token,
+            "status": PushDeliveryStatus.PENDING,
+            "attempts": 0,
+            "next_attempt_at": now,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for notification_id, token in deliveries
+    ]
+
+
+def _claimable(now: datetime) -> Any:
+    # SENDING rows whose dispatcher died are picked up again after the lock timeout
+    return and_(
+        PushOutbox.next_attempt_at <= now,
+        or_(
+            PushOutbox.status == PushDeliveryStatus.PENDING,
+            and_(
+                PushOutbox.status == PushDeliveryStatus.SENDING,
+                PushOutbox.locked_at < now - timedelta(seconds=settings.JOB_LOCK_TIMEOUT_SECONDS),
+            ),
+        ),
+    )
+
+
+def claim_batch(bind: Engine, limit: int) -> List[ClaimedPush]:
+    """Move up to `limit` due deliveries to SENDING and return them with their message."""
+    now = datetime.now(timezone.utc)
+    with Session(bind) as session:
+        ids = session.exec(
+            select(PushOutbox.id)
+            .where(_claimable(now))
+            .order_by(PushOutbox.next_attempt_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if not ids:
+            return []
+        claimed = session.exec(
+            update(PushOutbox)
+            .where(PushOutbox.id.in_(ids), _claimable(now))
+            .values(status=PushDeliveryStatus.SENDING, locked_at=now, attempts=PushOutbox.attempts + 1, updated_at=now)
+            .returning(PushOutbox.id)
+        ).scalars().all()
+        rows = session.exec(
+            select(PushOutbox.id, PushOutbox.token, PushOutbox.attempts, Notification.title, Notification.body, Notification.data)
+            .join(Notification, Notification.id == PushOutbox.notification_id)
+            .where(PushOutbox.id.in_(claimed))
+            .order_by(PushOutbox.next_attempt_at)
+        ).all()
+        session.commit()
+    return [ClaimedPush(*row) for row in rows]
+
+
+def _failure(delivery: ClaimedPush, error: str, permanent: bool, now: datetime) -> dict[str, Any]:
+    if permanent or delivery.attempts >= settings.PUSH_MAX_ATTEMPTS:
+        return {"status": PushDeliveryStatus.DEAD, "next_attempt_at": now, "last_error": error}
+    return {
+        "status": PushDeliveryStatus.PENDING,
+        "next_attempt_at": now + retry_delay(delivery.attempts, settings.PUSH_RETRY_BASE_SECONDS),
+        "last_error": error,
+    }
+
+
+def record_results(bind: Engine, batch: Sequence[ClaimedPush], results: Sequence[Union[dict[str, Any], str]]) -> None:
+    """
+    Store the outcome of a dispatch in one transaction. `results` holds, per
+    delivery, its Expo ticket or the error of the request that carried it.
+    Tokens Expo reports as DeviceNotRegistered are removed from PushToken.
+    """
+    now = datetime.now(timezone.utc)
+    rows = []
+    for delivery, result in zip(batch, results):
+        if isinstance(result, str):
+            outcome = _failure(delivery, result, False, now)
+        elif result.get("status") == "ok":
+            outcome = {"status": PushDeliveryStatus.SENT, "next_attempt_at": now, "sent_at": now, "ticket_id": result.get("id"), "last_error": None}
+        else:
+            reason = (result.get("details") or {}).get("error")
+            message = f"{reason or 'error'}: {result.get('message', '')}"
+            outcome = _failure(delivery, message, reason in PERMANENT_PUSH_ERRORS, now)
+        rows.append({"sent_at": None, "ticket_id": None, **outcome, "id": delivery.id, "locked_at": None, "updated_at": now})
+
+    tickets = [result if isinstance(result, dict) else {} for result in results]
+    with Session(bind) as session:
+        # Bulk UPDATE by primary key, one round trip per dispatch
+        session.exec(update(PushOutbox), params=rows)
+        prune_push_tokens(session, unregistered_tokens((d.token for d in batch), tickets))
+        session.commit()
+
+
+async def dispatch_batch(bind: Engine, client: httpx.AsyncClient, batch_size: Optional[int] = None) -> int:
+    """
+    Claim up to PUSH_CONCURRENCY Expo batches of deliveries, post them
+    concurrently and record the results. Returns the number attempted.
+    """
+    batch_size = batch_size or settings.PUSH_BATCH_SIZE
+    batch = await asyncio.to_thread(claim_batch, bind, batch_size * settings.PUSH_CONCURRENCY)
+    if not batch:
+        return 0
+    messages = [PushNotificationSender.build_message(d.token, d.title, d.body, d.data) for d in batch]
+    results: List[Union[dict[str, Any], str]] = []
+    posted = await PushNotificationSender.post_batches(client, messages, batch_size=batch_size)
+    for index, outcome in enumerate(posted):
+        size = len(messages[index * batch_size:(index + 1) * batch_size])
+        if isinstance(outcome, Exception):
+            error = f"{type(outcome).__name__}: {outcome}"
+            logger.warning("Push batch of %s failed: %s", size, error)
+            results.extend([error] * size)
+        else:
+            results.extend(outcome[:size])
+            results.extend(["No push ticket returned"] * (size - len(outcome)))
+    await asyncio.to_thread(record_results, bind, batch, results)
+    return len(batch)
+
+
+async def dispatch_pending(bind: Engine, client: httpx.AsyncClient, limit: int = 100_000) -> int:
+    """Send due deliveries until none are left; used by tests and scripts."""
+    total = 0
+    while total < limit:
+        sent = await dispatch_batch(bind, client)
+        if not sent:
+            break
+        total += sent
+    return total
+
+
+def get_push_deliveries(session: Session, notification_id: UUID) -> Sequence[PushOutbox]:
+    return session.exec(
+        select(PushOutbox).where(PushOutbox.notification_id == notification_id).order_by(PushOutbox.created_at)
+    ).all()
+
+
+class PushDispatcher:
+    """
+    Background task on the app's event loop that drains the push outbox over
+    the shared Expo client, polling every PUSH_POLL_INTERVAL_SECONDS when it
+    is empty.
+    """
+
+    def __init__(self, bind: Engine, poll_interval: Optional[float] = None):
+        self.bind = bind
+        self.poll_interval = poll_interval if poll_interval is not None else settings.PUSH_POLL_INTERVAL_SECONDS
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name="push-dispatcher")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                sent = await dispatch_batch(self.bind, get_expo_client())
+            except Exception:
+                logger.exception("Push dispatcher error")
+                sent = 0
+            if not sent:
+                await asyncio.sleep(self.poll_interval)
@@ -1,6 +1,9 @@
-from sqlmodel import Session, select
-from typing import Sequence
-from app.models.unit_agent_link import UnitAgentLink
+from datetime import datetime, timezone
+from sqlmodel import Session, select, delete
+from sqlalchemy import insert
+from typing import Any, Iterable, Sequence
+from uuid import UUID, uuid4
+from app.models.unit_agent_link import AgentRole, UnitAgentLink
 from app.schemas.unit_agent_link import UnitAgentLinkCreate, UnitAgentLinkRead
 
 
@@ -27,4 +30,36 @@ def get_unit_agents_by_unit(session: Session, unit_id: str) -> Sequence[UnitAgen
 
 
 def get_unit_agents_by_agent(session: Session, agent_id: str) -> Sequence[UnitAgentLink]:
-    return session.exec(select(UnitAgentLink).where(UnitAgentLink.agent_id == agent_id)).all()
\ No newline at end of file
+    return session.exec(select(UnitAgentLink).where(UnitAgentLink.agent_id == agent_id)).all()
+
+
+def reconcile_unit_agents(session: Session, unit_id: UUID, assignments: Iterable[Any]) -> tuple[int, int]:
+    """
+    Make the unit's agent links match `assignments` (objects with `agent_id`
+    and `role`), deleting and inserting only the (agent_id, role) pairs that
+    changed, one bulk statement each. Duplicate links are removed too.
+    Does not commit; returns (added, removed).
+    """
+    wanted = {(assignment.agent_id, AgentRole(assignment.role)) for assignment in assignments}
+    kept: set[tuple[UUID, AgentRole]] = set()
+    stale: list[UUID] = []
+    for link_id, agent_id, role in session.exec(
+        select(UnitAgentLink.id, UnitAgentLink.agent_id, UnitAgentLink.role).where(UnitAgentLink.unit_id == unit_id)
+    ).all():
+        pair = (agent_id, role)
+        if pair in wanted and pair not in kept:
+            kept.add(pair)
+        else:
+            stale.append(link_id)
+
+    if stale:
+        session.exec(delete(UnitAgentLink).where(UnitAgentLink.id.in_(stale)))
+
+    missing = wanted - kept
+    if missing:
+        now = datetime.now(timezone.utc)
+        session.exec(insert(UnitAgentLink).values([
+            {"id": uuid4(), "unit_id": unit_id, "agent_id": agent_id, "role": role, "created_at": now, "updated_at": now}
+            for agent_id, role in missing
+        ]))
+    return len(missing), len(stale)
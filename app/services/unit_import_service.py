@@ -0,0 +1,129 @@
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Iterable, Iterator
+from uuid import uuid4
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session
+from app.models.payment import Payment
+from app.models.unit import Unit
+from app.models.unit_agent_link import UnitAgentLink
+from app.schemas.unit import UnitCreate
+from app.services.dashboard_snapshot_service import record_dashboard_change
+from app.services.unit_service import payment_rows, unit_payment_schedule
+from app.utility.row_readers import RawRow
+
+IMPORT_BATCH_SIZE = 200
+# Cap the report so a file of bad rows cannot grow the response without bound
+MAX_REPORTED_ERRORS = 1000
+
+
+def _format_validation_errors(exc: ValidationError) -> list[str]:
+    return [f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}" for error in exc.errors()]
+
+
+def _parse_row(row: RawRow) -> UnitCreate | list[str]:
+    if row.error:
+        return [row.error]
+    data = dict(row.data or {})
+    # CSV cells carry the agent list as JSON
+    if isinstance(data.get("agents"), str):
+        try:
+            data["agents"] = json.loads(data["agents"])
+        except json.JSONDecodeError:
+            return ["agents: must be a JSON list of {agent_id, role}"]
+    if data.get("agents") is None:
+        data.pop("agents", None)
+    try:
+        return UnitCreate.model_validate(data)
+    except ValidationError as exc:
+        return _format_validation_errors(exc)
+
+
+def _insert_batch(session: Session, batch: list[UnitCreate]) -> None:
+    """Insert units, their payment schedules and agent links with one statement per table."""
+    now = datetime.now(timezone.utc)
+    units = [Unit(**data.model_dump(exclude={"agents"})) for data in batch]
+    session.add_all(units)
+    session.flush()
+
+    payments = [row for unit in units for row in payment_rows(unit.id, unit_payment_schedule(unit), now)]
+    if payments:
+        session.exec(insert(Payment), params=payments)
+
+    links = [
+        {"id": uuid4(), "unit_id": unit.id, "agent_id": agent.agent_id, "role": agent.role, "created_at": now, "updated_at": now}
+        for unit, data in zip(units, batch)
+        for agent in data.agents or []
+    ]
+    if links:
+        session.exec(insert(UnitAgentLink), params=links)
+
+    record_dashboard_change(
+        session,
+        units=sum(1 for unit in units if not unit.deleted),
+        payments=len(payments),
+        outstanding=sum((row["amount"] for row in payments), Decimal("0")),
+    )
+    session.commit()
+    session.expunge_all()
+
+
+def _batches(rows: Iterable[RawRow], size: int) -> Iterator[list[RawRow]]:
+    batch: list[RawRow] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def import_units(session: Session, rows: Iterable[RawRow], batch_size: int = IMPORT_BATCH_SIZE) -> dict[str, Any]:
+    """
+    Create units from a stream of rows, `batch_size` rows per transaction, and
+    report which rows failed and why. Rows are consumed lazily, so memory use
+    does not depend on the size of the upload.
+
+    When the database rejects a batch (for example an unknown project_id) the
+    batch is retried row by row so only the offending rows are reported.
+    """
+    report: dict[str, Any] = {"created": 0, "failed": 0, "errors": [], "errors_truncated": False}
+
+    def fail(number: int, messages: list[str]) -> None:
+        report["failed"] += 1
+        if len(report["errors"]) < MAX_REPORTED_ERRORS:
+            report["errors"].append({"row": number, "errors": messages})
+        else:
+            report["errors_truncated"] = True
+
+    for chunk in _batches(rows, batch_size):
+        valid: list[tuple[int, UnitCreate]] = []
+        for row in chunk:
+            parsed = _parse_row(row)
+            if isinstance(parsed, UnitCreate):
+                valid.append((row.number, parsed))
+            else:
+                fail(row.number, parsed)
+        if not valid:
+            continue
+
+        try:
+            _insert_batch(session, [data for _, data in valid])
+            report["created"] += len(valid)
+            continue
+        except SQLAlchemyError:
+            session.rollback()
+
+        for number, data in valid:
+            try:
+                _insert_batch(session, [data])
+                report["created"] += 1
+            except SQLAlchemyError as exc:
+                session.rollback()
+                fail(number, [f"database: {exc.orig if getattr(exc, 'orig', None) else exc}"])
+
+    return report
@@ -1,70 +1,86 @@
-from uuid import UUID
+from uuid import UUID, uuid4
+from typing import Any, NamedTuple
 from decimal import Decimal, ROUND_HALF_UP
-from sqlmodel import Session, select, desc
+from pydantic import BaseModel
+from sqlalchemy import func, insert
+from sqlmodel import Session, select, desc, delete, and_
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.models.unit import Unit
 from app.models.payment import Payment, PaymentStatus
 from app.schemas.paging import Paging
 from app.models.user import User, Role
 from app.models.unit_agent_link import UnitAgentLink
-from datetime import date, datetime
+from datetime import date, datetime, timezone
 from dateutil.relativedelta import relativedelta
 from app.core.config import settings
+from app.utility.loaders import loader_options, with_payment_totals
+from app.utility.async_reads import run_read
 from app.utility.paging import paginate
-from app.schemas.unit import PaymentDuration, UnitCreate, UnitUpdate, UnitRead
+from app.schemas.unit import PaymentDuration, ReadAllUnits, UnitCreate, UnitUpdate, UnitRead
 from app.schemas.unit_agent_link import UnitAgentLinkCreate, UnitAgentLinkRead
+from app.services.dashboard_snapshot_service import record_dashboard_change
+from app.services.unit_agent_service import reconcile_unit_agents
 
 def create_unit(session: Session, data: UnitCreate) -> Unit:
+    """
+    Create a unit with its payment schedule and agent links in one
+    transaction, so a failure never leaves a unit without its payments.
+    """
 
     # client = session.get(User, data.client_id)
     # if not client or client.role != Role.CLIENT:
     #     raise ValueError("Provided client_id does not belong to a client")
 
-    unit = Unit(**data.model_dump())
+    unit = Unit(**data.model_dump(exclude={"agents"}))
     session.add(unit)
+    # The payment INSERT below bypasses the unit of work, so the unit row must exist first
+    session.flush()
+
+    # A payment plan gets its schedule; otherwise a single payment for the full amount
+    payments = payment_rows(unit.id, unit_payment_schedule(unit), datetime.now(timezone.utc))
+    if payments:
+        session.exec(insert(Payment).values(payments))
+
+    session.add_all([
+        UnitAgentLink(unit_id=unit.id, agent_id=agent.agent_id, role=agent.role)
+        for agent in data.agents or []
+    ])
+
+    record_dashboard_change(
+        session,
+        units=0 if unit.deleted else 1,
+        payments=len(payments),
+        outstanding=sum((row["amount"] for row in payments), Decimal("0")),
+    )
     session.commit()
-    session.refresh(unit)
-
-    # Generate payments if payment_plan is enabled
-    if unit.payment_plan:
-        recalculate_payments(session, unit)
-    else:
-        payment = Payment(
-            amount=unit.amount,
-            due_date=unit.purchase_date,
-            status=PaymentStatus.NOT_PAID,
-            unit_id=unit.id
-        )
-        session.add(payment)
-        session.commit()
 
-    if data.agents:
-        for agent in data.agents:
-            session.add(UnitAgentLink(
-                unit_id=unit.id,
-                agent_id=agent.agent_id,
-                role=agent.role
-            ))
-        session.commit()
-
-    session.refresh(unit)
+    created = get_unit_by_id(session, unit.id, UnitRead)
+    if created is None:
+        # Only possible if the row was hard-deleted between the commit and the reload
+        raise RuntimeError(f"Unit {unit.id} vanished right after it was created")
+    return created
 
-    return unit
+def get_all_units(session: Session, paging: Paging) -> dict[str, list[UnitRead] | int | str | None]:
+    query = select(Unit).where(Unit.deleted == False).order_by(desc(Unit.created_at)).options(*loader_options(UnitRead))
+    page = paginate(session, query, paging, keyset=(Unit.created_at, Unit.id))
 
-def get_all_units(session: Session, paging: Paging) -> dict[str, list[UnitRead] | int]:
-    query = select(Unit).where(Unit.deleted == False).order_by(desc(Unit.created_at))
-    units, total = paginate(session, query, paging)
+    return page._asdict()
 
-    return {"data": units, "total": total}
+async def get_all_units_async(session: AsyncSession, paging: Paging) -> ReadAllUnits:
+    return await run_read(session, ReadAllUnits, get_all_units, paging)
 
-def get_unit_by_id(session: Session, unit_id: UUID) -> Unit | None:
-    return session.get(Unit, unit_id)
+def get_unit_by_id(session: Session, unit_id: UUID, schema: type[BaseModel] | None = None) -> Unit | None:
+    options = loader_options(schema) if schema else [with_payment_totals()]
+    return session.get(Unit, unit_id, options=options)
 
 def soft_delete_unit(session: Session, unit_id: UUID, reason: str) -> Unit | None:
     unit = session.get(Unit, unit_id)
     if unit:
+        was_active = not unit.deleted
         unit.deleted = True
         unit.reason_for_delete = reason
         session.add(unit)
+        record_dashboard_change(session, units=-1 if was_active else 0)
         session.commit()
     return unit
 
@@ -76,6 +92,9 @@ def update_unit(session: Session, unit_id: UUID, data: UnitUpdate) -> Unit | Non
         if field != "agents":
             setattr(unit, field, value)
     session.add(unit)
+    if data.agents is not None:
+        reconcile_unit_agents(session, unit.id, data.agents)
+    record_dashboard_change(session, units=-1 if unit.deleted else 0)
     session.commit()
     session.refresh(unit)
     # Check if any relevant payment fields were updated and payment_plan is enabled
@@ -85,111 +104,116 @@ def update_unit(session: Session, unit_id: UUID, data: UnitUpdate) -> Unit | Non
     ) and unit.payment_plan:
         recalculate_payments(session, unit)
 
-    if hasattr(data, "agents") and data.agents is not None:
-        # Remove old links
-        links = session.exec(select(UnitAgentLink).where(UnitAgentLink.unit_id == unit_id)).all()
-        for link in links:
-            session.delete(link)
-
-        session.commit()
-
-        # Add new links
-        for agent in data.agents:
-            session.add(UnitAgentLink(
-                unit_id=unit.id,
-                agent_id=agent.agent_id,
-                role=agent.role
-            ))
-        session.commit()
-
     return unit
 
 
-# Add after update_unit
-def recalculate_payments(session: Session, unit: Unit)  -> None:
-    # Remove existing non-deleted scheduled payments (excluding the initial payment)
-    scheduled_payments = [
-        p for p in unit.payments
-        if p.status == PaymentStatus.NOT_PAID and not p.deleted
-    ]
-    for p in scheduled_payments:
-        session.delete(p)
-    session.commit()
-
-    # 2) Normalize inputs
-    def to_decimal(value) -> Decimal:
-        if value is None:
-            return Decimal("0")
-        if isinstance(value, Decimal):
-            return value
-        return Decimal(str(value))
-
-    amount = to_decimal(unit.amount)
-    discount_pct = to_decimal(unit.discount) / Decimal("100")
-    initial = to_decimal(unit.expected_initial_payment)
-    installments = int(unit.installment or 0)
-    plan_enabled = bool(unit.payment_plan)
-    purchase_dt = unit.purchase_date or datetime.utcnow()
-
-    # If plan disabled, nothing to schedule here.
-    if not plan_enabled or installments <= 0:
-        session.commit()
-        return
-
-    # Recalculate new monthly payments
-    total = amount - (discount_pct * amount)
-    remaining = total - initial
-    monthly = (remaining / Decimal(installments)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP) if installments else Decimal("0.00")
-
-    # If initial payment was made, add it as a paid payment
+class ScheduledPayment(NamedTuple):
+    reason_for_payment: str | None
+    amount: Decimal
+    due_date: datetime | None
+
+# Months between installments for each payment duration
+INSTALLMENT_INTERVAL_MONTHS = {
+    PaymentDuration.MONTHLY: 1,
+    PaymentDuration.QUARTERLY: 3,
+    PaymentDuration.BI_ANNUALLY: 6,
+    PaymentDuration.ANNUALLY: 12,
+}
+
+def _to_decimal(value: Any) -> Decimal:
+    if value is None:
+        return Decimal("0")
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(str(value))
+
+def payment_schedule(
+    amount: Any,
+    discount: Any,
+    initial: Any,
+    installments: int,
+    duration: str | None,
+    start: datetime | None,
+) -> list[ScheduledPayment]:
+    """
+    Compute the initial payment and every installment of a payment plan in
+    one pass. An unknown duration schedules the initial payment only.
+    """
+    amount = _to_decimal(amount)
+    initial = _to_decimal(initial)
+    total = amount - (_to_decimal(discount) / Decimal("100") * amount)
+    monthly = ((total - initial) / Decimal(installments)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP) if installments else Decimal("0.00")
+
+    schedule: list[ScheduledPayment] = []
     if initial > 0:
-        session.add(Payment(
-            amount=initial.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP),
-            due_date=purchase_dt,
-            status=PaymentStatus.NOT_PAID,
-            unit_id=unit.id,
-            reason_for_payment="Initial Payment"
-        ))
+        schedule.append(ScheduledPayment("Initial Payment", initial.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP), start))
 
+    interval = INSTALLMENT_INTERVAL_MONTHS.get(duration) if duration else None
+    if interval is None:
+        return schedule
     for i in range(installments):
-        if unit.payment_duration == PaymentDuration.MONTHLY:
-            due = purchase_dt + relativedelta(months=i+1) if purchase_dt else None
-            session.add(Payment(
-                amount=monthly,
-                due_date=due,
-                status=PaymentStatus.NOT_PAID,
-                unit_id=unit.id,
-                reason_for_payment=f"Installment {i+1}"
-            ))
-        elif unit.payment_duration == PaymentDuration.QUARTERLY:
-            due = purchase_dt + relativedelta(months=(i+1)*3) if purchase_dt else None
-            session.add(Payment(
-                amount=monthly,
-                due_date=due,
-                status=PaymentStatus.NOT_PAID,
-                unit_id=unit.id,
-                reason_for_payment=f"Installment {i+1}"
-            ))
-        elif unit.payment_duration == PaymentDuration.BI_ANNUALLY:
-            due = purchase_dt + relativedelta(months=(i+1)*6) if purchase_dt else None
-            session.add(Payment(
-                amount=monthly,
-                due_date=due,
-                status=PaymentStatus.NOT_PAID,
-                unit_id=unit.id,
-                reason_for_payment=f"Installment {i+1}"
-            ))
-        elif unit.payment_duration == PaymentDuration.ANNUALLY:
-            due = unit.purchase_date + relativedelta(years=i+1) if unit.purchase_date else None
-            session.add(Payment(
-                amount=monthly,
-                due_date=due,
-                status=PaymentStatus.NOT_PAID,
-                unit_id=unit.id,
-                reason_for_payment=f"Installment {i+1}"
-            ))
+        due = start + relativedelta(months=(i + 1) * interval) if start else None
+        schedule.append(ScheduledPayment(f"Installment {i+1}", monthly, due))
+    return schedule
+
+def unit_payment_schedule(unit: Unit) -> list[ScheduledPayment]:
+    """The payments a new unit starts with: its plan, or a single payment for the full amount."""
+    if not unit.payment_plan:
+        return [ScheduledPayment(None, _to_decimal(unit.amount), unit.purchase_date)]
+    installments = int(unit.installment or 0)
+    if installments <= 0:
+        return []
+    return payment_schedule(
+        unit.amount,
+        unit.discount,
+        unit.expected_initial_payment,
+        installments,
+        unit.payment_duration,
+        unit.purchase_date or datetime.utcnow(),
+    )
+
+def payment_rows(unit_id: UUID, schedule: list[ScheduledPayment], now: datetime) -> list[dict[str, Any]]:
+    # Core-level bulk inserts skip the model defaults, so ids and timestamps are explicit
+    return [
+        {
+            "id": uuid4(),
+            "amount": item.amount,
+            "due_date": item.due_date,
+            "status": PaymentStatus.NOT_PAID,
+            "deleted": False,
+            "unit_id": unit_id,
+            "reason_for_payment": item.reason_for_payment,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for item in schedule
+    ]
 
+# Add after update_unit
+def recalculate_payments(session: Session, unit: Unit)  -> None:
+    """
+    Replace the unit's unpaid scheduled payments with a freshly computed
+    schedule using one DELETE and one multi-row INSERT in a single commit.
+    """
+    # 1) Remove existing non-deleted unpaid payments; they only count towards outstanding
+    unpaid = and_(Payment.unit_id == unit.id, Payment.status == PaymentStatus.NOT_PAID, Payment.deleted == False)
+    removed_count, removed_amount = session.exec(
+        select(func.count(), func.coalesce(func.sum(Payment.amount), 0)).where(unpaid)
+    ).one()
+    session.exec(delete(Payment).where(unpaid))
+
+    # 2) Build the new schedule
+    schedule = unit_payment_schedule(unit) if unit.payment_plan else []
+    if schedule:
+        session.exec(insert(Payment).values(payment_rows(unit.id, schedule, datetime.now(timezone.utc))))
+
+    record_dashboard_change(
+        session,
+        payments=len(schedule) - removed_count,
+        outstanding=sum((item.amount for item in schedule), Decimal("0")) - _to_decimal(removed_amount),
+    )
     session.commit()
+    session.expire(unit, ["payments"])
 
 def warranty_info(unit: Unit)  -> dict[str, bool | str] | None:
     return unit.warranty
@@ -1,17 +1,64 @@
+import asyncio
+import hashlib
+import logging
+import math
+import mimetypes
 import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from urllib.parse import quote
 from uuid import UUID, uuid4
 import boto3
-from typing import Sequence, Any
+from typing import AsyncIterator, BinaryIO, Sequence, Any
 import boto3.session
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import ClientError
 from fastapi import UploadFile, HTTPException, status
+from jose import JWTError, jwt
 from sqlmodel import select, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.models.document import MediaFile
+from app.models.project import Project
+from app.models.unit import Unit
 from app.core.config import settings
-from fastapi.responses import StreamingResponse
+from app.core.security import ALGORITHM
+from fastapi.responses import RedirectResponse, Response, StreamingResponse
 
-from app.schemas.media import UploadMediaFile
+from app.services.job_queue import enqueue, job_handler
+from app.schemas.media import CompleteUploadRequest, DownloadMode, PresignedPart, PresignUploadRequest, PresignUploadResponse, UploadMediaFile
+from app.utility.multipart_upload import S3MultipartWriter, UploadedObject, iter_form_data
 
-client = boto3.session.Session().client(service_name='s3', aws_access_key_id=settings.R2_ACCESS_KEY_ID, aws_secret_access_key=settings.R2_SECRET_ACCESS_KEY, endpoint_url=settings.R2_ENDPOINT_URL)
+logger = logging.getLogger(__name__)
+
+client = boto3.session.Session().client(
+    service_name='s3',
+    aws_access_key_id=settings.R2_ACCESS_KEY_ID,
+    aws_secret_access_key=settings.R2_SECRET_ACCESS_KEY,
+    endpoint_url=settings.R2_ENDPOINT_URL,
+    # enough connections for every upload thread
+    config=Config(max_pool_connections=settings.UPLOAD_WORKERS, signature_version="s3v4"),
+)
+
+# boto3 calls for streamed uploads run here, never on the event loop
+_upload_executor = ThreadPoolExecutor(max_workers=settings.UPLOAD_WORKERS, thread_name_prefix="r2-upload")
+
+UPLOAD_EXTRA_ARGS = {"ACL": "public-read"}  # Adjust ACL as needed
+MAX_UPLOAD_PARTS = 10_000  # S3/R2 limit per multipart upload
+
+
+def _part_size() -> int:
+    return settings.UPLOAD_PART_SIZE_MB * 1024 * 1024
+
+
+def transfer_config() -> TransferConfig:
+    return TransferConfig(
+        multipart_threshold=_part_size(),
+        multipart_chunksize=_part_size(),
+        max_concurrency=settings.UPLOAD_CONCURRENCY,
+    )
 
 def generate_random_file_name(file_name: str) -> str:
     """
@@ -23,51 +70,486 @@ def generate_random_file_name(file_name: str) -> str:
     return f"{base}_{uuid4().hex}{ext}"
 
 
-def create_media_file(db: Session, added_by: UUID, media_file_data: UploadFile, unit_id: UUID | None, project_id: UUID | None, user_id: UUID | None) -> MediaFile:
-    """
-    Create a new media file record in the database.
-    """
+def content_key(sha256: str) -> str:
+    """R2 key for content with this SHA-256; identical files share one object."""
+    return f"sha256/{sha256}"
+
+
+def object_key(media_file: MediaFile) -> str:
+    """R2 key of a media file; rows from before content addressing use file_name."""
+    return media_file.storage_key or media_file.file_name
+
+
+def _file_sha256(fileobj: BinaryIO) -> tuple[str, int]:
+    # Spooled uploads are local, so hashing them first is cheap next to the upload it may save
+    digest, size = hashlib.sha256(), 0
+    fileobj.seek(0)
+    while chunk := fileobj.read(1024 * 1024):
+        digest.update(chunk)
+        size += len(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest(), size
 
-    size = media_file_data.size if media_file_data.size else 0
-    content_type = media_file_data.content_type if media_file_data.content_type else "application/octet-stream"
-    file_name = media_file_data.filename if media_file_data.filename else generate_random_file_name(media_file_data.filename or "")
 
+def _stored_keys(db: Session, hashes: Sequence[str]) -> dict[str, str]:
+    """Map each of `hashes` that is already stored to its object key."""
+    rows = db.exec(
+        select(MediaFile.content_hash, MediaFile.storage_key)
+        .where(MediaFile.content_hash.in_(set(hashes)), MediaFile.storage_key.is_not(None))
+    ).all()
+    return {content_hash: storage_key for content_hash, storage_key in rows}
 
+
+def _upload_type(media_file_data: UploadFile) -> str:
+    return media_file_data.content_type if media_file_data.content_type else "application/octet-stream"
+
+
+def _upload_object(fileobj: BinaryIO, key: str, content_type: str) -> None:
     client.upload_fileobj(
-        media_file_data.file,
+        fileobj,
         settings.R2_BUCKET_NAME,
-        file_name,
-        ExtraArgs={
-            "ContentType": content_type,
-            "ACL": "public-read"  # Adjust ACL as needed
-        }
+        key,
+        ExtraArgs={"ContentType": content_type, **UPLOAD_EXTRA_ARGS},
+        Config=transfer_config(),
     )
 
-    # Create a MediaFile instance
-    media_file = MediaFile(
+
+def _new_media_file(added_by: UUID, media_file_data: UploadFile, sha256: str, size: int, key: str, unit_id: UUID | None, project_id: UUID | None) -> MediaFile:
+    file_name = media_file_data.filename if media_file_data.filename else generate_random_file_name(media_file_data.filename or "")
+    return MediaFile(
         file_size=size,
-        file_type=content_type,
+        file_type=_upload_type(media_file_data),
         file_name=file_name,
+        content_hash=sha256,
+        storage_key=key,
         uploaded_by=added_by,
         unit_id=unit_id,
         project_id=project_id,
-        file_path=f"{settings.R2_PUBLIC_URL}/{file_name}",
+        file_path=f"{settings.R2_PUBLIC_URL}/{key}",
         deleted=False
     )
-    db.add(media_file)
+
+
+def delete_uploaded_objects(keys: Sequence[str]) -> None:
+    """Best-effort removal of objects uploaded by a request that failed."""
+    for start in range(0, len(keys), 1000):  # DeleteObjects takes at most 1000 keys
+        try:
+            client.delete_objects(
+                Bucket=settings.R2_BUCKET_NAME,
+                Delete={"Objects": [{"Key": key} for key in keys[start:start + 1000]], "Quiet": True},
+            )
+        except Exception:
+            logger.exception("Could not delete %s uploaded objects", len(keys[start:start + 1000]))
+
+
+def sweep_unreferenced_objects(db: Session, keys: Sequence[str], older_than: timedelta | None = None) -> list[str]:
+    """
+    Delete those of `keys` that no media file points at and that were last
+    written more than `older_than` (UPLOAD_ORPHAN_GRACE_SECONDS) ago.
+
+    Content-addressed objects are shared between requests, and a request that
+    has just stored one commits its row a moment later; the grace period keeps
+    its object alive until then. Returns the deleted keys.
+    """
+    if older_than is None:
+        older_than = timedelta(seconds=settings.UPLOAD_ORPHAN_GRACE_SECONDS)
+    cutoff = datetime.now(timezone.utc) - older_than
+    stale = []
+    for key in keys:
+        try:
+            head = client.head_object(Bucket=settings.R2_BUCKET_NAME, Key=key)
+        except ClientError:
+            continue  # already gone
+        if head["LastModified"] < cutoff:
+            stale.append(key)
+    # Checked after the HEADs, so a row committed meanwhile still protects its object
+    if stale:
+        used = set(db.exec(select(MediaFile.storage_key).where(MediaFile.storage_key.in_(stale))).all())
+        stale = [key for key in stale if key not in used]
+    delete_uploaded_objects(stale)
+    return stale
+
+
+@job_handler("media.sweep_objects")
+def _sweep_objects_job(session: Session, payload: dict[str, Any]) -> None:
+    # Multipart uploads that were never completed keep their parts until aborted
+    for upload in payload.get("uploads", []):
+        try:
+            client.abort_multipart_upload(Bucket=settings.R2_BUCKET_NAME, Key=upload["key"], UploadId=upload["upload_id"])
+        except ClientError:
+            pass  # completed or already aborted
+    sweep_unreferenced_objects(session, payload["keys"])
+
+
+def queue_object_sweep(db: Session, keys: Sequence[str]) -> None:
+    """
+    Schedule `sweep_unreferenced_objects` for objects a failed request stored,
+    once the grace period has passed. Commits on its own, so call it after
+    the failed transaction has been rolled back.
+    """
+    if not keys:
+        return
+    try:
+        run_at = datetime.now(timezone.utc) + timedelta(seconds=settings.UPLOAD_ORPHAN_GRACE_SECONDS)
+        enqueue(db, "media.sweep_objects", {"keys": list(keys)}, run_at=run_at)
+        db.commit()
+    except Exception:
+        db.rollback()
+        logger.exception("Could not schedule a sweep of %s uploaded objects", len(keys))
+
+
+def _form_uuid(name: str, value: bytes) -> UUID | None:
+    if not value.strip():
+        return None
+    try:
+        return UUID(value.decode().strip())
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name}")
+
+
+def _move_object(source: str, key: str, content_type: str) -> None:
+    try:
+        # Staged objects are at least one part, so this is a multipart copy,
+        # which does not carry the source's metadata over
+        client.copy({"Bucket": settings.R2_BUCKET_NAME, "Key": source}, settings.R2_BUCKET_NAME, key,
+                    ExtraArgs={"ContentType": content_type, **UPLOAD_EXTRA_ARGS}, Config=transfer_config())
+    finally:
+        delete_uploaded_objects([source])
+
+
+async def _store_streamed(session: AsyncSession, writer: S3MultipartWriter) -> UploadedObject:
+    """
+    Finish a streamed upload under its content-addressed key. Content that
+    is already stored is dropped instead: a small file is never sent and a
+    multipart upload is aborted before R2 assembles it.
+    """
+    sha256 = writer.sha256
+    stored = (await session.exec(
+        select(MediaFile.storage_key)
+        .where(MediaFile.content_hash == sha256, MediaFile.storage_key.is_not(None))
+        .limit(1)
+    )).first()
+    if stored:
+        await writer.abort()
+        return UploadedObject(stored, writer.size, writer.content_type, 0, sha256)
+
+    key = content_key(sha256)
+    if not writer.started:
+        writer.key = key
+        return await writer.complete()
+    uploaded = await writer.complete()
+    await asyncio.get_running_loop().run_in_executor(_upload_executor, partial(_move_object, uploaded.key, key, uploaded.content_type))
+    return uploaded._replace(key=key)
+
+
+# Text fields accepted next to `file`, and Starlette's cap on a non-file part
+FORM_FIELDS = ("unit_id", "project_id", "user_id")
+MAX_FORM_FIELD_SIZE = 1024 * 1024
+
+
+async def stream_media_file(
+    session: AsyncSession,
+    added_by: UUID,
+    body: AsyncIterator[bytes],
+    content_type: str,
+) -> MediaFile:
+    """
+    Create a media file from a multipart/form-data request body (`file`,
+    optional `unit_id`, `project_id`, `user_id`) without spooling it: the
+    file part is streamed into an R2 multipart upload as it arrives and its
+    size, content type and SHA-256 are recorded on the way through.
+    """
+    fields: dict[str, bytearray] = {}
+    ids: dict[str, UUID | None] = {}
+    writer: S3MultipartWriter | None = None
+    current: str | None = None
+    file_name: str | None = None
+    try:
+        async for kind, value in iter_form_data(body, content_type):
+            if kind == "part":
+                current = value.name
+                if value.filename is None:
+                    if current not in FORM_FIELDS or current in fields:
+                        raise HTTPException(status_code=400, detail=f"Unexpected form field '{current}'")
+                    fields[current] = bytearray()
+                    continue
+                if value.name != "file" or file_name is not None:
+                    raise HTTPException(status_code=400, detail="Only one file part named 'file' is accepted")
+                file_type = value.content_type
+                if not file_type or file_type == "application/octet-stream":
+                    file_type = mimetypes.guess_type(value.filename)[0] or "application/octet-stream"
+                file_name = value.filename or generate_random_file_name("")
+                # The hash is only known at the end, so large files go to a staging key first
+                writer = S3MultipartWriter(
+                    client, settings.R2_BUCKET_NAME, f"uploads/{uuid4().hex}", file_type,
+                    part_size=_part_size(), concurrency=settings.UPLOAD_CONCURRENCY,
+                    executor=_upload_executor, extra_args=UPLOAD_EXTRA_ARGS,
+                )
+            elif kind == "data":
+                if current == "file":
+                    await writer.write(value)
+                elif current is not None:
+                    fields[current] += value
+                    if len(fields[current]) > MAX_FORM_FIELD_SIZE:
+                        raise HTTPException(status_code=413, detail=f"Form field '{current}' is too large")
+            elif current in ("unit_id", "project_id"):
+                # Rejected as soon as the field ends, while the file can still be abandoned
+                ids[current] = _form_uuid(current, bytes(fields[current]))
+        if writer is None:
+            raise HTTPException(status_code=400, detail="No file provided")
+        await session.run_sync(_check_media_owners, ids.get("unit_id"), ids.get("project_id"))
+        # Only now is the object completed in R2, so a rejected request leaves nothing behind
+        uploaded = await _store_streamed(session, writer)
+    except BaseException:
+        if writer is not None:
+            await writer.abort()
+        raise
+
+    media_file = MediaFile(
+        file_size=uploaded.size,
+        file_type=uploaded.content_type,
+        file_name=file_name,
+        content_hash=uploaded.sha256,
+        storage_key=uploaded.key,
+        uploaded_by=added_by,
+        unit_id=ids.get("unit_id"),
+        project_id=ids.get("project_id"),
+        file_path=f"{settings.R2_PUBLIC_URL}/{uploaded.key}",
+        deleted=False
+    )
+    session.add(media_file)
+    try:
+        await session.commit()
+    except Exception:
+        await session.rollback()
+        await session.run_sync(queue_object_sweep, [uploaded.key])
+        raise
+    await session.refresh(media_file)
+    return media_file
+
+
+def _check_media_owners(db: Session, unit_id: UUID | None, project_id: UUID | None) -> None:
+    if unit_id and db.exec(select(Unit.id).where(Unit.id == unit_id)).first() is None:
+        raise HTTPException(status_code=404, detail="Unit not found")
+    if project_id and db.exec(select(Project.id).where(Project.id == project_id)).first() is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+def _upload_token(claims: dict[str, Any], expires_in: int) -> str:
+    # Outlives the URLs so a part started just before they expire can still be completed
+    expire = datetime.now(timezone.utc) + timedelta(seconds=2 * expires_in)
+    return jwt.encode({**claims, "typ": "upload", "exp": expire}, settings.SECRET_KEY, algorithm=ALGORITHM)
+
+
+def _read_upload_token(token: str, added_by: UUID) -> dict[str, Any]:
+    try:
+        claims = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise HTTPException(status_code=400, detail="Invalid or expired upload token")
+    if claims.get("typ") != "upload":
+        raise HTTPException(status_code=400, detail="Invalid or expired upload token")
+    if claims.get("sub") != str(added_by):
+        raise HTTPException(status_code=403, detail="This upload belongs to another user")
+    return claims
+
+
+def _queue_abandoned_upload_sweep(db: Session, key: str, upload_id: str | None, expires_in: int) -> None:
+    # Runs once the upload token has expired (see _upload_token) and the grace period has passed
+    run_at = datetime.now(timezone.utc) + timedelta(seconds=2 * expires_in + settings.UPLOAD_ORPHAN_GRACE_SECONDS)
+    payload: dict[str, Any] = {"keys": [key]}
+    if upload_id:
+        payload["uploads"] = [{"key": key, "upload_id": upload_id}]
+    enqueue(db, "media.sweep_objects", payload, run_at=run_at)
     db.commit()
+
+
+def presign_upload(db: Session, added_by: UUID, data: PresignUploadRequest) -> PresignUploadResponse:
+    """
+    Let the client upload straight to R2. Files up to one part get a single
+    presigned PUT URL; larger ones get a multipart upload with one URL per
+    part. No media file is recorded until /upload/complete is called with the
+    returned token; a sweep scheduled for after the token expires removes
+    the upload if that never happens.
+    """
+    _check_media_owners(db, data.unit_id, data.project_id)
+    file_name = os.path.basename(data.file_name.replace("\\", "/")) or "file"
+    content_type = data.content_type or mimetypes.guess_type(file_name)[0] or "application/octet-stream"
+    key = generate_random_file_name(file_name)
+    expires_in = settings.UPLOAD_PRESIGN_EXPIRES_SECONDS
+    # Signed into the URL, so the client has to send them unchanged
+    headers = {"Content-Type": content_type}
+    if "ACL" in UPLOAD_EXTRA_ARGS:
+        headers["x-amz-acl"] = UPLOAD_EXTRA_ARGS["ACL"]
+    claims = {
+        "sub": str(added_by),
+        "key": key,
+        "file_name": file_name,
+        "size": data.file_size,
+        "content_type": content_type,
+        "unit_id": str(data.unit_id) if data.unit_id else None,
+        "project_id": str(data.project_id) if data.project_id else None,
+        "upload_id": None,
+    }
+
+    part_size = max(_part_size(), math.ceil(data.file_size / MAX_UPLOAD_PARTS))
+    if data.file_size <= part_size:
+        url = client.generate_presigned_url(
+            "put_object",
+            Params={"Bucket": settings.R2_BUCKET_NAME, "Key": key, "ContentType": content_type, **UPLOAD_EXTRA_ARGS},
+            ExpiresIn=expires_in,
+        )
+        _queue_abandoned_upload_sweep(db, key, None, expires_in)
+        return PresignUploadResponse(
+            upload_token=_upload_token(claims, expires_in), key=key, method="put",
+            url=url, headers=headers, expires_in=expires_in,
+        )
+
+    created = client.create_multipart_upload(
+        Bucket=settings.R2_BUCKET_NAME, Key=key, ContentType=content_type, **UPLOAD_EXTRA_ARGS,
+    )
+    claims["upload_id"] = created["UploadId"]
+    _queue_abandoned_upload_sweep(db, key, created["UploadId"], expires_in)
+    parts = [
+        PresignedPart(part_number=number, url=client.generate_presigned_url(
+            "upload_part",
+            Params={"Bucket": settings.R2_BUCKET_NAME, "Key": key, "UploadId": created["UploadId"], "PartNumber": number},
+            ExpiresIn=expires_in,
+        ))
+        for number in range(1, math.ceil(data.file_size / part_size) + 1)
+    ]
+    return PresignUploadResponse(
+        upload_token=_upload_token(claims, expires_in), key=key, method="multipart",
+        part_size=part_size, parts=parts, expires_in=expires_in,
+    )
+
+
+def complete_presigned_upload(db: Session, added_by: UUID, data: CompleteUploadRequest) -> MediaFile:
+    """
+    Record a file uploaded with presign_upload. Multipart uploads are
+    assembled from the part ETags first; the object is then checked with a
+    HEAD request and removed if its size differs from the one presigned.
+    Completing the same upload again returns the existing record. The
+    bytes never pass through the API, so these objects are not hashed or
+    deduplicated.
+    """
+    claims = _read_upload_token(data.upload_token, added_by)
+    key = claims["key"]
+    existing = db.exec(select(MediaFile).where(MediaFile.storage_key == key)).first()
+    if existing:
+        return existing
+
+    if claims["upload_id"]:
+        if not data.parts:
+            raise HTTPException(status_code=400, detail="Part ETags are required to complete a multipart upload")
+        try:
+            client.complete_multipart_upload(
+                Bucket=settings.R2_BUCKET_NAME, Key=key, UploadId=claims["upload_id"],
+                MultipartUpload={"Parts": [
+                    {"ETag": part.etag, "PartNumber": part.part_number}
+                    for part in sorted(data.parts, key=lambda p: p.part_number)
+                ]},
+            )
+        except ClientError as e:
+            # Completing twice reports NoSuchUpload; the HEAD below decides whether the object exists
+            if e.response.get("Error", {}).get("Code") != "NoSuchUpload":
+                logger.warning("Could not complete multipart upload of %s: %s", key, e)
+                raise HTTPException(status_code=400, detail="Could not complete the upload; check the part ETags")
+
+    try:
+        head = client.head_object(Bucket=settings.R2_BUCKET_NAME, Key=key)
+    except ClientError:
+        raise HTTPException(status_code=400, detail="The file has not been uploaded")
+    unit_id = UUID(claims["unit_id"]) if claims["unit_id"] else None
+    project_id = UUID(claims["project_id"]) if claims["project_id"] else None
+    _check_media_owners(db, unit_id, project_id)
+    if head["ContentLength"] != claims["size"]:
+        delete_uploaded_objects([key])
+        raise HTTPException(status_code=400, detail="Uploaded file size does not match the presigned size")
+
+    media_file = MediaFile(
+        file_size=head["ContentLength"],
+        file_type=head.get("ContentType") or claims["content_type"],
+        file_name=claims["file_name"],
+        storage_key=key,
+        uploaded_by=added_by,
+        unit_id=unit_id,
+        project_id=project_id,
+        file_path=f"{settings.R2_PUBLIC_URL}/{key}",
+        deleted=False
+    )
+    db.add(media_file)
+    try:
+        db.commit()
+    except Exception:
+        db.rollback()
+        queue_object_sweep(db, [key])
+        raise
     db.refresh(media_file)
     return media_file
 
 def create_media_files(db: Session, added_by: UUID, media_files: Sequence[UploadFile], unit_id: UUID | None, project_id: UUID | None, user_id: UUID | None) -> Sequence[MediaFile]:
     """
     Create multiple media file records in the database.
+
+    Files are hashed first and only content that is not stored yet is
+    uploaded, once per distinct hash, concurrently with at most
+    UPLOAD_CONCURRENCY at a time. The rows are inserted together in one
+    commit. It is all or nothing: if any upload or the insert fails, no row
+    is saved, objects this request uploaded are left to a delayed sweep (other
+    requests may be about to use them) and a 502 reports each file's status:
+    `failed`, `rolled_back` (uploaded or already stored, but not saved) or
+    `cancelled` (not started).
     """
-    created_files = []
-    for media_file in media_files:
-        created_file = create_media_file(db, added_by, media_file, unit_id, project_id, user_id)
-        created_files.append(created_file)
-    return created_files
+    hashed = [_file_sha256(media_file.file) for media_file in media_files]
+    stored = _stored_keys(db, [sha256 for sha256, _ in hashed])
+    new_hashes = {sha256 for sha256, _ in hashed if sha256 not in stored}
+
+    slots = threading.BoundedSemaphore(settings.UPLOAD_CONCURRENCY)
+    futures: dict[str, Future] = {}
+    for media_file, (sha256, _) in zip(media_files, hashed):
+        if sha256 not in new_hashes or sha256 in futures:
+            continue
+        slots.acquire()
+        if any(f.done() and f.exception() for f in futures.values()):
+            slots.release()
+            break
+        future = _upload_executor.submit(_upload_object, media_file.file, content_key(sha256), _upload_type(media_file))
+        future.add_done_callback(lambda _: slots.release())
+        futures[sha256] = future
+    wait(futures.values())
+
+    uploaded_keys = [content_key(sha256) for sha256, f in futures.items() if not f.exception()]
+    failed = len(uploaded_keys) < len(new_hashes)
+    rows = [
+        _new_media_file(added_by, media_file, sha256, size, stored.get(sha256) or content_key(sha256), unit_id, project_id)
+        for media_file, (sha256, size) in zip(media_files, hashed)
+    ]
+    if not failed:
+        try:
+            db.add_all(rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("Could not save %s uploaded media files", len(rows))
+            failed = True
+    if failed:
+        queue_object_sweep(db, uploaded_keys)
+        files = []
+        for media_file, (sha256, _) in zip(media_files, hashed):
+            future = futures.get(sha256)
+            if sha256 in new_hashes and future is None:
+                files.append({"file_name": media_file.filename, "status": "cancelled"})
+            elif future is not None and future.exception():
+                files.append({"file_name": media_file.filename, "status": "failed", "error": str(future.exception())})
+            else:
+                files.append({"file_name": media_file.filename, "status": "rolled_back"})
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail={"message": "Upload failed; no files were saved", "files": files},
+        )
+
+    ids = [m.id for m in rows]
+    by_id = {m.id: m for m in db.exec(select(MediaFile).where(MediaFile.id.in_(ids))).unique().all()}
+    return [by_id[i] for i in ids]
 
 def get_all_media_files(session: Session) -> Sequence[MediaFile]:
     """
@@ -86,27 +568,80 @@ def get_media_file(session: Session, media_file_id: UUID) -> MediaFile | None:
     return session.get(MediaFile, media_file_id)
 
 
-def download_media_file(session: Session, media_file_id: UUID) -> StreamingResponse:
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def _content_disposition(file_name: str) -> str:
+    # Headers must be Latin-1; `filename` gets a safe ASCII fallback and the
+    # real name only travels percent-encoded in `filename*` (RFC 6266)
+    fallback = "".join(c if " " <= c <= "~" and c not in '"\\' else "_" for c in file_name) or "download"
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(file_name, safe='')}"
+
+
+def download_media_file(session: Session, media_file_id: UUID, mode: DownloadMode | None = None, range_header: str | None = None) -> Response:
+    """
+    Serve a media file without tying up a worker where possible: by default
+    redirect (302) to a short-lived presigned GET, or to the public URL in
+    `public` mode. `proxy` streams the object through the API and honours a
+    single HTTP Range (206 / 416).
+    """
     media_file = get_media_file(session, media_file_id)
     if not media_file:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
-    try:
-        response = client.get_object(
-            Bucket=settings.R2_BUCKET_NAME,
-            Key=media_file.file_name,
-            ResponseContentType=media_file.file_type
-        )
-        def file_iterator() -> Any:
-            while True:
-                chunk = response['Body'].read(8192)
-                if not chunk:
-                    break
-                yield chunk
-
-        return StreamingResponse(
-            file_iterator(),
-            media_type=media_file.file_type,
-            headers={"Content-Disposition": f'attachment; filename="{media_file.file_name}"'}
+    mode = mode or settings.DOWNLOAD_MODE
+
+    if mode == "public" and settings.R2_PUBLIC_URL:
+        return RedirectResponse(f"{settings.R2_PUBLIC_URL}/{quote(object_key(media_file))}", status_code=status.HTTP_302_FOUND)
+    if mode != "proxy":
+        url = client.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": settings.R2_BUCKET_NAME,
+                "Key": object_key(media_file),
+                "ResponseContentType": media_file.file_type,
+                "ResponseContentDisposition": _content_disposition(media_file.file_name),
+            },
+            ExpiresIn=settings.DOWNLOAD_URL_EXPIRES_SECONDS,
         )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail="Error downloading file")
\ No newline at end of file
+        # The URL expires, so the redirect itself must not be cached
+        return RedirectResponse(url, status_code=status.HTTP_302_FOUND, headers={"Cache-Control": "no-store"})
+
+    params: dict[str, Any] = {"Bucket": settings.R2_BUCKET_NAME, "Key": object_key(media_file)}
+    if range_header:
+        params["Range"] = range_header
+    try:
+        response = client.get_object(**params)
+    except ClientError as e:
+        code = e.response.get("Error", {}).get("Code")
+        if code == "InvalidRange":
+            raise HTTPException(status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE, detail="Requested range not satisfiable")
+        if code in ("NoSuchKey", "404"):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+        raise HTTPException(status_code=500, detail="Error downloading file")
+    except Exception:
+        raise HTTPException(status_code=500, detail="Error downloading file")
+
+    body = response["Body"]
+
+    def file_iterator() -> Any:
+        try:
+            yield from body.iter_chunks(DOWNLOAD_CHUNK_SIZE)
+        finally:
+            body.close()
+
+    headers = {
+        "Content-Disposition": _content_disposition(media_file.file_name),
+        "Accept-Ranges": "bytes",
+        "Content-Length": str(response["ContentLength"]),
+    }
+    if response.get("ETag"):
+        headers["ETag"] = response["ETag"]
+    if response.get("ContentRange"):
+        headers["Content-Range"] = response["ContentRange"]
+    return StreamingResponse(
+        file_iterator(),
+        # R2 ignores a Range it cannot parse and returns the whole object
+        status_code=status.HTTP_206_PARTIAL_CONTENT if response.get("ContentRange") else status.HTTP_200_OK,
+        media_type=media_file.file_type,
+        headers=headers,
+    )
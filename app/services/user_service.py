@@ -1,16 +1,24 @@
 from datetime import datetime, timezone
 from fastapi import HTTPException
-from pydantic import EmailStr
-from sqlmodel import Session, select, or_, desc
+from pydantic import BaseModel, EmailStr
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+from sqlmodel import Session, select, or_
 from app.models.user import User, Role
-from app.core.security import hash_password, verify_password
+from app.core.config import settings
+from app.core.security import hash_password, verify_and_update_password
 import random
 from typing import Any, Union
 from app.schemas.paging import Paging
-from app.schemas.user import UserCreate, RegisterRequest, UserUpdate
-from app.services.email_service import send_password_reset_email, send_verification_email
+from app.schemas.user import UserCreate, RegisterRequest, UserRead, UserUpdate
+from app.services.email_service import queue_password_reset_email, queue_verification_email
+from app.utility.cache import TTLCache
+from app.utility.loaders import loader_options
 from app.utility.paging import paginate
 
+# Column values of recently authenticated users, keyed by str(user id)
+_user_cache = TTLCache(ttl=settings.USER_CACHE_TTL_SECONDS)
+
 
 def create_user(session: Session, data: Union[UserCreate, RegisterRequest]) -> User:
     # Ensure fullname, email, phone are present (for RegisterRequest, may not be)
@@ -44,23 +52,32 @@ def create_user(session: Session, data: Union[UserCreate, RegisterRequest]) -> U
         company_id= getattr(data, "company_id", None)
     )
     session.add(user)
+    queue_verification_email(session, user.email, code)
     session.commit()
     session.refresh(user)
-    send_verification_email(user.email, code)
     return user
 
 def authenticate_user(session: Session, email: str, password: str)  -> User | None:
     user = session.exec(select(User).where(User.email == email.lower())).first()
-    if not user or not verify_password(password, user.hashed_password):
+    if not user:
+        return None
+    verified, new_hash = verify_and_update_password(password, user.hashed_password)
+    if not verified:
         return None
+    if new_hash:
+        # Stored with a different bcrypt cost than BCRYPT_ROUNDS; upgrade it now we have the password
+        user.hashed_password = new_hash
+        session.add(user)
+        session.commit()
+        invalidate_cached_user(user.id)
     if not user.is_verified:
         raise HTTPException(status_code=403, detail="Email not verified.")
     return user
 
 # Retrieve all users
 def get_all_users(session: Session, paging: Paging, filter: dict[str, Any] | None = None,
-    q: str | None = None) -> dict[str, Union[list[User], int]]:
-    query = select(User)
+    q: str | None = None) -> dict[str, Union[list[User], int, str, None]]:
+    query = select(User).options(*loader_options(UserRead))
 
     # role / exact-field filters (e.g., {"role": Role.ADMIN})
     if filter:
@@ -77,20 +94,35 @@ def get_all_users(session: Session, paging: Paging, filter: dict[str, Any] | Non
             )
         )
 
-    # newest first when created_at exists
-    try:
-        query = query.order_by(desc(User.created_at))
-    except Exception:
-        # if model lacks created_at, just skip ordering
-        pass
-
-    users, total = paginate(session, query, paging)
+    # newest first
+    page = paginate(session, query, paging, keyset=(User.created_at, User.id))
 
-    return {"data": users, "total": total}
+    return page._asdict()
 
 # Retrieve user by ID
-def get_user_by_id(session: Session, user_id: str)  -> User | None:
-    return session.get(User, user_id)
+def get_user_by_id(session: Session, user_id: str, schema: type[BaseModel] | None = None)  -> User | None:
+    return session.get(User, user_id, options=loader_options(schema) if schema else None)
+
+def get_cached_user(session: Session, user_id: str) -> User | None:
+    """
+    Look up a user for authentication. Repeat lookups within
+    USER_CACHE_TTL_SECONDS are merged into `session` from the in-process cache
+    without a SELECT; writes to the user call `invalidate_cached_user`.
+    """
+    key = str(user_id)
+    values = _user_cache.get(key)
+    if values is None:
+        user = get_user_by_id(session, user_id)
+        if user is not None:
+            _user_cache.set(key, {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs})
+        return user
+
+    cached = User(**values)
+    make_transient_to_detached(cached)
+    return session.merge(cached, load=False)
+
+def invalidate_cached_user(user_id: Any) -> None:
+    _user_cache.pop(str(user_id))
 
 # Update user details
 def update_user(session: Session, user_id: str, data: UserUpdate) -> User | None:
@@ -104,6 +136,7 @@ def update_user(session: Session, user_id: str, data: UserUpdate) -> User | None
             setattr(user, field, value)
     session.add(user)
     session.commit()
+    invalidate_cached_user(user.id)
     session.refresh(user)
     return user
 
@@ -116,6 +149,7 @@ def soft_delete_user(session: Session, user_id: str, reason: str) -> User | None
         user.deleted_at = datetime.now(timezone.utc)
         session.add(user)
         session.commit()
+        invalidate_cached_user(user.id)
     return user
 
 def forgot_password(session: Session, email: EmailStr) -> User | None:
@@ -127,8 +161,9 @@ def forgot_password(session: Session, email: EmailStr) -> User | None:
     code = str(random.randint(100000, 999999))
     user.verification_code = code
     session.add(user)
+    queue_password_reset_email(session, user.email, code)
     session.commit()
-    send_password_reset_email(user.email, code)
+    invalidate_cached_user(user.id)
     return user
 
 def reset_password(session: Session, email: EmailStr, code: str, new_password: str) -> User | None:
@@ -143,6 +178,7 @@ def reset_password(session: Session, email: EmailStr, code: str, new_password: s
     user.verification_code = None  # Clear the code after successful reset
     session.add(user)
     session.commit()
+    invalidate_cached_user(user.id)
     session.refresh(user)
     return user
 
@@ -0,0 +1,18 @@
+from typing import Any, Callable, TypeVar
+from pydantic import BaseModel
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+SchemaT = TypeVar("SchemaT", bound=BaseModel)
+
+
+async def run_read(session: AsyncSession, schema: type[SchemaT], read: Callable[..., Any], *args: Any) -> SchemaT:
+    """
+    Run a synchronous read service on an AsyncSession and serialize the result
+    into `schema` before leaving the worker greenlet, so any relationship the
+    eager-loading options missed still loads instead of raising MissingGreenlet.
+    """
+    def _read(sync_session: Session) -> SchemaT:
+        return schema.model_validate(read(sync_session, *args), from_attributes=True)
+
+    return await session.run_sync(_read)
@@ -0,0 +1,80 @@
+from typing import Callable
+from pydantic import BaseModel
+from sqlmodel import select, func
+from sqlalchemy.orm import joinedload, selectinload, with_expression
+from sqlalchemy.orm.interfaces import LoaderOption
+from app.models.payment import Payment, PaymentStatus
+from app.models.project import Project
+from app.models.unit import Unit
+from app.models.unit_agent_link import UnitAgentLink
+from app.models.user import User
+from app.schemas.project import ProjectRead, ProjectSingle
+from app.schemas.unit import SingleUnit, UnitRead
+from app.schemas.user import SingleUser, UserRead
+
+
+def with_payment_totals() -> LoaderOption:
+    """
+    Loader option that computes each unit's paid total in the loading query,
+    so `Unit.total_paid` and `Unit.payment_summary` do not load `unit.payments`.
+    """
+    paid_total = (
+        select(func.coalesce(func.sum(Payment.amount), 0))
+        .where(Payment.unit_id == Unit.id, Payment.status == PaymentStatus.PAID)
+        .correlate(Unit)
+        .scalar_subquery()
+    )
+    return with_expression(Unit.paid_total, paid_total)
+
+
+def _unit_read() -> list[LoaderOption]:
+    # client, images (media_files) and total_paid / payment_summary
+    return [
+        joinedload(Unit.client),
+        selectinload(Unit.media_files),
+        with_payment_totals(),
+    ]
+
+
+def _single_unit() -> list[LoaderOption]:
+    return _unit_read() + [
+        selectinload(Unit.unit_agents).joinedload(UnitAgentLink.agent),
+    ]
+
+
+def _project_read() -> list[LoaderOption]:
+    # status, total_revenue and sold_units walk every unit's total_paid
+    return [selectinload(Project.units).options(with_payment_totals())]
+
+
+def _project_single() -> list[LoaderOption]:
+    return [selectinload(Project.units).options(*_unit_read())]
+
+
+def _user_read() -> list[LoaderOption]:
+    return [joinedload(User.company)]
+
+
+def _single_user() -> list[LoaderOption]:
+    return _user_read() + [selectinload(User.units)]
+
+
+LOADER_OPTIONS: dict[type[BaseModel], Callable[[], list[LoaderOption]]] = {
+    UnitRead: _unit_read,
+    SingleUnit: _single_unit,
+    ProjectRead: _project_read,
+    ProjectSingle: _project_single,
+    UserRead: _user_read,
+    SingleUser: _single_user,
+}
+
+
+def loader_options(schema: type[BaseModel]) -> list[LoaderOption]:
+    """
+    Return the eager-loading options needed to serialize a model into `schema`
+    without lazy loads, so a page of N rows costs a constant number of queries.
+    """
+    for cls in schema.__mro__:
+        if cls in LOADER_OPTIONS:
+            return LOADER_OPTIONS[cls]()
+    return []
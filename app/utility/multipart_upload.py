@@ -0,0 +1,206 @@
+import asyncio
+import hashlib
+from concurrent.futures import Executor
+from functools import partial
+from typing import Any, AsyncIterator, Callable, NamedTuple
+from fastapi import HTTPException
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+
+class UploadedObject(NamedTuple):
+    key: str
+    size: int
+    content_type: str
+    parts: int  # 0 when the object was small enough for a single PUT
+    sha256: str
+
+
+class S3MultipartWriter:
+    """
+    Write a stream to S3/R2 while it is being received.
+
+    Bytes are buffered up to `part_size`; each full part is uploaded from
+    `executor` straight away, at most `concurrency` at a time, so the event
+    loop never waits on boto3 and memory stays bounded by roughly
+    part_size * (concurrency + 1). An object smaller than one part is sent
+    with a single PUT instead of a multipart upload. The content is hashed
+    on the way through, so `sha256` is known before `complete()`.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        bucket: str,
+        key: str,
+        content_type: str,
+        part_size: int,
+        concurrency: int,
+        executor: Executor,
+        extra_args: dict[str, Any] | None = None,
+    ):
+        self.client = client
+        self.bucket = bucket
+        self.key = key
+        self.content_type = content_type
+        self.part_size = part_size
+        self.executor = executor
+        self.extra_args = extra_args or {}
+        self.size = 0
+        self._buffer = bytearray()
+        self._slots = asyncio.Semaphore(concurrency)
+        self._upload_id: str | None = None
+        self._parts: list[asyncio.Future] = []
+        self._sha256 = hashlib.sha256()
+        self._completed = False
+
+    @property
+    def sha256(self) -> str:
+        return self._sha256.hexdigest()
+
+    @property
+    def started(self) -> bool:
+        """Whether bytes have been sent; until then `key` can still be changed."""
+        return self._upload_id is not None
+
+    async def _run(self, call: Callable[..., Any], **kwargs: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self.executor, partial(call, **kwargs))
+
+    async def write(self, data: bytes) -> None:
+        self.size += len(data)
+        self._sha256.update(data)
+        self._buffer += data
+        while len(self._buffer) >= self.part_size:
+            part = bytes(self._buffer[:self.part_size])
+            del self._buffer[:self.part_size]
+            await self._send_part(part)
+
+    async def _send_part(self, part: bytes) -> None:
+        if self._upload_id is None:
+            created = await self._run(
+                self.client.create_multipart_upload,
+                Bucket=self.bucket, Key=self.key, ContentType=self.content_type, **self.extra_args,
+            )
+            self._upload_id = created["UploadId"]
+        # Back-pressure: wait for a free slot, and stop early if a part already failed
+        await self._slots.acquire()
+        for number, sent in enumerate(self._parts, start=1):
+            if not sent.done():
+                continue
+            if sent.cancelled():
+                self._slots.release()
+                raise RuntimeError(f"Upload of part {number} was cancelled")
+            if (exc := sent.exception()) is not None:
+                self._slots.release()
+                raise exc
+        number = len(self._parts) + 1
+        sent = asyncio.ensure_future(self._run(
+            self.client.upload_part,
+            Bucket=self.bucket, Key=self.key, UploadId=self._upload_id, PartNumber=number, Body=part,
+        ))
+        sent.add_done_callback(lambda _: self._slots.release())
+        self._parts.append(sent)
+
+    async def complete(self) -> UploadedObject:
+        if self._upload_id is None:
+            await self._run(
+                self.client.put_object,
+                Bucket=self.bucket, Key=self.key, Body=bytes(self._buffer), ContentType=self.content_type, **self.extra_args,
+            )
+            self._completed = True
+            return UploadedObject(self.key, self.size, self.content_type, 0, self.sha256)
+
+        if self._buffer:
+            await self._send_part(bytes(self._buffer))
+            self._buffer.clear()
+        responses = await asyncio.gather(*self._parts)
+        await self._run(
+            self.client.complete_multipart_upload,
+            Bucket=self.bucket, Key=self.key, UploadId=self._upload_id,
+            MultipartUpload={"Parts": [{"ETag": r["ETag"], "PartNumber": n} for n, r in enumerate(responses, start=1)]},
+        )
+        self._completed = True
+        return UploadedObject(self.key, self.size, self.content_type, len(responses), self.sha256)
+
+    async def abort(self) -> None:
+        """Drop the parts uploaded so far; safe to call after any failure."""
+        if self._completed:
+            return
+        await asyncio.gather(*self._parts, return_exceptions=True)
+        if self._upload_id is not None:
+            await self._run(self.client.abort_multipart_upload, Bucket=self.bucket, Key=self.key, UploadId=self._upload_id)
+            self._upload_id = None
+
+
+class FormPart(NamedTuple):
+    name: str
+    filename: str | None
+    content_type: str | None
+
+
+async def iter_form_data(body: AsyncIterator[bytes], content_type: str) -> AsyncIterator[tuple[str, Any]]:
+    """
+    Parse a multipart/form-data body incrementally, without spooling it.
+
+    Yields ("part", FormPart) when a part starts, ("data", bytes) for each
+    chunk of its content and ("end", None) when it ends.
+    """
+    kind, params = parse_options_header(content_type)
+    if kind != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=415, detail="Expected a multipart/form-data body")
+
+    events: list[tuple[str, Any]] = []
+    headers: dict[bytes, bytes] = {}
+    field: list[bytes] = []
+    value: list[bytes] = []
+
+    def on_part_begin() -> None:
+        headers.clear()
+
+    def on_header_field(data: bytes, start: int, end: int) -> None:
+        field.append(data[start:end])
+
+    def on_header_value(data: bytes, start: int, end: int) -> None:
+        value.append(data[start:end])
+
+    def on_header_end() -> None:
+        headers[b"".join(field).lower()] = b"".join(value)
+        field.clear()
+        value.clear()
+
+    def on_headers_finished() -> None:
+        _, disposition = parse_options_header(headers.get(b"content-disposition", b""))
+        filename = disposition.get(b"filename")
+        part_type = headers.get(b"content-type")
+        events.append(("part", FormPart(
+            name=disposition.get(b"name", b"").decode("utf-8", "replace"),
+            filename=filename.decode("utf-8", "replace") if filename is not None else None,
+            content_type=part_type.decode("latin-1") if part_type else None,
+        )))
+
+    def on_part_data(data: bytes, start: int, end: int) -> None:
+        events.append(("data", bytes(data[start:end])))
+
+    def on_part_end() -> None:
+        events.append(("end", None))
+
+    parser = MultipartParser(params[b"boundary"], {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+    try:
+        async for chunk in body:
+            parser.write(chunk)
+            for event in events:
+                yield event
+            events.clear()
+        parser.finalize()
+    except MultipartParseError:
+        raise HTTPException(status_code=400, detail="Malformed multipart body")
+    for event in events:
+        yield event
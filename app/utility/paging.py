@@ -1,20 +1,163 @@
-from typing import Any, List, Tuple
-from sqlmodel import Session, select, func
-from app.schemas.paging import Paging
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, NamedTuple, Tuple
+from uuid import UUID
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session, select, func, desc, asc
+from app.core.config import settings
+from app.schemas.paging import CountStrategy, Paging
+from app.utility.cache import TTLCache
+
+_count_cache = TTLCache(ttl=settings.PAGING_COUNT_CACHE_TTL_SECONDS)
+
+
+class Page(NamedTuple):
+    data: List[Any]
+    total: int | None
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
+
+
+def encode_cursor(created_at: datetime, id: UUID, direction: str) -> str:
+    payload = json.dumps({"c": created_at.isoformat(), "i": str(id), "d": direction}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        direction = payload["d"]
+        if direction not in ("next", "prev"):
+            raise ValueError(direction)
+        return datetime.fromisoformat(payload["c"]), UUID(payload["i"]), direction
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+def _exact_count(session: Session, query: Any) -> int:
+    return session.exec(select(func.count()).select_from(query.subquery())).one() or 0
+
+
+def _estimated_count(session: Session, query: Any) -> int:
+    """
+    Row estimate from the PostgreSQL planner statistics, which costs a plan
+    instead of a scan. Other databases (SQLite in tests) get an exact count.
+    """
+    bind = session.get_bind()
+    if bind.dialect.name != "postgresql":
+        return _exact_count(session, query)
+    try:
+        sql = query.order_by(None).compile(dialect=bind.dialect, compile_kwargs={"literal_binds": True})
+    except (SQLAlchemyError, NotImplementedError, TypeError):
+        # a bound value that cannot be rendered inline
+        return _exact_count(session, query)
+    plan = session.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}").scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _cached_count(session: Session, query: Any) -> int:
+    compiled = query.compile(dialect=session.get_bind().dialect)
+    key = (str(compiled), repr(sorted(compiled.params.items())))
+    total = _count_cache.get(key)
+    if total is None:
+        total = _exact_count(session, query)
+        _count_cache.set(key, total)
+    return total
+
+
+def count_total(session: Session, query: Any, strategy: CountStrategy = CountStrategy.EXACT) -> int | None:
+    if strategy == CountStrategy.NONE:
+        return None
+    if strategy == CountStrategy.ESTIMATED:
+        return _estimated_count(session, query)
+    if strategy == CountStrategy.CACHED:
+        return _cached_count(session, query)
+    return _exact_count(session, query)
+
+
+def _cursor_for(item: Any, keyset: Tuple[Any, Any], direction: str) -> str:
+    created_at, id = keyset
+    return encode_cursor(getattr(item, created_at.key), getattr(item, id.key), direction)
+
 
 def paginate(
     session: Session,
     query: Any,
-    paging: Paging
-) -> Tuple[List[Any], int]:
+    paging: Paging,
+    keyset: Tuple[Any, Any] | None = None,
+) -> Page:
     """
     Paginate a SQLModel query.
 
-    Returns: (items, total)
-    - items: List of results on the requested page
-    - total: Total count for the query
+    Returns a Page of (data, total, next_cursor, prev_cursor)
+    - data: List of results on the requested page
+    - total: Total count for the query, computed per `paging.count`
+    - next_cursor / prev_cursor: opaque cursors, only when `keyset` is given
+
+    When `keyset` is given as (created_at column, id column) results are ordered
+    newest first on those columns. A `paging.cursor` from a previous page then
+    switches to keyset pagination (`WHERE (created_at, id) < cursor`), whose
+    cost does not grow with the page depth; `skip` is ignored in that mode.
+
+    `paging.count` picks how `total` is computed: `exact` (default), `none`
+    (total is None, for infinite scroll), `estimated` (planner row estimate)
+    or `cached` (exact, reused for PAGING_COUNT_CACHE_TTL_SECONDS per query).
     """
 
-    items = session.exec(query.limit(paging.limit).offset(paging.skip)).all()
-    total = session.exec(select(func.count()).select_from(query.subquery())).one() or 0
-    return items, total
\ No newline at end of file
+    total = count_total(session, query, paging.count)
+
+    if keyset is None:
+        if paging.cursor:
+            raise HTTPException(status_code=400, detail="Cursor pagination is not supported for this list")
+        items = session.exec(query.limit(paging.limit).offset(paging.skip)).all()
+        return Page(list(items), total)
+
+    created_at, id = keyset
+    key = tuple_(created_at, id)
+    query = query.order_by(None)
+
+    if not paging.cursor:
+        rows = list(session.exec(query.order_by(desc(created_at), desc(id)).limit(paging.limit + 1).offset(paging.skip)).all())
+        items, has_more = rows[:paging.limit], len(rows) > paging.limit
+        return Page(
+            items,
+            total,
+            next_cursor=_cursor_for(items[-1], keyset, "next") if has_more else None,
+            prev_cursor=_cursor_for(items[0], keyset, "prev") if items and paging.skip > 0 else None,
+        )
+
+    cursor_created_at, cursor_id, direction = decode_cursor(paging.cursor)
+    if direction == "next":
+        rows = list(session.exec(
+            query.where(key < tuple_(cursor_created_at, cursor_id))
+            .order_by(desc(created_at), desc(id))
+            .limit(paging.limit + 1)
+        ).all())
+        items, has_more = rows[:paging.limit], len(rows) > paging.limit
+        return Page(
+            items,
+            total,
+            next_cursor=_cursor_for(items[-1], keyset, "next") if has_more else None,
+            prev_cursor=_cursor_for(items[0], keyset, "prev") if items else None,
+        )
+
+    rows = list(session.exec(
+        query.where(key > tuple_(cursor_created_at, cursor_id))
+        .order_by(asc(created_at), asc(id))
+        .limit(paging.limit + 1)
+    ).all())
+    has_more = len(rows) > paging.limit
+    items = list(reversed(rows[:paging.limit]))
+    return Page(
+        items,
+        total,
+        next_cursor=_cursor_for(items[-1], keyset, "next") if items else None,
+        prev_cursor=_cursor_for(items[0], keyset, "prev") if has_more else None,
+    )
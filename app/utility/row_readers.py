@@ -0,0 +1,110 @@
+import codecs
+import csv
+import json
+from itertools import chain
+from typing import Any, BinaryIO, Iterator, NamedTuple
+
+
+class RawRow(NamedTuple):
+    number: int
+    data: dict[str, Any] | None
+    error: str | None = None
+
+
+# Longest line (in characters) held in memory; longer ones become row errors
+MAX_LINE_LENGTH = 1024 * 1024
+
+
+class _LineTooLong(Exception):
+    pass
+
+
+def _text_lines(file: BinaryIO) -> Iterator[str | None]:
+    """
+    Decode the upload incrementally and yield its lines, so only one line is
+    held at a time. A line longer than MAX_LINE_LENGTH is dropped as it
+    arrives and yielded as None.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    parts: list[str] = []
+    size = 0
+    too_long = False
+    # The trailing None flushes the decoder
+    for chunk in chain(iter(lambda: file.read(64 * 1024), b""), [None]):
+        text = decoder.decode(chunk or b"", final=chunk is None)
+        start = 0
+        # Only the newly decoded text is searched, so long lines cost O(n)
+        while (end := text.find("\n", start)) != -1:
+            piece = text[start:end + 1]
+            if too_long or size + len(piece) > MAX_LINE_LENGTH:
+                yield None
+            else:
+                parts.append(piece)
+                yield "".join(parts)
+            parts, size, too_long = [], 0, False
+            start = end + 1
+        rest = text[start:]
+        if rest and not too_long:
+            if size + len(rest) > MAX_LINE_LENGTH:
+                parts, size, too_long = [], 0, True
+            else:
+                parts.append(rest)
+                size += len(rest)
+    if too_long:
+        yield None
+    elif parts:
+        yield "".join(parts)
+
+
+def iter_csv_rows(file: BinaryIO) -> Iterator[RawRow]:
+    """
+    Yield CSV records keyed by the header row; empty cells become None. A
+    quoted cell may span lines, so after an over-long line the rest of the
+    file cannot be read reliably: it ends the file with a row error.
+    """
+    def lines() -> Iterator[str]:
+        for line in _text_lines(file):
+            if line is None:
+                raise _LineTooLong
+            yield line
+
+    reader = csv.DictReader(lines())
+    number = 0
+    try:
+        for number, record in enumerate(reader, start=1):
+            if None in record:
+                yield RawRow(number, None, "Row has more cells than the header")
+                continue
+            yield RawRow(number, {key: (value if value != "" else None) for key, value in record.items()})
+    except _LineTooLong:
+        yield RawRow(number + 1, None, f"Line is longer than {MAX_LINE_LENGTH} characters; the rest of the file was not read")
+    except csv.Error as exc:
+        yield RawRow(number + 1, None, f"Malformed CSV ({exc}); the rest of the file was not read")
+
+
+def iter_jsonl_rows(file: BinaryIO) -> Iterator[RawRow]:
+    """Yield one JSON object per non-blank line."""
+    number = 0
+    for line in _text_lines(file):
+        if line is not None and not line.strip():
+            continue
+        number += 1
+        if line is None:
+            yield RawRow(number, None, f"Line is longer than {MAX_LINE_LENGTH} characters")
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield RawRow(number, None, f"Invalid JSON: {exc.msg}")
+            continue
+        if not isinstance(record, dict):
+            yield RawRow(number, None, "Each line must be a JSON object")
+            continue
+        yield RawRow(number, record)
+
+
+ROW_READERS = {
+    "csv": iter_csv_rows,
+    "jsonl": iter_jsonl_rows,
+    "ndjson": iter_jsonl_rows,
+}
@@ -0,0 +1,87 @@
+"""
+Login throughput under concurrent load.
+
+Runs `authenticate_user` from many request threads against a temporary SQLite
+database while a bystander thread measures how long a small unrelated task
+takes, showing how much the bcrypt pool (PASSWORD_HASH_WORKERS, BCRYPT_ROUNDS)
+leaves for other requests.
+
+    PYTHONPATH=. python benchmarks/login_throughput.py --concurrency 32 --logins 200
+"""
+import argparse
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.core.config import settings
+from app.core.security import hash_password
+from app.models.user import Role, User
+from app.services.user_service import authenticate_user
+
+PASSWORD = "BenchmarkPass1"
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=32, help="request threads logging in at once")
+    parser.add_argument("--logins", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.db'}", connect_args={"check_same_thread": False})
+        SQLModel.metadata.create_all(engine)
+        hashed = hash_password(PASSWORD)
+        with Session(engine) as session:
+            session.add_all([
+                User(fullname=f"User {i}", email=f"user{i}@bench.local", phone=f"0800{i:07d}",
+                     hashed_password=hashed, role=Role.CLIENT, is_verified=True)
+                for i in range(args.users)
+            ])
+            session.commit()
+
+        def login(i: int) -> float:
+            started = time.perf_counter()
+            with Session(engine) as session:
+                assert authenticate_user(session, f"user{i % args.users}@bench.local", PASSWORD) is not None
+            return time.perf_counter() - started
+
+        done = threading.Event()
+        bystander: list[float] = []
+
+        def unrelated_work() -> None:
+            while not done.is_set():
+                started = time.perf_counter()
+                sum(range(20_000))
+                bystander.append(time.perf_counter() - started)
+                time.sleep(0.005)
+
+        watcher = threading.Thread(target=unrelated_work)
+        watcher.start()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            latencies = list(pool.map(login, range(args.logins)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        watcher.join()
+        engine.dispose()
+
+    print(f"bcrypt rounds={settings.BCRYPT_ROUNDS} hash workers={settings.PASSWORD_HASH_WORKERS} "
+          f"request threads={args.concurrency}")
+    print(f"logins: {args.logins} in {elapsed:.2f}s = {args.logins / elapsed:.1f}/s")
+    print(f"login latency ms: p50={statistics.median(latencies) * 1000:.1f} p95={_percentile(latencies, 0.95) * 1000:.1f}")
+    print(f"unrelated task ms: p50={statistics.median(bystander) * 1000:.2f} p95={_percentile(bystander, 0.95) * 1000:.2f}")
+
+
+if __name__ == "__main__":
+    main()
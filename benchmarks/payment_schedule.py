@@ -0,0 +1,77 @@
+"""
+Time `recalculate_payments` for units with 12, 120 and 600 installments.
+
+Each run replaces an existing schedule of the same size, so both the bulk
+DELETE and the multi-row INSERT are exercised. Uses a temporary SQLite
+database unless --database-url is given.
+
+    PYTHONPATH=. python benchmarks/payment_schedule.py --repeat 20
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.models.project import Project
+from app.models.unit import Unit
+from app.services.unit_service import recalculate_payments
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--installments", type=int, nargs="+", default=[12, 120, 600])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(args.database_url or f"sqlite:///{Path(tmp) / 'bench.db'}")
+        SQLModel.metadata.create_all(engine)
+        statements = 0
+
+        def count(*_args) -> None:
+            nonlocal statements
+            statements += 1
+
+        event.listen(engine, "before_cursor_execute", count)
+
+        with Session(engine) as session:
+            project = Project(name="Benchmark", address="1 Bench Road", num_units=len(args.installments))
+            session.add(project)
+            session.commit()
+
+            for installments in args.installments:
+                unit = Unit(
+                    name=f"Plan {installments}",
+                    amount=60_000_000,
+                    expected_initial_payment=6_000_000,
+                    installment=installments,
+                    payment_plan=True,
+                    purchase_date=datetime.now(timezone.utc),
+                    project_id=project.id,
+                )
+                session.add(unit)
+                session.commit()
+                recalculate_payments(session, unit)
+                session.refresh(unit)
+
+                timings = []
+                statements = 0
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    recalculate_payments(session, unit)
+                    timings.append(time.perf_counter() - started)
+                    session.refresh(unit)
+                per_run = statements / args.repeat - 1  # minus the refresh
+                print(f"{installments:>4} installments: median {statistics.median(timings) * 1000:7.2f} ms, "
+                      f"max {max(timings) * 1000:7.2f} ms, {per_run:.0f} statements per recalculation")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
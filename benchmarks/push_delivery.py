@@ -0,0 +1,104 @@
+"""
+Expo push delivery against a local stub server.
+
+Sends the same notifications twice: the way `send_push` used to (a new
+httpx.AsyncClient per notification, 100-message batches one after another)
+and over the shared keep-alive client with PUSH_CONCURRENCY batches in
+flight. The stub answers every batch with "ok" tickets after --latency-ms,
+and counts the TCP connections it accepts.
+
+The stub speaks plain HTTP/1.1, so this measures connection reuse and batch
+concurrency; HTTP/2 multiplexing only applies against the real TLS endpoint.
+
+    PYTHONPATH=. python benchmarks/push_delivery.py --notifications 50 --tokens 300
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+from app.core.config import settings
+from app.services import push_notification_service
+from app.services.push_notification_service import PushNotificationSender, create_expo_client
+
+
+class StubExpo(ThreadingHTTPServer):
+    daemon_threads = True
+    latency = 0.0
+    connections = 0
+    requests = 0
+
+
+class StubExpoHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: StubExpo
+
+    def setup(self) -> None:
+        super().setup()
+        self.server.connections += 1
+
+    def do_POST(self) -> None:
+        messages = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests += 1
+        time.sleep(self.server.latency)
+        body = json.dumps({"data": [{"status": "ok", "id": f"ticket-{i}"} for i in range(len(messages))]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_args) -> None:
+        pass
+
+
+async def per_call_client(notifications: int, tokens: list[str]) -> int:
+    sent = 0
+    for n in range(notifications):
+        messages = [PushNotificationSender.build_message(t, f"Title {n}", "Body") for t in tokens]
+        async with httpx.AsyncClient() as client:
+            for i in range(0, len(messages), 100):
+                sent += len(await PushNotificationSender.post_batch(client, messages[i:i + 100]))
+    return sent
+
+
+async def shared_client(notifications: int, tokens: list[str]) -> int:
+    sent = 0
+    async with create_expo_client() as client:
+        for n in range(notifications):
+            sent += len(await PushNotificationSender.send_push(tokens, f"Title {n}", "Body", client=client))
+    return sent
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notifications", type=int, default=50)
+    parser.add_argument("--tokens", type=int, default=300, help="device tokens per notification")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="stub response time per batch")
+    args = parser.parse_args()
+
+    server = StubExpo(("127.0.0.1", 0), StubExpoHandler)
+    server.latency = args.latency_ms / 1000
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    push_notification_service.EXPO_PUSH_URL = f"http://127.0.0.1:{server.server_address[1]}/--/api/v2/push/send"
+    tokens = [f"ExponentPushToken[{i}]" for i in range(args.tokens)]
+
+    print(f"{args.notifications} notifications x {args.tokens} tokens, stub latency {args.latency_ms:.0f}ms, "
+          f"PUSH_CONCURRENCY={settings.PUSH_CONCURRENCY}")
+    for name, run in (("new client per notification, sequential", per_call_client),
+                      ("shared client, concurrent batches", shared_client)):
+        server.connections = server.requests = 0
+        started = time.perf_counter()
+        sent = asyncio.run(run(args.notifications, tokens))
+        elapsed = time.perf_counter() - started
+        print(f"{name:>40}: {sent} messages in {elapsed:.2f}s = {sent / elapsed:,.0f}/s, "
+              f"{server.requests} requests over {server.connections} connections")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Media upload throughput and event-loop lag against moto's in-process S3.
+
+Uploads the same payload twice from inside a running event loop:
+- the old way: spool the body to a SpooledTemporaryFile (as Starlette's
+  UploadFile does) and call boto3's `upload_fileobj` on the loop thread
+- the streaming way: feed the body chunks straight into `S3MultipartWriter`,
+  which uploads parts from a thread pool
+
+A ticker coroutine records how late the loop wakes it up; a blocked loop
+shows up as a large maximum lag. moto keeps everything in memory, so the
+throughput numbers show pipeline overhead, not network speed.
+
+    PYTHONPATH=. python benchmarks/upload_throughput.py --size-mb 64 --part-size-mb 8 --concurrency 4
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+
+from app.utility.multipart_upload import S3MultipartWriter
+
+try:
+    from moto import mock_aws
+except ImportError:  # pragma: no cover
+    raise SystemExit("This benchmark needs moto: pip install moto")
+
+BUCKET = "bench-media"
+CHUNK = 64 * 1024  # what the ASGI server hands over per receive()
+
+
+async def body(size: int):
+    block = os.urandom(CHUNK)
+    sent = 0
+    while sent < size:
+        piece = block[:min(CHUNK, size - sent)]
+        sent += len(piece)
+        yield piece
+        await asyncio.sleep(0)
+
+
+async def watch_loop(lags: list[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.005)
+        lags.append(time.perf_counter() - started - 0.005)
+
+
+async def spooled_upload(client, size: int, part_size: int, concurrency: int, _executor) -> None:
+    with tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as spool:
+        async for chunk in body(size):
+            spool.write(chunk)
+        spool.seek(0)
+        client.upload_fileobj(spool, BUCKET, "spooled.bin", Config=TransferConfig(
+            multipart_threshold=part_size, multipart_chunksize=part_size, max_concurrency=concurrency,
+        ))
+
+
+async def streamed_upload(client, size: int, part_size: int, concurrency: int, executor) -> None:
+    writer = S3MultipartWriter(client, BUCKET, "streamed.bin", "application/octet-stream",
+                               part_size=part_size, concurrency=concurrency, executor=executor)
+    async for chunk in body(size):
+        await writer.write(chunk)
+    await writer.complete()
+
+
+async def measure(upload, client, args, executor) -> tuple[float, float]:
+    lags: list[float] = []
+    stop = asyncio.Event()
+    watcher = asyncio.create_task(watch_loop(lags, stop))
+    started = time.perf_counter()
+    await upload(client, args.size_mb * 1024 * 1024, args.part_size_mb * 1024 * 1024, args.concurrency, executor)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await watcher
+    return elapsed, max(lags, default=0.0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=64)
+    parser.add_argument("--part-size-mb", type=int, default=8)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "bench")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "bench")
+    with mock_aws(), ThreadPoolExecutor(max_workers=args.concurrency * 2) as executor:
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        print(f"{args.size_mb} MB, part size {args.part_size_mb} MB, concurrency {args.concurrency}")
+        for name, upload in (("spooled + upload_fileobj on the loop", spooled_upload),
+                             ("streamed multipart from executor", streamed_upload)):
+            elapsed, lag = asyncio.run(measure(upload, client, args, executor))
+            print(f"{name:>38}: {args.size_mb / elapsed:7.1f} MB/s, max loop lag {lag * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import asyncio
+import pytest
+from datetime import datetime, timezone
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.models.notification import Notification
+from app.models.project import Project
+from app.models.unit import PropertyType
+from app.models.user import Role, User
+from app.schemas.paging import Paging
+from app.schemas.unit import UnitCreate
+from app.services.notification_service import get_notifications_for_user_async
+from app.services.payment_service import get_all_payments_async, get_payments_by_unit_async
+from app.services.unit_service import create_unit, get_all_units_async
+
+
+@pytest.fixture
+def database_path(tmp_path):
+    # A file database so the sync seeding engine and the aiosqlite engine share data
+    path = tmp_path / "async.db"
+    engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        client = User(
+            fullname="Async Client",
+            email="async@example.com",
+            phone="08000000000",
+            role=Role.CLIENT,
+            hashed_password="hashed",
+            is_verified=True,
+        )
+        project = Project(name="Async Project", address="1 Loop Street", num_units=2)
+        session.add_all([client, project])
+        session.commit()
+        unit = create_unit(session, UnitCreate(
+            name="Async Unit",
+            amount=1000000,
+            expected_initial_payment=200000,
+            discount=0,
+            type=PropertyType.TERRACED,
+            purchase_date=datetime.now(timezone.utc),
+            installment=3,
+            payment_plan=True,
+            project_id=project.id,
+            client_id=client.id,
+        ))
+        session.add(Notification(user_id=client.id, title="Hello", body="World"))
+        session.commit()
+        ids = {"client_id": client.id, "unit_id": unit.id}
+    engine.dispose()
+    return path, ids
+
+
+def _run(path, read):
+    async def main():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        try:
+            async with factory() as session:
+                return await read(session)
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(main())
+
+
+def test_async_unit_and_payment_lists_are_fully_loaded(database_path):
+    path, ids = database_path
+
+    units = _run(path, lambda session: get_all_units_async(session, Paging()))
+    payments = _run(path, lambda session: get_all_payments_async(session, Paging(limit=2)))
+    unit_payments = _run(path, lambda session: get_payments_by_unit_async(session, ids["unit_id"], Paging()))
+
+    assert units.total == 1
+    assert units.data[0].client.id == ids["client_id"]
+    assert payments.total == 4
+    assert len(payments.data) == 2
+    assert payments.next_cursor is not None
+    assert all(p.unit.name == "Async Unit" for p in payments.data)
+    assert unit_payments.total == 4
+
+
+def test_async_notification_list(database_path):
+    path, ids = database_path
+
+    notifications = _run(path, lambda session: get_notifications_for_user_async(session, ids["client_id"], Paging()))
+
+    assert notifications.total == 1
+    assert notifications.data[0].title == "Hello"
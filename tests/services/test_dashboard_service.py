@@ -1,14 +1,22 @@
 import pytest
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from decimal import Decimal
 
+from sqlalchemy import event
 from sqlmodel import Session, SQLModel, create_engine
 
+from app.models.document import MediaFile
 from app.models.payment import Payment, PaymentStatus
 from app.models.project import Project
 from app.models.unit import Unit, PropertyType
 from app.models.user import User, Role
-from app.services.dashboard import get_admin_dashboard
+from app.schemas.payment import PaymentCreate, PaymentUpdate
+from app.schemas.unit import UnitCreate
+from app.services.dashboard import get_admin_dashboard, live_dashboard_totals
+from app.services.dashboard_snapshot_service import rebuild_dashboard_snapshot
+from app.services.payment_service import create_payment, soft_delete_payment, update_payment
+from app.services.unit_service import create_unit, soft_delete_unit
 
 
 def _register_sqlite_date_trunc(engine):
@@ -29,6 +37,21 @@ def _register_sqlite_date_trunc(engine):
     conn.close()
 
 
+@contextmanager
+def _count_queries(session: Session):
+    statements: list[str] = []
+
+    def before_cursor_execute(_conn, _cursor, statement, _params, _context, _executemany):
+        statements.append(statement)
+
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
 @pytest.fixture
 def session():
     engine = create_engine("sqlite://", connect_args={"check_same_thread": False})
@@ -107,3 +130,87 @@ def test_get_admin_dashboard_returns_expected_counts_and_sums(session: Session):
     assert any(item.amount == pytest.approx(100000.0) for item in summary.monthly_revenue)
     assert len(summary.recent_payments) == 1
     assert summary.recent_payments[0].id == paid.id
+
+
+def test_get_admin_dashboard_query_count_is_bounded(session: Session):
+    client, project, _ = _seed_basics(session)
+    now = datetime.now(timezone.utc)
+
+    for i in range(10):
+        unit = Unit(
+            name=f"Unit {i}",
+            amount=Decimal("500000.00"),
+            expected_initial_payment=Decimal("0"),
+            discount=Decimal("0"),
+            installment=1,
+            project_id=project.id,
+            client_id=client.id,
+        )
+        session.add(unit)
+        session.flush()
+        session.add(MediaFile(
+            file_type="image/png",
+            file_name=f"unit-{i}.png",
+            file_path=f"https://example.com/unit-{i}.png",
+            file_size=1,
+            unit_id=unit.id,
+        ))
+        session.add(Payment(
+            amount=Decimal("1000.00"),
+            due_date=now,
+            payment_date=now,
+            status=PaymentStatus.PAID,
+            unit_id=unit.id,
+        ))
+    session.commit()
+    rebuild_dashboard_snapshot(session)
+    session.expunge_all()
+
+    with _count_queries(session) as statements:
+        summary = get_admin_dashboard(session)
+
+    assert summary.total_units == 11
+    assert len(summary.units) == 11
+    assert all(unit.image for unit in summary.units if unit.name != "Unit A")
+    assert all(payment.title for payment in summary.recent_payments)
+    # totals, monthly revenue, units (+ project, media selectins), recent payments
+    assert len(statements) <= 6
+
+
+def test_dashboard_snapshot_tracks_service_writes(session: Session):
+    client, project, unit = _seed_basics(session)
+    rebuild_dashboard_snapshot(session)
+
+    media = MediaFile(file_type="image/png", file_name="r.png", file_path="https://example.com/r.png", file_size=1)
+    session.add(media)
+    session.commit()
+
+    created = create_unit(session, UnitCreate(
+        name="Unit B",
+        amount=1200,
+        expected_initial_payment=200,
+        installment=4,
+        payment_plan=True,
+        purchase_date=datetime.now(timezone.utc),
+        project_id=project.id,
+        client_id=client.id,
+    ))
+    paid = create_payment(session, PaymentCreate(amount=300, unit_id=unit.id, status="paid", media_id=media.id))
+    pending = create_payment(session, PaymentCreate(amount=150, unit_id=unit.id))
+    update_payment(session, pending.id, PaymentUpdate(status="paid", media_id=media.id))
+    update_payment(session, paid.id, PaymentUpdate(amount=350))
+    soft_delete_payment(session, paid.id, reason="duplicate")
+    soft_delete_unit(session, created.id, reason="cancelled")
+
+    summary = get_admin_dashboard(session)
+    live = live_dashboard_totals(session)
+
+    assert summary.total_units == live["total_units"] == 1
+    assert summary.total_payments == live["total_payments"]
+    assert summary.total_revenue == pytest.approx(float(live["total_revenue"]))
+    assert summary.total_outstanding == pytest.approx(float(live["total_outstanding"]))
+    assert summary.monthly_revenue[-1].amount == pytest.approx(150.0)
+
+    rebuilt = rebuild_dashboard_snapshot(session)
+    assert rebuilt.total_payments == summary.total_payments
+    assert float(rebuilt.total_revenue) == pytest.approx(summary.total_revenue)
@@ -0,0 +1,95 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.core.config import settings
+from app.models.job import Job, JobStatus
+from app.services import job_queue
+from app.services.job_queue import enqueue, job_handler, run_pending_jobs
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture
+def calls(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(job_queue, "JOB_HANDLERS", {})
+    calls: list[dict] = []
+
+    @job_handler("test.record")
+    def _record(_session: Session, payload: dict) -> None:
+        calls.append(payload)
+
+    @job_handler("test.flaky")
+    def _flaky(_session: Session, payload: dict) -> None:
+        calls.append(payload)
+        if len(calls) < payload["succeed_on"]:
+            raise RuntimeError("provider unavailable")
+
+    return calls
+
+
+def test_enqueued_job_runs_only_after_commit(session: Session, calls: list[dict]):
+    enqueue(session, "test.record", {"n": 1})
+    session.rollback()
+    assert run_pending_jobs(session.get_bind()) == 0
+
+    enqueue(session, "test.record", {"n": 2})
+    session.commit()
+
+    assert run_pending_jobs(session.get_bind()) == 1
+    assert calls == [{"n": 2}]
+    job = session.exec(select(Job)).one()
+    assert job.status == JobStatus.SUCCEEDED
+    assert job.attempts == 1
+
+
+def test_enqueue_rejects_unknown_job(session: Session, calls: list[dict]):
+    with pytest.raises(ValueError):
+        enqueue(session, "test.missing", {})
+
+
+def test_failed_job_is_retried_with_backoff_until_it_succeeds(
+    session: Session, calls: list[dict], monkeypatch: pytest.MonkeyPatch
+):
+    enqueue(session, "test.flaky", {"succeed_on": 3})
+    session.commit()
+
+    assert run_pending_jobs(session.get_bind()) == 1
+    job = session.exec(select(Job)).one()
+    assert job.status == JobStatus.PENDING
+    assert "provider unavailable" in job.last_error
+    assert job.run_at.replace(tzinfo=timezone.utc) > datetime.now(timezone.utc) + timedelta(seconds=1)
+
+    # Not due yet
+    assert run_pending_jobs(session.get_bind()) == 0
+
+    monkeypatch.setattr(settings, "JOB_RETRY_BASE_SECONDS", 0)
+    job.run_at = datetime.now(timezone.utc)
+    session.add(job)
+    session.commit()
+
+    assert run_pending_jobs(session.get_bind()) == 2
+    session.refresh(job)
+    assert job.status == JobStatus.SUCCEEDED
+    assert job.attempts == 3
+    assert job.last_error is None
+
+
+def test_job_fails_permanently_after_max_attempts(
+    session: Session, calls: list[dict], monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(settings, "JOB_RETRY_BASE_SECONDS", 0)
+    enqueue(session, "test.flaky", {"succeed_on": 10}, max_attempts=3)
+    session.commit()
+
+    assert run_pending_jobs(session.get_bind()) == 3
+    job = session.exec(select(Job)).one()
+    assert job.status == JobStatus.FAILED
+    assert job.attempts == 3
+    assert len(calls) == 3
@@ -0,0 +1,193 @@
+import asyncio
+import json
+import pytest
+import httpx
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+from sqlalchemy import event
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, func, select
+
+from app.models.notification import Notification
+from app.models.push_outbox import PushOutbox
+from app.models.push_token import PushToken
+from app.models.user import Role, User
+from app.schemas.notification import NotificationCreate
+from app.services import notification_service
+from app.services.notification_service import (
+    batch_mark_notifications_read,
+    create_notification,
+    create_notifications_bulk,
+    delete_notification,
+    get_unread_count,
+    mark_all_read,
+    mark_notification_read,
+)
+from app.services.push_outbox_service import dispatch_pending
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+@contextmanager
+def _count_queries(session: Session):
+    statements: list[str] = []
+
+    def before_cursor_execute(_conn, _cursor, statement, _params, _context, _executemany):
+        statements.append(statement)
+
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def _clients(session: Session, count: int, tokens_each: int = 1) -> list[User]:
+    users = [
+        User(fullname=f"Client {i}", email=f"client{i}@example.com", phone=f"0801{i:06d}", role=Role.CLIENT, hashed_password="x")
+        for i in range(count)
+    ]
+    session.add_all(users)
+    session.add_all([
+        PushToken(user_id=user.id, token=f"ExponentPushToken[{i}-{t}]", device="phone")
+        for i, user in enumerate(users) for t in range(tokens_each)
+    ])
+    session.commit()
+    return users
+
+
+def test_create_notifications_bulk_uses_a_constant_number_of_statements(session: Session):
+    users = _clients(session, 300)
+    deleted = users[0]
+    deleted.deleted = True
+    session.add(deleted)
+    session.commit()
+    unknown = uuid4()
+    user_ids = [user.id for user in users] + [unknown]
+
+    with _count_queries(session) as statements:
+        result = create_notifications_bulk(session, user_ids, "Milestone", "Block A is complete", {"project": "A"})
+
+    assert len(statements) <= 3
+    assert result.notified == 299
+    assert result.push_deliveries == 299
+    assert set(result.skipped_user_ids) == {deleted.id, unknown}
+    assert session.exec(select(func.count()).select_from(Notification)).one() == 299
+    notification = session.exec(select(Notification).where(Notification.user_id == users[1].id)).one()
+    assert (notification.title, notification.data, notification.read) == ("Milestone", {"project": "A"}, False)
+
+
+def test_bulk_notifications_share_expo_batches_across_recipients(session: Session):
+    users = _clients(session, 120, tokens_each=2)
+    create_notifications_bulk(session, [user.id for user in users], "Hello", "World")
+    batch_sizes: list[int] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        messages = json.loads(request.content)
+        batch_sizes.append(len(messages))
+        return httpx.Response(200, json={"data": [{"status": "ok", "id": "t"} for _ in messages]})
+
+    async def run() -> int:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await dispatch_pending(session.get_bind(), client)
+
+    assert asyncio.run(run()) == 240
+    assert sorted(batch_sizes) == [40, 100, 100]
+    assert session.exec(select(func.count()).select_from(PushOutbox)).one() == 240
+
+
+def test_unread_count_is_cached_and_dropped_by_every_change(session: Session):
+    notification_service._unread_cache.clear()
+    user, other = _clients(session, 2)
+    notifications = [
+        create_notification(session, NotificationCreate(user_id=user.id, title=f"N{i}", body="b"))
+        for i in range(4)
+    ]
+    create_notification(session, NotificationCreate(user_id=other.id, title="Other", body="b"))
+
+    assert get_unread_count(session, user.id) == {"unread": 4}
+    with _count_queries(session) as statements:
+        assert get_unread_count(session, user.id) == {"unread": 4}
+    assert statements == []
+
+    mark_notification_read(session, notifications[0].id)
+    assert get_unread_count(session, user.id) == {"unread": 3}
+
+    batch_mark_notifications_read(session, user.id, [notifications[1].id, notifications[2].id])
+    assert get_unread_count(session, user.id) == {"unread": 1}
+
+    delete_notification(session, notifications[3].id)
+    assert get_unread_count(session, user.id) == {"unread": 0}
+
+    create_notifications_bulk(session, [user.id], "Bulk", "b")
+    assert get_unread_count(session, user.id) == {"unread": 1}
+    assert get_unread_count(session, other.id) == {"unread": 1}
+
+
+def test_unread_count_read_during_a_commit_is_not_cached(session: Session):
+    notification_service._unread_cache.clear()
+    user_id = _clients(session, 1)[0].id
+    create_notification(session, NotificationCreate(user_id=user_id, title="N", body="b"))
+    engine = session.get_bind()
+
+    def commit_elsewhere(_conn, _cursor, statement, *_args):
+        # Another request commits a change between the count and the cache write
+        if "count" in statement.lower():
+            notification_service._invalidate_unread_counts(Session(engine, info={"unread_changed": {user_id}}))
+
+    event.listen(engine, "after_cursor_execute", commit_elsewhere)
+    try:
+        assert get_unread_count(session, user_id) == {"unread": 1}
+    finally:
+        event.remove(engine, "after_cursor_execute", commit_elsewhere)
+
+    assert notification_service._unread_cache.get(user_id) is None
+    assert get_unread_count(session, user_id) == {"unread": 1}
+    assert notification_service._unread_cache.get(user_id) == 1
+
+
+def test_batch_mark_read_is_one_update_scoped_to_the_user(session: Session):
+    user_id, other_id = (user.id for user in _clients(session, 2))
+    create_notifications_bulk(session, [user_id, user_id], "Mine", "b")
+    ids = list(session.exec(select(Notification.id).where(Notification.user_id == user_id)).all())
+    theirs = create_notification(session, NotificationCreate(user_id=other_id, title="Theirs", body="b")).id
+    session.expunge_all()
+
+    with _count_queries(session) as statements:
+        marked = batch_mark_notifications_read(session, user_id, ids + [theirs])
+
+    assert marked == 1
+    assert len(statements) == 1
+    assert len(session.identity_map) == 0
+    assert session.get(Notification, theirs).read is False
+
+
+def test_mark_all_read_honours_before_without_loading_rows(session: Session):
+    user_id, other_id = (user.id for user in _clients(session, 2))
+    create_notifications_bulk(session, [user_id, other_id], "Old", "b")
+    cutoff = datetime.now(timezone.utc)
+    old_ids = set(session.exec(select(Notification.id).where(Notification.user_id == user_id)).all())
+    later = datetime.now(timezone.utc) + timedelta(minutes=5)
+    for i in range(3):
+        session.add(Notification(user_id=user_id, title=f"New {i}", body="b", created_at=later))
+    session.commit()
+    session.expunge_all()
+
+    with _count_queries(session) as statements:
+        assert mark_all_read(session, user_id, before=cutoff) == 1
+
+    assert len(statements) == 1
+    assert len(session.identity_map) == 0
+    read_ids = set(session.exec(select(Notification.id).where(Notification.user_id == user_id, Notification.read == True)).all())
+    assert read_ids == old_ids
+    assert get_unread_count(session, other_id) == {"unread": 1}
+    assert mark_all_read(session, user_id, before=later) == 3
+    assert get_unread_count(session, user_id) == {"unread": 0}
@@ -11,7 +11,7 @@ from app.models.payment import Payment
 from app.models.project import Project
 from app.models.unit import Unit
 from app.models.user import Role, User
-from app.schemas.paging import Paging
+from app.schemas.paging import CountStrategy, Paging
 from app.schemas.payment import PaymentCreate, PaymentStatus, PaymentUpdate
 from app.services.payment_service import (
     create_payment,
@@ -21,6 +21,7 @@ from app.services.payment_service import (
     soft_delete_payment,
     update_payment,
 )
+from app.utility.paging import _count_cache
 
 
 @pytest.fixture
@@ -248,3 +249,61 @@ def test_soft_delete_payment_marks_deleted(session: Session, unit: Unit):
     assert deleted.deleted is True
     assert deleted.reason_for_delete == "duplicate"
     assert refreshed.deleted is True
+
+
+def test_get_all_payments_cursor_pagination_walks_every_page(session: Session, unit: Unit):
+    created = [
+        create_payment(session, PaymentCreate(reason_for_payment=f"P{i}", amount=100 + i, unit_id=unit.id))
+        for i in range(5)
+    ]
+    expected = [p.id for p in sorted(created, key=lambda p: (p.created_at, p.id.hex), reverse=True)]
+
+    first = get_all_payments(session, Paging(limit=2))
+    assert first["total"] == 5
+    assert first["prev_cursor"] is None
+
+    seen = [p.id for p in first["data"]]
+    cursor = first["next_cursor"]
+    pages = [first]
+    while cursor:
+        page = get_all_payments(session, Paging(limit=2, cursor=cursor))
+        pages.append(page)
+        seen.extend(p.id for p in page["data"])
+        cursor = page["next_cursor"]
+
+    assert seen == expected
+
+    back = get_all_payments(session, Paging(limit=2, cursor=pages[-1]["prev_cursor"]))
+    assert [p.id for p in back["data"]] == [p.id for p in pages[-2]["data"]]
+
+
+def test_get_all_payments_rejects_invalid_cursor(session: Session, unit: Unit):
+    with pytest.raises(HTTPException) as exc:
+        get_all_payments(session, Paging(cursor="not-a-cursor"))
+
+    assert exc.value.status_code == 400
+
+
+@pytest.mark.parametrize(
+    ("strategy", "expected"),
+    [(CountStrategy.EXACT, 3), (CountStrategy.NONE, None), (CountStrategy.ESTIMATED, 3), (CountStrategy.CACHED, 3)],
+)
+def test_get_all_payments_count_strategy(session: Session, unit: Unit, strategy: CountStrategy, expected):
+    for i in range(3):
+        create_payment(session, PaymentCreate(reason_for_payment=f"P{i}", amount=100, unit_id=unit.id))
+
+    result = get_all_payments(session, Paging(limit=1, count=strategy))
+
+    assert result["total"] == expected
+    assert len(result["data"]) == 1
+
+
+def test_get_all_payments_cached_count_is_reused(session: Session, unit: Unit):
+    _count_cache.clear()
+    create_payment(session, PaymentCreate(reason_for_payment="First", amount=100, unit_id=unit.id))
+    assert get_all_payments(session, Paging(count=CountStrategy.CACHED))["total"] == 1
+
+    create_payment(session, PaymentCreate(reason_for_payment="Second", amount=100, unit_id=unit.id))
+
+    assert get_all_payments(session, Paging(count=CountStrategy.CACHED))["total"] == 1
+    assert get_all_payments(session, Paging())["total"] == 2
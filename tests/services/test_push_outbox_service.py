@@ -0,0 +1,140 @@
+import asyncio
+import json
+import pytest
+import httpx
+from datetime import datetime, timezone
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.core.config import settings
+from app.models.push_outbox import PushDeliveryStatus, PushOutbox
+from app.models.push_token import PushToken
+from app.models.user import Role, User
+from app.schemas.notification import NotificationCreate
+from app.services.notification_service import create_notification
+from app.services.push_outbox_service import dispatch_batch, dispatch_pending
+
+
+@pytest.fixture
+def session():
+    # The dispatcher talks to the database from worker threads
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def _user_with_tokens(session: Session, count: int) -> User:
+    user = User(fullname="Client", email="client@example.com", phone="0801", role=Role.CLIENT, hashed_password="x")
+    session.add(user)
+    session.add_all([PushToken(user_id=user.id, token=f"ExponentPushToken[{i}]", device="phone") for i in range(count)])
+    session.commit()
+    return user
+
+
+def _expo(handler) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def _notify(session: Session, user: User):
+    return create_notification(session, NotificationCreate(user_id=user.id, title="Hello", body="World", data={"k": "v"}))
+
+
+def _dispatch(session: Session, handler) -> int:
+    async def run() -> int:
+        async with _expo(handler) as client:
+            return await dispatch_pending(session.get_bind(), client)
+    return asyncio.run(run())
+
+
+def test_create_notification_writes_one_outbox_row_per_token(session: Session):
+    user = _user_with_tokens(session, 3)
+
+    notification = _notify(session, user)
+
+    deliveries = session.exec(select(PushOutbox)).all()
+    assert len(deliveries) == 3
+    assert {d.notification_id for d in deliveries} == {notification.id}
+    assert {d.status for d in deliveries} == {PushDeliveryStatus.PENDING}
+
+
+def test_dispatcher_sends_in_batches_of_100_and_records_tickets(session: Session):
+    user = _user_with_tokens(session, 250)
+    _notify(session, user)
+    batch_sizes: list[int] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        messages = json.loads(request.content)
+        batch_sizes.append(len(messages))
+        assert messages[0]["title"] == "Hello" and messages[0]["data"] == {"k": "v"}
+        return httpx.Response(200, json={"data": [{"status": "ok", "id": f"ticket-{m['to']}"} for m in messages]})
+
+    assert _dispatch(session, handler) == 250
+
+    assert sorted(batch_sizes) == [50, 100, 100]
+    deliveries = session.exec(select(PushOutbox)).all()
+    assert {d.status for d in deliveries} == {PushDeliveryStatus.SENT}
+    assert all(d.ticket_id == f"ticket-{d.token}" and d.sent_at for d in deliveries)
+
+
+def test_dispatcher_posts_batches_concurrently_up_to_the_limit(session: Session, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "PUSH_CONCURRENCY", 3)
+    user = _user_with_tokens(session, 1000)
+    _notify(session, user)
+    in_flight = {"now": 0, "max": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        await asyncio.sleep(0.01)
+        in_flight["now"] -= 1
+        return httpx.Response(200, json={"data": [{"status": "ok", "id": "t"} for _ in json.loads(request.content)]})
+
+    assert _dispatch(session, handler) == 1000
+    assert in_flight["max"] == 3
+
+
+def test_dispatcher_retries_failures_and_dead_letters(session: Session, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "PUSH_RETRY_BASE_SECONDS", 0)
+    monkeypatch.setattr(settings, "PUSH_MAX_ATTEMPTS", 3)
+    user = _user_with_tokens(session, 2)
+    _notify(session, user)
+    requests = {"count": 0}
+
+    def unavailable(_request: httpx.Request) -> httpx.Response:
+        requests["count"] += 1
+        return httpx.Response(503)
+
+    assert _dispatch(session, unavailable) == 6
+    assert requests["count"] == 3
+    deliveries = session.exec(select(PushOutbox)).all()
+    assert {d.status for d in deliveries} == {PushDeliveryStatus.DEAD}
+    assert all(d.attempts == 3 and "503" in d.last_error for d in deliveries)
+
+
+def test_dispatcher_dead_letters_unregistered_devices_without_retrying(session: Session, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "PUSH_RETRY_BASE_SECONDS", 0)
+    user = _user_with_tokens(session, 2)
+    _notify(session, user)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        tickets = []
+        for message in json.loads(request.content):
+            if message["to"].endswith("[0]"):
+                tickets.append({"status": "error", "message": "not registered", "details": {"error": "DeviceNotRegistered"}})
+            else:
+                tickets.append({"status": "error", "message": "slow down", "details": {"error": "MessageRateExceeded"}})
+        return httpx.Response(200, json={"data": tickets})
+
+    async def once() -> None:
+        async with _expo(handler) as client:
+            await dispatch_batch(session.get_bind(), client)
+    asyncio.run(once())
+
+    by_token = {d.token: d for d in session.exec(select(PushOutbox)).all()}
+    unregistered, limited = by_token["ExponentPushToken[0]"], by_token["ExponentPushToken[1]"]
+    assert unregistered.status == PushDeliveryStatus.DEAD
+    assert unregistered.last_error.startswith("DeviceNotRegistered")
+    assert session.exec(select(PushToken.token)).all() == ["ExponentPushToken[1]"]
+    assert limited.status == PushDeliveryStatus.PENDING
+    assert limited.next_attempt_at.replace(tzinfo=timezone.utc) <= datetime.now(timezone.utc)
@@ -0,0 +1,87 @@
+import io
+import json
+import pytest
+from sqlmodel import Session, SQLModel, create_engine, select
+from app.models.payment import Payment
+from app.models.project import Project
+from app.models.unit import Unit
+from app.models.unit_agent_link import UnitAgentLink
+from app.models.user import Role, User
+from app.services.unit_import_service import import_units
+from app.utility import row_readers
+from app.utility.row_readers import iter_csv_rows, iter_jsonl_rows
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False})
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture
+def project(session: Session) -> Project:
+    project = Project(name="Import Project", address="1 Import Way", num_units=10)
+    session.add(project)
+    session.commit()
+    return project
+
+
+def test_import_units_from_csv_creates_units_schedules_and_links(session: Session, project: Project):
+    agent = User(fullname="Agent", email="agent@example.com", phone="0801", role=Role.AGENT, hashed_password="x")
+    session.add(agent)
+    session.commit()
+    agents = json.dumps([{"agent_id": str(agent.id), "role": "sales_rep"}]).replace('"', '""')
+    csv_file = io.BytesIO((
+        "name,amount,expected_initial_payment,installment,payment_plan,payment_duration,purchase_date,project_id,agents\n"
+        f"A1,1200,200,4,true,monthly,2024-01-01T00:00:00+00:00,{project.id},\"{agents}\"\n"
+        f"A2,500,0,1,false,,2024-01-01T00:00:00+00:00,{project.id},\n"
+        f"A3,not-a-number,0,1,false,,,{project.id},\n"
+    ).encode())
+
+    report = import_units(session, iter_csv_rows(csv_file), batch_size=2)
+
+    assert report["created"] == 2
+    assert report["failed"] == 1
+    assert report["errors"][0]["row"] == 3
+    assert report["errors"][0]["errors"][0].startswith("amount:")
+    units = {unit.name: unit for unit in session.exec(select(Unit)).all()}
+    assert set(units) == {"A1", "A2"}
+    assert len(session.exec(select(Payment).where(Payment.unit_id == units["A1"].id)).all()) == 5
+    assert len(session.exec(select(Payment).where(Payment.unit_id == units["A2"].id)).all()) == 1
+    assert session.exec(select(UnitAgentLink)).one().unit_id == units["A1"].id
+
+
+def test_import_units_from_jsonl_reports_bad_lines(session: Session, project: Project):
+    lines = [
+        json.dumps({"name": "J1", "amount": 100, "expected_initial_payment": 0, "project_id": str(project.id)}),
+        "{not json",
+        "",
+        json.dumps(["not", "an", "object"]),
+        json.dumps({"amount": 100, "expected_initial_payment": 0}),
+    ]
+
+    report = import_units(session, iter_jsonl_rows(io.BytesIO("\n".join(lines).encode())))
+
+    assert report["created"] == 1
+    assert [error["row"] for error in report["errors"]] == [2, 3, 4]
+    assert report["errors"][2]["errors"] == ["name: Field required"]
+
+
+def test_row_readers_bound_line_length(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(row_readers, "MAX_LINE_LENGTH", 100)
+    long_line = "x" * 250_000  # spans several read chunks
+
+    jsonl = io.BytesIO(f'{{"name": "A"}}\n{long_line}\n{{"name": "B"}}'.encode())
+    assert [(row.number, row.data, row.error) for row in iter_jsonl_rows(jsonl)] == [
+        (1, {"name": "A"}, None),
+        (2, None, "Line is longer than 100 characters"),
+        (3, {"name": "B"}, None),
+    ]
+
+    csv_file = io.BytesIO(f"name,amount\nA,1\n{long_line}\nB,2\n".encode())
+    rows = list(iter_csv_rows(csv_file))
+    assert [row.number for row in rows] == [1, 2]
+    assert rows[0].data == {"name": "A", "amount": "1"}
+    assert rows[1].error.startswith("Line is longer than 100 characters")
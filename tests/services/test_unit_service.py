@@ -1,12 +1,32 @@
 import pytest
+from contextlib import contextmanager
+from sqlalchemy import event
 from sqlmodel import Session, SQLModel, create_engine, select
 from app.models.user import User, Role
 from app.models.project import Project
 from app.models.unit import Unit, PropertyType
 from app.models.payment import Payment, PaymentStatus
-from app.services.unit_service import create_unit, update_unit
+from app.models.document import MediaFile
+from app.models.unit_agent_link import AgentRole, UnitAgentLink
+from app.schemas.paging import Paging
+from app.services.unit_service import create_unit, get_all_units, get_unit_by_id, payment_schedule, recalculate_payments, update_unit
+from decimal import Decimal
 from datetime import datetime, timezone
-from app.schemas.unit import UnitCreate, UnitUpdate
+from app.schemas.unit import ReadAllUnits, SingleUnit, UnitCreate, UnitUpdate
+
+@contextmanager
+def _count_queries(session: Session):
+    statements: list[str] = []
+
+    def before_cursor_execute(_conn, _cursor, statement, _params, _context, _executemany):
+        statements.append(statement)
+
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
 
 @pytest.fixture
 def session():
@@ -76,4 +96,191 @@ def test_update_unit_recalculates_payments(session, seed_client_and_project):
     )
     updated = update_unit(session, unit.id, update_data)
     unpaid_payments = [p for p in updated.payments if p.status == PaymentStatus.NOT_PAID and not p.deleted]
-    assert len(unpaid_payments) == 3
\ No newline at end of file
+    assert len(unpaid_payments) == 3
+
+def test_create_unit_is_one_transaction_with_a_fixed_statement_budget(session, seed_client_and_project):
+    client, project = seed_client_and_project
+    agents = [
+        User(fullname=f"Agent {i}", email=f"agent{i}@example.com", phone=f"0802000000{i}", role=Role.AGENT, hashed_password="hashed")
+        for i in range(2)
+    ]
+    session.add_all(agents)
+    session.commit()
+    data = UnitCreate(
+        name="Budgeted Unit",
+        amount=12000000,
+        expected_initial_payment=2000000,
+        purchase_date=datetime.now(timezone.utc),
+        installment=24,
+        payment_plan=True,
+        project_id=project.id,
+        client_id=client.id,
+        agents=[{"agent_id": agent.id, "role": AgentRole.sales_rep} for agent in agents],
+    )
+    commits = []
+    event.listen(session.get_bind(), "commit", lambda _conn: commits.append(True))
+
+    with _count_queries(session) as statements:
+        unit = create_unit(session, data)
+
+    # unit INSERT, payments INSERT, agent links INSERT, snapshot UPDATE, reload
+    assert len(statements) <= 5
+    assert len(commits) == 1
+    assert len(session.exec(select(Payment).where(Payment.unit_id == unit.id)).all()) == 25
+    assert len(session.exec(select(UnitAgentLink).where(UnitAgentLink.unit_id == unit.id)).all()) == 2
+
+def test_update_unit_reconciles_agent_links_by_difference(session, seed_client_and_project):
+    client, project = seed_client_and_project
+    keep, drop, add = [
+        User(fullname=f"Agent {i}", email=f"recon{i}@example.com", phone=f"0803000000{i}", role=Role.AGENT, hashed_password="hashed")
+        for i in range(3)
+    ]
+    session.add_all([keep, drop, add])
+    session.commit()
+    unit = create_unit(session, UnitCreate(
+        name="Agent Unit",
+        amount=1000000,
+        expected_initial_payment=0,
+        project_id=project.id,
+        client_id=client.id,
+        agents=[{"agent_id": keep.id, "role": AgentRole.sales_rep}, {"agent_id": drop.id, "role": AgentRole.external_agent}],
+    ))
+    unit_id, keep_id, add_id = unit.id, keep.id, add.id
+    kept_link_id = session.exec(select(UnitAgentLink.id).where(UnitAgentLink.agent_id == keep_id)).one()
+
+    with _count_queries(session) as statements:
+        update_unit(session, unit_id, UnitUpdate(agents=[
+            {"agent_id": keep_id, "role": AgentRole.sales_rep},
+            {"agent_id": add_id, "role": AgentRole.sales_rep},
+        ]))
+    writes = [s.split()[0] for s in statements if s.split()[0] in ("INSERT", "DELETE")]
+    assert sorted(writes) == ["DELETE", "INSERT"]
+
+    links = session.exec(select(UnitAgentLink).where(UnitAgentLink.unit_id == unit_id)).all()
+    assert {(link.agent_id, link.role) for link in links} == {(keep_id, AgentRole.sales_rep), (add_id, AgentRole.sales_rep)}
+    assert kept_link_id in {link.id for link in links}
+
+    with _count_queries(session) as statements:
+        update_unit(session, unit_id, UnitUpdate(agents=[
+            {"agent_id": add_id, "role": AgentRole.sales_rep},
+            {"agent_id": keep_id, "role": AgentRole.sales_rep},
+        ]))
+    assert not [s for s in statements if s.split()[0] in ("INSERT", "DELETE")]
+
+def test_payment_schedule_spaces_installments_by_duration():
+    start = datetime(2024, 1, 31, tzinfo=timezone.utc)
+
+    schedule = payment_schedule(Decimal("1000"), Decimal("10"), Decimal("100"), 4, "quarterly", start)
+
+    assert [item.reason_for_payment for item in schedule] == [
+        "Initial Payment", "Installment 1", "Installment 2", "Installment 3", "Installment 4",
+    ]
+    assert schedule[0].due_date == start
+    assert [item.due_date.month for item in schedule[1:]] == [4, 7, 10, 1]
+    assert schedule[1].due_date.day == 30
+    assert all(item.amount == Decimal("200.00") for item in schedule[1:])
+
+def test_recalculate_payments_statement_count_is_independent_of_installments(session, seed_client_and_project):
+    client, project = seed_client_and_project
+    unit = create_unit(session, UnitCreate(
+        name="Long Plan",
+        amount=6000000,
+        expected_initial_payment=0,
+        purchase_date=datetime.now(timezone.utc),
+        installment=12,
+        payment_plan=True,
+        project_id=project.id,
+        client_id=client.id
+    ))
+
+    counts = []
+    for installments in (24, 120):
+        unit.installment = installments
+        session.flush()
+        with _count_queries(session) as statements:
+            recalculate_payments(session, unit)
+        counts.append(len(statements))
+        unpaid = session.exec(select(Payment).where(Payment.unit_id == unit.id, Payment.status == PaymentStatus.NOT_PAID)).all()
+        assert len(unpaid) == installments
+
+    assert counts[0] == counts[1]
+
+def test_get_all_units_computes_total_paid_in_list_query(session, seed_client_and_project):
+    client, project = seed_client_and_project
+    unit = create_unit(session, UnitCreate(
+        name="Test Unit C",
+        amount=1000,
+        expected_initial_payment=100,
+        installment=3,
+        payment_plan=True,
+        payment_duration="monthly",
+        purchase_date=datetime.now(timezone.utc),
+        project_id=project.id,
+        client_id=client.id
+    ))
+    first = session.exec(select(Payment).where(Payment.unit_id == unit.id)).first()
+    first.status = PaymentStatus.PAID
+    session.add(first)
+    session.commit()
+    expected = unit.payment_summary
+    session.expunge_all()
+
+    result = get_all_units(session, Paging())
+    listed = result["data"][0]
+
+    assert listed.paid_total == first.amount
+    assert "payments" not in listed.__dict__
+    assert listed.payment_summary == expected
+    assert "payments" not in listed.__dict__
+
+
+def test_unit_serialization_query_count_is_constant(session, seed_client_and_project):
+    client, project = seed_client_and_project
+    agent = User(
+        fullname="Agent",
+        email="agent@example.com",
+        phone="08000000001",
+        role=Role.AGENT,
+        hashed_password="hashed",
+    )
+    session.add(agent)
+    session.commit()
+    for i in range(8):
+        unit = create_unit(session, UnitCreate(
+            name=f"Unit {i}",
+            amount=1000,
+            expected_initial_payment=100,
+            installment=2,
+            payment_plan=True,
+            payment_duration="monthly",
+            purchase_date=datetime.now(timezone.utc),
+            project_id=project.id,
+            client_id=client.id,
+        ))
+        session.add(MediaFile(
+            file_type="image/png",
+            file_name=f"unit-{i}.png",
+            file_path=f"https://example.com/unit-{i}.png",
+            file_size=1,
+            unit_id=unit.id,
+        ))
+        session.add(UnitAgentLink(unit_id=unit.id, agent_id=agent.id, role=AgentRole.sales_rep))
+    session.commit()
+    unit_id, agent_id = unit.id, agent.id
+    session.expunge_all()
+
+    with _count_queries(session) as statements:
+        page = ReadAllUnits.model_validate(get_all_units(session, Paging()), from_attributes=True)
+
+    assert len(page.data) == 8
+    assert all(unit.images and unit.client for unit in page.data)
+    # units, count, media files selectin
+    assert len(statements) <= 3
+
+    session.expunge_all()
+    with _count_queries(session) as statements:
+        single = SingleUnit.model_validate(get_unit_by_id(session, unit_id, SingleUnit), from_attributes=True)
+
+    assert single.unit_agents[0].agent.id == agent_id
+    # unit, media files selectin, agent links selectin
+    assert len(statements) <= 3
@@ -0,0 +1,646 @@
+import asyncio
+import hashlib
+import threading
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+from decimal import Decimal
+from uuid import UUID, uuid4
+from fastapi import HTTPException, UploadFile
+from botocore.exceptions import ClientError
+from botocore.response import StreamingBody
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel import Session, SQLModel, create_engine, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.datastructures import Headers
+
+from app.core.config import settings
+from app.models.document import MediaFile
+from app.models.job import Job
+from app.models.unit import Unit
+from app.services import upload_service
+from app.services.job_queue import JOB_HANDLERS
+from app.schemas.media import CompletedPart, CompleteUploadRequest, PresignUploadRequest
+from app.services.upload_service import (
+    complete_presigned_upload,
+    content_key,
+    create_media_files,
+    download_media_file,
+    presign_upload,
+    stream_media_file,
+    sweep_unreferenced_objects,
+)
+from app.utility.multipart_upload import S3MultipartWriter
+
+
+class FakeS3:
+    """Records calls like boto3's S3 client; upload_part can be slowed or made to fail."""
+
+    def __init__(self, part_delay: float = 0, fail_part: int | None = None, fail_key: str | None = None):
+        self.part_delay = part_delay
+        self.fail_part = fail_part
+        self.fail_key = fail_key
+        self.calls: list[tuple[str, dict]] = []
+        self.parts: dict[int, bytes] = {}
+        self.objects: dict[str, bytes] = {}
+        self.content_types: dict[str, str] = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.object_age = timedelta(0)  # how long ago head_object says objects were written
+        self._lock = threading.Lock()
+
+    def create_multipart_upload(self, **kwargs):
+        self.calls.append(("create_multipart_upload", kwargs))
+        self.content_types[kwargs["Key"]] = kwargs["ContentType"]
+        return {"UploadId": "upload-1"}
+
+    def upload_part(self, **kwargs):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.part_delay)
+            if kwargs["PartNumber"] == self.fail_part:
+                raise ConnectionError("part failed")
+            self.parts[kwargs["PartNumber"]] = kwargs["Body"]
+            return {"ETag": f"etag-{kwargs['PartNumber']}"}
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def complete_multipart_upload(self, **kwargs):
+        self.calls.append(("complete_multipart_upload", kwargs))
+        self.objects[kwargs["Key"]] = b"".join(self.parts[p["PartNumber"]] for p in kwargs["MultipartUpload"]["Parts"])
+
+    def abort_multipart_upload(self, **kwargs):
+        self.calls.append(("abort_multipart_upload", kwargs))
+
+    def put_object(self, **kwargs):
+        self.calls.append(("put_object", kwargs))
+        self.objects[kwargs["Key"]] = kwargs["Body"]
+
+    def upload_fileobj(self, fileobj, bucket, key, ExtraArgs=None, Config=None):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.part_delay)
+            if key == self.fail_key:
+                raise ConnectionError("upload failed")
+            self.calls.append(("upload_fileobj", {"Key": key}))
+            self.objects[key] = fileobj.read()
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def copy(self, CopySource, Bucket, Key, ExtraArgs=None, Config=None):
+        self.calls.append(("copy", {"Source": CopySource["Key"], "Key": Key}))
+        self.objects[Key] = self.objects[CopySource["Key"]]
+        # Like a multipart copy: metadata comes only from ExtraArgs
+        self.content_types[Key] = (ExtraArgs or {}).get("ContentType", "binary/octet-stream")
+
+    def generate_presigned_url(self, operation, Params, ExpiresIn):
+        self.calls.append(("generate_presigned_url", {"operation": operation, **Params}))
+        return f"https://r2.example.com/{Params['Key']}?op={operation}&part={Params.get('PartNumber', '')}"
+
+    def head_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "404", "Message": "Not Found"}}, "HeadObject")
+        return {
+            "ContentLength": len(self.objects[Key]), "ContentType": self.content_types.get(Key),
+            "LastModified": datetime.now(timezone.utc) - self.object_age,
+        }
+
+    def get_object(self, Bucket, Key, Range=None):
+        self.calls.append(("get_object", {"Key": Key, "Range": Range}))
+        data = self.objects[Key]
+        if Range is None:
+            return {"Body": StreamingBody(BytesIO(data), len(data)), "ContentLength": len(data), "ETag": '"etag"'}
+        start, end = (int(n) for n in Range.removeprefix("bytes=").split("-"))
+        if start >= len(data):
+            raise ClientError({"Error": {"Code": "InvalidRange", "Message": "Invalid Range"}}, "GetObject")
+        piece = data[start:end + 1]
+        return {
+            "Body": StreamingBody(BytesIO(piece), len(piece)), "ContentLength": len(piece), "ETag": '"etag"',
+            "ContentRange": f"bytes {start}-{start + len(piece) - 1}/{len(data)}",
+        }
+
+    def delete_objects(self, **kwargs):
+        self.calls.append(("delete_objects", kwargs))
+        for item in kwargs["Delete"]["Objects"]:
+            self.objects.pop(item["Key"], None)
+
+
+@pytest.fixture
+def executor():
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        yield pool
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+
+
+def _write(writer: S3MultipartWriter, data: bytes, chunk: int):
+    async def run():
+        try:
+            for i in range(0, len(data), chunk):
+                await writer.write(data[i:i + chunk])
+            return await writer.complete()
+        except BaseException:
+            await writer.abort()
+            raise
+    return asyncio.run(run())
+
+
+def test_writer_streams_parts_with_bounded_concurrency(executor):
+    s3 = FakeS3(part_delay=0.02)
+    writer = S3MultipartWriter(s3, "bucket", "big.bin", "application/pdf", part_size=10, concurrency=2, executor=executor)
+    data = bytes(range(256)) * 2
+
+    uploaded = _write(writer, data, chunk=7)
+
+    assert uploaded.size == len(data)
+    assert uploaded.parts == 52
+    assert s3.objects["big.bin"] == data
+    assert s3.max_in_flight == 2
+    assert s3.calls[0] == ("create_multipart_upload", {"Bucket": "bucket", "Key": "big.bin", "ContentType": "application/pdf"})
+
+
+def test_writer_uses_a_single_put_for_small_objects(executor):
+    s3 = FakeS3()
+    writer = S3MultipartWriter(s3, "bucket", "small.txt", "text/plain", part_size=100, concurrency=2, executor=executor, extra_args={"ACL": "public-read"})
+
+    uploaded = _write(writer, b"hello world", chunk=4)
+
+    assert (uploaded.size, uploaded.parts) == (11, 0)
+    assert [name for name, _ in s3.calls] == ["put_object"]
+    assert s3.calls[0][1]["ACL"] == "public-read"
+
+
+def test_writer_aborts_the_upload_when_a_part_fails(executor):
+    s3 = FakeS3(fail_part=2)
+    writer = S3MultipartWriter(s3, "bucket", "broken.bin", "application/octet-stream", part_size=10, concurrency=2, executor=executor)
+
+    with pytest.raises(ConnectionError):
+        _write(writer, b"x" * 100, chunk=10)
+
+    names = [name for name, _ in s3.calls]
+    assert "abort_multipart_upload" in names
+    assert "complete_multipart_upload" not in names
+
+
+def test_writer_stops_when_a_part_was_cancelled(executor):
+    s3 = FakeS3(part_delay=0.02)
+    writer = S3MultipartWriter(s3, "bucket", "cancelled.bin", "application/octet-stream", part_size=10, concurrency=2, executor=executor)
+
+    async def run():
+        await writer.write(b"x" * 10)
+        writer._parts[0].cancel()
+        await asyncio.sleep(0)
+        try:
+            await writer.write(b"x" * 10)
+        finally:
+            await writer.abort()
+
+    with pytest.raises(RuntimeError, match="part 1 was cancelled"):
+        asyncio.run(run())
+
+    assert [name for name, _ in s3.calls][-1] == "abort_multipart_upload"
+
+
+def _form_body(boundary: str, fields: dict[str, str], filename: str, content: bytes, content_type: str | None, fields_first: bool = True) -> bytes:
+    text = b""
+    for name, value in fields.items():
+        text += f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+    file = f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'.encode()
+    if content_type:
+        file += f"Content-Type: {content_type}\r\n".encode()
+    file += b"\r\n" + content + b"\r\n"
+    return (text + file if fields_first else file + text) + f"--{boundary}--\r\n".encode()
+
+
+def _stream(path, body: bytes) -> MediaFile:
+    async def chunks():
+        for i in range(0, len(body), 333):
+            yield body[i:i + 333]
+
+    async def main():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        try:
+            async with factory() as session:
+                return await stream_media_file(session, uuid4(), chunks(), "multipart/form-data; boundary=XyZ")
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(main())
+
+
+@pytest.fixture
+def stream_db(tmp_path):
+    path = tmp_path / "upload.db"
+    sync_engine = create_engine(f"sqlite:///{path}")
+    SQLModel.metadata.create_all(sync_engine)
+    sync_engine.dispose()
+    return path
+
+
+def _add_unit(path) -> UUID:
+    engine = create_engine(f"sqlite:///{path}")
+    with Session(engine) as session:
+        unit = Unit(name="B4", amount=Decimal("1000"), expected_initial_payment=Decimal("100"))
+        session.add(unit)
+        session.commit()
+        unit_id = unit.id
+    engine.dispose()
+    return unit_id
+
+
+def test_stream_media_file_uploads_and_records_the_file(stream_db, monkeypatch: pytest.MonkeyPatch):
+    s3 = FakeS3()
+    monkeypatch.setattr(upload_service, "client", s3)
+    monkeypatch.setattr(upload_service, "_part_size", lambda: 1024)
+    unit_id = _add_unit(stream_db)
+    content = b"%PDF-" + b"0123456789" * 500
+    body = _form_body("XyZ", {"unit_id": str(unit_id)}, "plan.pdf", content, None)
+
+    media = _stream(stream_db, body)
+
+    assert media.file_size == len(content)
+    assert media.file_type == "application/pdf"
+    assert media.file_name == "plan.pdf"
+    assert media.unit_id == unit_id
+    assert media.content_hash == hashlib.sha256(content).hexdigest()
+    assert media.storage_key == content_key(media.content_hash)
+    assert list(s3.objects) == [media.storage_key]
+    assert s3.objects[media.storage_key] == content
+    assert len(s3.parts) == 5
+    assert s3.content_types[media.storage_key] == "application/pdf"
+
+
+@pytest.mark.parametrize("fields, status_code", [
+    ({"unit_id": "1" * (1024 * 1024 + 1)}, 413),
+    ({"comment": "hello"}, 400),
+])
+def test_stream_media_file_limits_form_fields(stream_db, monkeypatch: pytest.MonkeyPatch, fields, status_code):
+    s3 = FakeS3()
+    monkeypatch.setattr(upload_service, "client", s3)
+
+    with pytest.raises(HTTPException) as raised:
+        _stream(stream_db, _form_body("XyZ", fields, "plan.pdf", b"%PDF-", None))
+
+    assert raised.value.status_code == status_code
+    assert s3.calls == []
+
+
+@pytest.mark.parametrize("unit_id, status_code", [("not-a-uuid", 400), (str(uuid4()), 404)])
+def test_rejected_fields_after_the_file_leave_no_object(stream_db, monkeypatch: pytest.MonkeyPatch, unit_id, status_code):
+    s3 = FakeS3()
+    monkeypatch.setattr(upload_service, "client", s3)
+    monkeypatch.setattr(upload_service, "_part_size", lambda: 1024)
+    body = _form_body("XyZ", {"unit_id": unit_id}, "plan.pdf", b"%PDF-" + b"0" * 5000, None, fields_first=False)
+
+    with pytest.raises(HTTPException) as raised:
+        _stream(stream_db, body)
+
+    assert raised.value.status_code == status_code
+    names = [name for name, _ in s3.calls]
+    assert "abort_multipart_upload" in names
+    assert "complete_multipart_upload" not in names
+    assert s3.objects == {}
+
+
+def test_failed_commit_after_streaming_schedules_a_sweep(stream_db, monkeypatch: pytest.MonkeyPatch):
+    s3 = FakeS3()
+    monkeypatch.setattr(upload_service, "client", s3)
+
+    async def failing_commit(self):
+        raise ConnectionError("database went away")
+
+    monkeypatch.setattr(AsyncSession, "commit", failing_commit)
+
+    with pytest.raises(ConnectionError):
+        _stream(stream_db, _form_body("XyZ", {}, "note.txt", b"short note", "text/plain"))
+
+    engine = create_engine(f"sqlite:///{stream_db}")
+    with Session(engine) as session:
+        sweep = session.exec(select(Job).where(Job.name == "media.sweep_objects")).one()
+        assert session.exec(select(func.count()).select_from(MediaFile)).one() == 0
+    engine.dispose()
+    assert sweep.payload["keys"] == [content_key(hashlib.sha256(b"short note").hexdigest())]
+
+
+def test_streaming_known_content_reuses_the_stored_object(stream_db, monkeypatch: pytest.MonkeyPatch):
+    s3 = FakeS3()
+    monkeypatch.setattr(upload_service, "client", s3)
+    monkeypatch.setattr(upload_service, "_part_size", lambda: 1024)
+    brochure = b"%PDF-" + b"brochure" * 500
+    first = _stream(stream_db, _form_body("XyZ", {}, "brochure.pdf", brochure, None))
+    s3.calls.clear()
+
+    again = _stream(stream_db, _form_body("XyZ", {}, "brochure-copy.pdf", brochure, None))
+    small = _stream(stream_db, _form_body("XyZ", {}, "note.txt", b"short note", "text/plain"))
+    small_again = _stream(stream_db, _form_body("XyZ", {}, "note2.txt", b"short note", "text/plain"))
+
+    assert (again.storage_key, again.file_name, again.file_size) == (first.storage_key, "brochure-copy.pdf", len(brochure))
+    assert small_again.storage_key == small.storage_key
+    names = [name for name, _ in s3.calls]
+    assert names.count("abort_multipart_upload") == 1
+    assert names.count("complete_multipart_upload") == 0
+    assert names.count("put_object") == 1
+    assert sorted(s3.objects) == sorted([first.storage_key, small.storage_key])
+
+
+def _upload_files(count: int) -> list[UploadFile]:
+    return [
+        UploadFile(file=BytesIO(f"photo {i}".encode()), filename=f"photo{i}.jpg", headers=Headers({"content-type": "image/jpeg"}))
+        for i in range(count)
+    ]
+
+
+def test_create_media_files_uploads_concurrently_and_commits_once(session: Session, monkeypatch: pytest.MonkeyPatch):
+    s3 = FakeS3(part_delay=0.02)
+    monkeypatch.setattr(upload_service, "client", s3)
+    monkeypatch.setattr(settings, "UPLOAD_CONCURRENCY", 3)
+    commits: list[None] = []
+    original_commit = session.commit
+    monkeypatch.setattr(session, "commit", lambda: commits.append(None) or original_commit())
+    unit_id = uuid4()
+
+    media = create_media_files(session, uuid4(), _upload_files(8), unit_id, None, None)
+
+    assert [m.file_name for m in media] == [f"photo{i}.jpg" for i in range(8)]
+    assert all(m.unit_id == unit_id and m.file_type == "image/jpeg" for m in media)
+    assert s3.objects[media[5].storage_key] == b"photo 5"
+    assert media[5].file_size == 7
+    assert s3.max_in_flight == 3
+    assert len(commits) == 1
+    assert session.exec(select(func.count()).select_from(MediaFile)).one() == 8
+
+
+def test_create_media_files_rolls_back_every_upload_when_one_fails(session: Session, monkeypatch: pytest.MonkeyPatch):
+    s3 = FakeS3(part_delay=0.01, fail_key=content_key(hashlib.sha256(b"photo 1").hexdigest()))
+    monkeypatch.setattr(upload_service, "client", s3)
+    monkeypatch.setattr(settings, "UPLOAD_CONCURRENCY", 2)
+
+    with pytest.raises(HTTPException) as raised:
+        create_media_files(session, uuid4(), _upload_files(6), None, None, None)
+
+    assert raised.value.status_code == 502
+    statuses = {f["file_name"]: f["status"] for f in raised.value.detail["files"]}
+    assert statuses["photo0.jpg"] == "rolled_back"
+    assert statuses["photo1.jpg"] == "failed"
+    assert "cancelled" in statuses.values()
+    assert session.exec(select(func.count()).select_from(MediaFile)).one() == 0
+    # Shared keys are never deleted on the request path; a delayed job sweeps them
+    assert not any(name == "delete_objects" for name, _ in s3.calls)
+    sweep = session.exec(select(Job).where(Job.name == "media.sweep_objects")).one()
+    assert content_key(hashlib.sha256(b"photo 0").hexdigest()) in sweep.payload["keys"]
+    assert s3.fail_key not in sweep.payload["keys"]
+    assert sweep.run_at.replace(tzinfo=timezone.utc) > datetime.now(timezone.utc) + timedelta(minutes=30)
+
+    s3.object_age = timedelta(hours=2)
+    assert sorted(sweep_unreferenced_objects(session, sweep.payload["keys"])) == sorted(sweep.payload["keys"])
+    assert s3.objects == {}
+
+
+@pytest.fixture
+def presign_s3(monkeypatch: pytest.MonkeyPatch) -> FakeS3:
+    s3 = FakeS3()
+    monkeypatch.setattr(upload_service, "client", s3)
+    monkeypatch.setattr(upload_service, "_part_size", lambda: 10)
+    monkeypatch.setattr(settings, "SECRET_KEY", "test-secret")
+    return s3
+
+
+def test_presigned_put_is_recorded_once_the_object_exists(session: Session, presign_s3: FakeS3):
+    unit = Unit(name="B4", amount=Decimal("1000"), expected_initial_payment=Decimal("100"))
+    session.add(unit)
+    session.commit()
+    user_id, unit_id = uuid4(), unit.id
+    presigned = presign_upload(session, user_id, PresignUploadRequest(file_name="../site/plan.pdf", file_size=8, unit_id=unit_id))
+
+    assert presigned.method == "put"
+    assert presigned.key.startswith("plan_") and presigned.key.endswith(".pdf")
+    assert presigned.headers == {"Content-Type": "application/pdf", "x-amz-acl": "public-read"}
+    complete = CompleteUploadRequest(upload_token=presigned.upload_token)
+    with pytest.raises(HTTPException) as raised:
+        complete_presigned_upload(session, user_id, complete)
+    assert raised.value.status_code == 400
+
+    presign_s3.objects[presigned.key] = b"%PDF-1.7"
+    presign_s3.content_types[presigned.key] = "application/pdf"
+    media = complete_presigned_upload(session, user_id, complete)
+
+    assert (media.file_name, media.storage_key, media.file_size, media.file_type) == ("plan.pdf", presigned.key, 8, "application/pdf")
+    assert (media.unit_id, media.uploaded_by) == (unit_id, user_id)
+    assert complete_presigned_upload(session, user_id, complete).id == media.id
+    with pytest.raises(HTTPException) as raised:
+        complete_presigned_upload(session, uuid4(), complete)
+    assert raised.value.status_code == 403
+
+
+def test_presigned_multipart_upload_is_assembled_from_part_etags(session: Session, presign_s3: FakeS3):
+    user_id = uuid4()
+    presigned = presign_upload(session, user_id, PresignUploadRequest(file_name="walkthrough.mp4", file_size=25))
+
+    assert presigned.method == "multipart"
+    assert presigned.part_size == 10
+    assert [part.part_number for part in presigned.parts] == [1, 2, 3]
+    presign_s3.parts.update({1: b"a" * 10, 2: b"b" * 10, 3: b"c" * 5})
+    parts = [CompletedPart(part_number=n, etag=f"etag-{n}") for n in (3, 1, 2)]
+
+    media = complete_presigned_upload(session, user_id, CompleteUploadRequest(upload_token=presigned.upload_token, parts=parts))
+
+    completed = next(kwargs for name, kwargs in presign_s3.calls if name == "complete_multipart_upload")
+    assert [p["PartNumber"] for p in completed["MultipartUpload"]["Parts"]] == [1, 2, 3]
+    assert completed["UploadId"] == "upload-1"
+    assert media.file_size == 25
+    assert media.file_type == "video/mp4"
+
+
+def test_presigned_upload_with_the_wrong_size_is_deleted(session: Session, presign_s3: FakeS3):
+    user_id = uuid4()
+    presigned = presign_upload(session, user_id, PresignUploadRequest(file_name="notes.txt", file_size=5))
+    presign_s3.objects[presigned.key] = b"far too long"
+
+    with pytest.raises(HTTPException) as raised:
+        complete_presigned_upload(session, user_id, CompleteUploadRequest(upload_token=presigned.upload_token))
+
+    assert raised.value.status_code == 400
+    assert presigned.key not in presign_s3.objects
+    assert session.exec(select(func.count()).select_from(MediaFile)).one() == 0
+
+
+def test_presign_rejects_unknown_owners_before_anything_is_uploaded(session: Session, presign_s3: FakeS3):
+    with pytest.raises(HTTPException) as raised:
+        presign_upload(session, uuid4(), PresignUploadRequest(file_name="plan.pdf", file_size=8, project_id=uuid4()))
+
+    assert (raised.value.status_code, raised.value.detail) == (404, "Project not found")
+    assert presign_s3.calls == []
+
+
+def test_abandoned_presigned_uploads_are_swept(session: Session, presign_s3: FakeS3, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "UPLOAD_PRESIGN_EXPIRES_SECONDS", 600)
+    monkeypatch.setattr(settings, "UPLOAD_ORPHAN_GRACE_SECONDS", 3600)
+    user_id = uuid4()
+    single = presign_upload(session, user_id, PresignUploadRequest(file_name="notes.txt", file_size=5))
+    multipart = presign_upload(session, user_id, PresignUploadRequest(file_name="walkthrough.mp4", file_size=25))
+    presign_s3.objects[single.key] = b"notes"
+
+    jobs = session.exec(select(Job).where(Job.name == "media.sweep_objects").order_by(Job.run_at)).all()
+    assert [job.payload["keys"] for job in jobs] == [[single.key], [multipart.key]]
+    earliest = datetime.now(timezone.utc) + timedelta(seconds=2 * 600 + 3600 - 60)
+    assert all(job.run_at.replace(tzinfo=timezone.utc) > earliest for job in jobs)
+
+    presign_s3.object_age = timedelta(hours=2)
+    for job in jobs:
+        JOB_HANDLERS["media.sweep_objects"](session, job.payload)
+
+    assert presign_s3.objects == {}
+    aborted = [kwargs for name, kwargs in presign_s3.calls if name == "abort_multipart_upload"]
+    assert aborted == [{"Bucket": settings.R2_BUCKET_NAME, "Key": multipart.key, "UploadId": "upload-1"}]
+
+
+def test_presigned_upload_is_swept_when_its_row_cannot_be_saved(session: Session, presign_s3: FakeS3, monkeypatch: pytest.MonkeyPatch):
+    user_id = uuid4()
+    presigned = presign_upload(session, user_id, PresignUploadRequest(file_name="notes.txt", file_size=5))
+    presign_s3.objects[presigned.key] = b"notes"
+    commit = session.commit
+    failures = iter([ConnectionError("database went away")])
+
+    def commit_once_failing():
+        if (error := next(failures, None)) is not None:
+            raise error
+        commit()
+
+    monkeypatch.setattr(session, "commit", commit_once_failing)
+
+    with pytest.raises(ConnectionError):
+        complete_presigned_upload(session, user_id, CompleteUploadRequest(upload_token=presigned.upload_token))
+
+    sweeps = session.exec(select(Job).where(Job.name == "media.sweep_objects")).all()
+    assert [job.payload["keys"] for job in sweeps] == [[presigned.key], [presigned.key]]
+    assert session.exec(select(func.count()).select_from(MediaFile)).one() == 0
+
+
+def _stored_pdf(session: Session, s3: FakeS3) -> MediaFile:
+    s3.objects["report.pdf"] = b"%PDF-0123456789"
+    media = MediaFile(file_name="report.pdf", file_type="application/pdf", file_size=15, file_path="https://cdn.example.com/report.pdf")
+    session.add(media)
+    session.commit()
+    return media
+
+
+def _body(response) -> bytes:
+    async def read() -> bytes:
+        return b"".join([chunk async for chunk in response.body_iterator])
+    return asyncio.run(read())
+
+
+def test_download_redirects_to_a_presigned_url_by_default(session: Session, presign_s3: FakeS3):
+    media = _stored_pdf(session, presign_s3)
+
+    response = download_media_file(session, media.id)
+
+    assert response.status_code == 302
+    assert response.headers["location"].startswith("https://r2.example.com/report.pdf?op=get_object")
+    assert response.headers["cache-control"] == "no-store"
+    signed = next(kwargs for name, kwargs in presign_s3.calls if name == "generate_presigned_url")
+    assert signed["ResponseContentType"] == "application/pdf"
+    assert signed["ResponseContentDisposition"].startswith('attachment; filename="report.pdf"')
+    assert not any(name == "get_object" for name, _ in presign_s3.calls)
+
+
+def test_download_public_mode_redirects_to_the_public_url(session: Session, presign_s3: FakeS3, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "R2_PUBLIC_URL", "https://cdn.example.com")
+    media = _stored_pdf(session, presign_s3)
+
+    response = download_media_file(session, media.id, mode="public")
+
+    assert (response.status_code, response.headers["location"]) == (302, "https://cdn.example.com/report.pdf")
+
+
+def test_download_proxy_mode_honours_range_requests(session: Session, presign_s3: FakeS3):
+    media = _stored_pdf(session, presign_s3)
+
+    whole = download_media_file(session, media.id, mode="proxy")
+    assert (whole.status_code, whole.headers["accept-ranges"], _body(whole)) == (200, "bytes", b"%PDF-0123456789")
+
+    partial = download_media_file(session, media.id, mode="proxy", range_header="bytes=5-9")
+    assert partial.status_code == 206
+    assert partial.headers["content-range"] == "bytes 5-9/15"
+    assert partial.headers["content-length"] == "5"
+    assert _body(partial) == b"01234"
+
+    with pytest.raises(HTTPException) as raised:
+        download_media_file(session, media.id, mode="proxy", range_header="bytes=100-200")
+    assert raised.value.status_code == 416
+
+
+def test_create_media_files_uploads_each_new_content_once(session: Session, monkeypatch: pytest.MonkeyPatch):
+    s3 = FakeS3()
+    monkeypatch.setattr(upload_service, "client", s3)
+    template = create_media_files(session, uuid4(), _upload_files(1), None, None, None)[0]
+    files = [
+        UploadFile(file=BytesIO(content), filename=name, headers=Headers({"content-type": "application/pdf"}))
+        for name, content in (("a.pdf", b"photo 0"), ("b.pdf", b"brochure"), ("c.pdf", b"brochure"))
+    ]
+    s3.calls.clear()
+
+    media = create_media_files(session, uuid4(), files, None, None, None)
+
+    uploads = [kwargs["Key"] for name, kwargs in s3.calls if name == "upload_fileobj"]
+    assert uploads == [content_key(hashlib.sha256(b"brochure").hexdigest())]
+    assert media[0].storage_key == template.storage_key
+    assert media[1].storage_key == media[2].storage_key == uploads[0]
+    assert [m.file_name for m in media] == ["a.pdf", "b.pdf", "c.pdf"]
+
+
+def test_failed_batch_keeps_objects_other_files_use(session: Session, monkeypatch: pytest.MonkeyPatch):
+    s3 = FakeS3(fail_key=content_key(hashlib.sha256(b"photo 1").hexdigest()))
+    monkeypatch.setattr(upload_service, "client", s3)
+    monkeypatch.setattr(settings, "UPLOAD_CONCURRENCY", 1)
+    shared = create_media_files(session, uuid4(), _upload_files(1), None, None, None)[0]
+
+    with pytest.raises(HTTPException) as raised:
+        create_media_files(session, uuid4(), _upload_files(2), None, None, None)
+
+    assert [f["status"] for f in raised.value.detail["files"]] == ["rolled_back", "failed"]
+    assert shared.storage_key in s3.objects
+    assert not any(name == "delete_objects" for name, _ in s3.calls)
+
+
+def test_download_names_outside_latin1_get_an_ascii_fallback(session: Session, presign_s3: FakeS3):
+    presign_s3.objects["plan.pdf"] = b"%PDF-"
+    media = MediaFile(file_name='平面図 "final".pdf', file_type="application/pdf", file_size=5, file_path="x", storage_key="plan.pdf")
+    session.add(media)
+    session.commit()
+
+    response = download_media_file(session, media.id, mode="proxy")
+
+    assert response.headers["content-disposition"] == (
+        'attachment; filename="___ _final_.pdf"; '
+        "filename*=UTF-8''%E5%B9%B3%E9%9D%A2%E5%9B%B3%20%22final%22.pdf"
+    )
+
+
+def test_sweep_keeps_objects_that_are_referenced_or_recent(session: Session, monkeypatch: pytest.MonkeyPatch):
+    s3 = FakeS3()
+    monkeypatch.setattr(upload_service, "client", s3)
+    used = create_media_files(session, uuid4(), _upload_files(1), None, None, None)[0].storage_key
+    orphan = content_key("0" * 64)
+    s3.objects[orphan] = b"orphan"
+
+    # Another request may have just stored `orphan` and not committed its row yet
+    assert sweep_unreferenced_objects(session, [used, orphan]) == []
+    s3.object_age = timedelta(hours=2)
+    assert sweep_unreferenced_objects(session, [used, orphan, content_key("1" * 64)]) == [orphan]
+    assert list(s3.objects) == [used]
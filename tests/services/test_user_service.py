@@ -1,19 +1,24 @@
 import pytest
 from uuid import uuid4
 from fastapi import HTTPException
+from passlib.hash import bcrypt
+from sqlalchemy import event
 from sqlmodel import Session, SQLModel, create_engine
 
+from app.core.config import settings
 from app.core.security import verify_password
 from app.models.company import Company  # noqa: F401  # ensure FK tables exist
 from app.models.user import Role, User
 from app.schemas.paging import Paging
 from app.schemas.user import RegisterRequest, UserUpdate
-from app.services import user_service
+from app.services import email_service, user_service
+from app.services.job_queue import run_pending_jobs
 from app.services.user_service import (
     authenticate_user,
     create_user,
     forgot_password,
     get_all_users,
+    get_cached_user,
     get_user_by_id,
     logout_user,
     reset_password,
@@ -37,8 +42,8 @@ def deterministic_code(monkeypatch):
 
 @pytest.fixture(autouse=True)
 def stub_email_delivery(monkeypatch: pytest.MonkeyPatch):
-    monkeypatch.setattr(user_service, "send_verification_email", lambda *_args, **_kwargs: None)
-    monkeypatch.setattr(user_service, "send_password_reset_email", lambda *_args, **_kwargs: None)
+    monkeypatch.setattr(email_service, "send_verification_email", lambda *_args, **_kwargs: None)
+    monkeypatch.setattr(email_service, "send_password_reset_email", lambda *_args, **_kwargs: None)
 
 
 def test_create_user_persists_and_hashes_password(session: Session, monkeypatch: pytest.MonkeyPatch):
@@ -49,7 +54,7 @@ def test_create_user_persists_and_hashes_password(session: Session, monkeypatch:
         sent_payload["verification_code"] = verification_code
 
     monkeypatch.setattr(
-        user_service,
+        email_service,
         "send_verification_email",
         fake_send_verification_email,
     )
@@ -68,6 +73,8 @@ def test_create_user_persists_and_hashes_password(session: Session, monkeypatch:
     assert user.verification_code == "123456"
     assert verify_password("Secret123", user.hashed_password)
     assert user.is_verified is False
+    assert sent_payload == {}
+    assert run_pending_jobs(session.get_bind()) == 1
     assert sent_payload == {
         "to_email": "test@example.com",
         "verification_code": "123456",
@@ -149,6 +156,25 @@ def test_authenticate_user_requires_verification(session: Session):
     assert authenticated.id == user.id
 
 
+def test_authenticate_user_rehashes_password_with_configured_cost(session: Session):
+    cheap_hash = bcrypt.using(rounds=4).hash("Secret123")
+    user = User(
+        fullname="Legacy Hash",
+        email="legacy@example.com",
+        phone="08000000011",
+        hashed_password=cheap_hash,
+        is_verified=True,
+    )
+    session.add(user)
+    session.commit()
+
+    authenticated = authenticate_user(session, "legacy@example.com", "Secret123")
+
+    assert authenticated.hashed_password != cheap_hash
+    assert authenticated.hashed_password.split("$")[2] == f"{settings.BCRYPT_ROUNDS:02d}"
+    assert verify_password("Secret123", authenticated.hashed_password)
+
+
 def test_get_all_users_supports_filters_and_search(session: Session):
     admin = create_user(
         session,
@@ -198,6 +224,35 @@ def test_get_user_by_id_returns_record(session: Session):
     assert found.email == "fetch@example.com"
 
 
+def test_get_cached_user_skips_the_database_until_the_user_changes(session: Session):
+    user = create_user(
+        session,
+        RegisterRequest(
+            email="cached@example.com",
+            password="Secret123",
+            fullname="Cached",
+            phone="08000000010",
+        ),
+    )
+    user_id = user.id
+    statements: list[str] = []
+    event.listen(session.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    assert get_cached_user(session, user_id).email == "cached@example.com"
+    session.expunge_all()
+    loaded = len(statements)
+
+    cached = get_cached_user(session, user_id)
+    assert cached.fullname == "Cached"
+    assert cached in session
+    assert len(statements) == loaded
+
+    update_user(session, user_id, UserUpdate(fullname="Renamed"))
+    session.expunge_all()
+
+    assert get_cached_user(session, user_id).fullname == "Renamed"
+
+
 def test_update_user_persists_changes(session: Session):
     user = create_user(
         session,
@@ -246,7 +301,7 @@ def test_forgot_password_updates_verification_code(session: Session, monkeypatch
         sent_payload["verification_code"] = verification_code
 
     monkeypatch.setattr(
-        user_service,
+        email_service,
         "send_password_reset_email",
         fake_send_password_reset_email,
     )
@@ -268,6 +323,7 @@ def test_forgot_password_updates_verification_code(session: Session, monkeypatch
 
     assert updated.verification_code == "123456"
     assert updated.id == user.id
+    run_pending_jobs(session.get_bind())
     assert sent_payload == {
         "to_email": "resetme@example.com",
         "verification_code": "123456",
@@ -281,7 +337,7 @@ def test_forgot_password_returns_none_for_unknown_email(session: Session, monkey
         sent["called"] = True
 
     monkeypatch.setattr(
-        user_service,
+        email_service,
         "send_password_reset_email",
         fake_send_password_reset_email,
     )
@@ -289,6 +345,7 @@ def test_forgot_password_returns_none_for_unknown_email(session: Session, monkey
     result = forgot_password(session, "missing@example.com")
 
     assert result is None
+    assert run_pending_jobs(session.get_bind()) == 0
     assert sent["called"] is False
 
 